@@ -1,20 +1,148 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.batch import calculate_batch
+from mortgage_calculator.amortization import choose_bucket_months
+from mortgage_calculator.cache import ResultCache
+from mortgage_calculator.export import EXPORT_FORMATS, stream_schedules
+from mortgage_calculator.factors import factor_table
+from mortgage_calculator.http_cache import CachedBody, etag_matches, negotiate_encoding, request_etag
+from mortgage_calculator.payload import COLUMNAR_DTYPES, annuity_payments_columnar
+from mortgage_calculator.figures import sensitivity_figure
+from mortgage_calculator.sensitivity import SENSITIVITY_METRICS, grid_axis, sensitivity_grid
+from mortgage_calculator.session import SessionStore
+from mortgage_calculator.singleflight import FlightTimeout, SingleFlight
+from mortgage_calculator.simulation import DEFAULT_QUANTILES, stress_test
+from mortgage_calculator.solver import solve
+from mortgage_calculator.logging_setup import configure_logging_from_env
+from mortgage_calculator.metrics import SIZE_BUCKETS, MetricsRegistry, cache_gauges, singleflight_gauges
 from flask_cors import CORS
+import json
+import logging
+import os
+import time
+
+configure_logging_from_env()
+logger = logging.getLogger('mortgage_api')
 
 app = Flask(__name__)
-CORS(app)
+# ETag нужен клиенту для If-None-Match, поэтому заголовок открыт для кросс-доменных запросов
+CORS(app, expose_headers=['ETag'])
+
+# Кэш сериализованных ответов; размер и время жизни задаются переменными окружения
+result_cache = ResultCache(
+    maxsize=int(os.environ.get('MORTGAGE_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('MORTGAGE_CACHE_TTL', 300)) or None,
+)
+# Одинаковые одновременные запросы ждут одно вычисление, а не считают каждый свое;
+# время ожидания меньше таймаута воркера gunicorn (MORTGAGE_TIMEOUT)
+single_flight = SingleFlight(timeout=float(os.environ.get('MORTGAGE_COALESCE_TIMEOUT', 25)) or None)
+# Таблица аннуитетных коэффициентов (MORTGAGE_FACTOR_TABLE) открывается при старте воркера,
+# чтобы ошибка в пути или файле проявилась сразу, а не в первом запросе
+factor_table()
+# Стресс-тест: число процессов и ограничение памяти на блок траекторий
+SIMULATION_WORKERS = int(os.environ.get('MORTGAGE_SIM_WORKERS', 1))
+SIMULATION_MEMORY_CAP = int(float(os.environ.get('MORTGAGE_SIM_MEMORY_MB', 64)) * 2 ** 20)
+
+# Метрики для /metrics: задержки по эндпоинтам и фазам, размеры тел, ошибки
+metrics = MetricsRegistry()
+metrics.histogram('request_duration_seconds', 'Время обработки запроса')
+metrics.histogram('phase_duration_seconds', 'Время фаз обработки запроса: parse, compute, serialize, wait (ожидание одинакового запроса)')
+metrics.histogram('request_bytes', 'Размер тела запроса', SIZE_BUCKETS)
+metrics.histogram('response_bytes', 'Размер тела ответа (без потоковых ответов)', SIZE_BUCKETS)
+metrics.counter('errors_total', 'Ответы с кодом ошибки')
+metrics.counter('not_modified_total', 'Ответы 304 на If-None-Match без пересчета')
+
+def endpoint_label() -> str:
+    # Шаблон маршрута, а не путь, чтобы число серий не зависело от запросов к несуществующим адресам
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    g.request_started = g.phase_started = time.perf_counter()
+
+def mark_phase(phase: str) -> None:
+    """
+    Записать длительность фазы phase: время с начала запроса или с конца предыдущей фазы.
+    """
+    now = time.perf_counter()
+    metrics.observe('phase_duration_seconds', now - g.phase_started, endpoint=endpoint_label(), phase=phase)
+    g.phase_started = now
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    endpoint = endpoint_label()
+    metrics.observe('request_duration_seconds', time.perf_counter() - started, endpoint=endpoint, method=request.method)
+    if request.content_length:
+        metrics.observe('request_bytes', request.content_length, endpoint=endpoint)
+    if response.content_length is not None:
+        metrics.observe('response_bytes', response.content_length, endpoint=endpoint)
+    if response.status_code >= 400:
+        metrics.inc('errors_total', endpoint=endpoint, status=str(response.status_code))
+    return response
 
 # Удалён TEMPLATE и маршрут '/'
 
 def get_table_html(calc: MortgageCalculator) -> str:
-    res = calc.print_table(return_html=True)
-    return res if res is not None else ''
+    return calc.table_html()
 
 def get_plot_html(calc: MortgageCalculator) -> str:
     res = calc.plot_graph(return_html=True)
     return res if res is not None else ''
 
+def calculator_key(calc: MortgageCalculator) -> tuple:
+    value = calc.property_value if calc.mode == 'property_value' else calc.monthly_payment
+    return (calc.mode, calc.interest_rate, calc.initial_payment, calc.min_initial_payment_percentage, value,
+            calc.prepayments, calc.prepayment_strategy if calc.prepayments else None, calc.rate_schedule, calc.exact,
+            calc.payment_scheme)
+
+def cached_json(key: tuple, build):
+    """
+    JSON-ответ для нормализованного ключа запроса key: 304 при совпадении If-None-Match (build не вызывается),
+    иначе тело из кэша или build(), сжатое по Accept-Encoding. Одновременные запросы с одним ключом
+    вызывают build() один раз (см. mortgage_calculator.singleflight).
+    """
+    mark_phase('parse')
+    etag = request_etag(key)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        metrics.inc('not_modified_total', endpoint=endpoint_label())
+        return conditional_headers(app.response_class(status=304), etag)
+    def compute():
+        result = build()
+        mark_phase('compute')
+        body = CachedBody(app.json.dumps(result).encode('utf-8'))
+        mark_phase('serialize')
+        # В кэш до освобождения ключа, чтобы запрос сразу после окончания вычисления не считал заново
+        result_cache.put(key, body)
+        return body
+    cached = result_cache.get(key)
+    if cached is None:
+        cached, shared = single_flight.do(key, compute)
+        if shared:
+            mark_phase('wait')
+    body, encoding = cached.encoded(negotiate_encoding(request.headers.get('Accept-Encoding')))
+    response = conditional_headers(app.response_class(body, mimetype='application/json'), etag)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def conditional_headers(response, etag: str):
+    # no-cache: клиент может хранить ответ, но перед использованием проверяет его через If-None-Match
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def error_response(e: Exception):
+    """
+    Ответ 400 с текстом ошибки (503, если не дождались одинакового запроса); трассировка пишется в лог
+    через очередь, без блокировки запроса.
+    """
+    logger.exception('Ошибка обработки запроса: %s', e, extra={'fields': {'path': request.path}})
+    return jsonify({'error': str(e)}), 503 if isinstance(e, FlightTimeout) else 400
+
 def get_mode(data):
     mode = data.get('mode')
     if mode in ('property_value', 'monthly_payment'):
@@ -25,84 +153,419 @@ def get_mode(data):
         return 'monthly_payment'
     return None
 
+def build_calculator(data) -> MortgageCalculator:
+    """
+    Калькулятор по параметрам запроса; все эндпоинты строят калькулятор здесь,
+    чтобы новое поле запроса одинаково поддерживалось везде.
+    """
+    mode = get_mode(data)
+    if not mode:
+        raise ValueError('Необходимо указать режим расчета (mode) или property_value/monthly_payment')
+    return MortgageCalculator(
+        interest_rate=float(data['interest_rate']),
+        initial_payment=float(data['initial_payment']),
+        min_initial_payment_percentage=float(data['min_initial_payment_percentage']),
+        mode=mode,
+        property_value=data.get('property_value'),
+        monthly_payment=data.get('monthly_payment'),
+        prepayments=data.get('prepayments'),
+        prepayment_strategy=data.get('prepayment_strategy', 'reduce_term'),
+        rate_schedule=data.get('rate_schedule'),
+        exact=bool(data.get('exact')),
+        payment_scheme=data.get('payment_scheme', 'annuity')
+    )
+
+BUCKET_NAMES = {'month': 1, 'quarter': 3, 'year': 12}
+
+def get_detail(data, n: int):
+    """
+    Детализация графика по месяцам: (размер корзины в месяцах, диапазон месяцев или None).
+    Корзина задается через "bucket" ('month' | 'quarter' | 'year' | число месяцев)
+    или подбирается по "max_points"; "month_range": [с, по] — приближение к диапазону месяцев.
+    """
+    month_range = data.get('month_range')
+    if month_range is not None:
+        first, last = int(month_range[0]), int(month_range[1])
+        if first < 1 or first > last:
+            raise ValueError('Некорректный диапазон месяцев')
+        month_range = (first, min(last, n))
+    bucket = data.get('bucket')
+    if bucket is not None:
+        bucket_months = BUCKET_NAMES[bucket] if bucket in BUCKET_NAMES else int(bucket)
+        if bucket_months <= 0:
+            raise ValueError('Размер корзины должен быть больше 0')
+    elif data.get('max_points') is not None:
+        first, last = month_range or (1, n)
+        bucket_months = choose_bucket_months(last - first + 1, int(data['max_points']))
+    else:
+        bucket_months = 1
+    return bucket_months, month_range
+
+def get_term_months(data) -> int:
+    months = data.get('months')
+    n = int(months) if months is not None else int(data['years']) * 12
+    if n <= 0:
+        raise ValueError('Срок должен быть больше 0')
+    return n
+
 @app.route('/api/calculate', methods=['POST'])
 def api_calculate():
     try:
-        print('--- /api/calculate called ---')
-        print('Request JSON:', request.json)
-    data = request.json
-    interest_rate = float(data['interest_rate'])
-        initial_payment = float(data['initial_payment'])
-        min_initial_payment_percentage = float(data['min_initial_payment_percentage'])
-    min_years = int(data['min_years'])
-    max_years = int(data['max_years'])
-    step = int(data.get('step', 0)) if 'step' in data and data['step'] else None
-        property_value = data.get('property_value')
-        monthly_payment = data.get('monthly_payment')
-        mode = get_mode(data)
-        if not mode:
-            return jsonify({'error': 'Необходимо указать режим расчета (mode) или property_value/monthly_payment'}), 400
-        calc = MortgageCalculator(
-            interest_rate=interest_rate,
-            initial_payment=initial_payment,
-            min_initial_payment_percentage=min_initial_payment_percentage,
-            mode=mode,
-            property_value=property_value,
-            monthly_payment=monthly_payment
-        )
-    if step:
-        calc.calculate(min_years, max_years, step)
-    else:
-        calc.calculate(min_years, max_years)
-    return jsonify(calc.results)
+        data = request.json
+        logger.debug('/api/calculate', extra={'fields': {'request': data}})
+        min_years = int(data['min_years'])
+        max_years = int(data['max_years'])
+        step = int(data.get('step', 0)) if 'step' in data and data['step'] else None
+        calc = build_calculator(data)
+        def build():
+            if step:
+                calc.calculate(min_years, max_years, step)
+            else:
+                calc.calculate(min_years, max_years)
+            return calc.results.to_dicts()
+        return cached_json(('calculate', calculator_key(calc), min_years, max_years, step), build)
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/table', methods=['POST'])
+def api_table():
+    """
+    Отформатированная таблица результатов: тело как у /api/calculate,
+    "format": "json" (заголовки и строки, по умолчанию) или "html".
+    """
+    try:
+        data = request.json
+        calc = build_calculator(data)
+        min_years = int(data['min_years'])
+        max_years = int(data['max_years'])
+        step = int(data['step']) if data.get('step') else None
+        if data.get('format', 'json') == 'html':
+            calc.calculate(min_years, max_years, step)
+            return app.response_class(get_table_html(calc), mimetype='text/html')
+        def build():
+            calc.calculate(min_years, max_years, step)
+            return calc.table_rows()
+        return cached_json(('table', calculator_key(calc), min_years, max_years, step), build)
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/payment_structure', methods=['POST'])
+def api_payment_structure():
+    """
+    Диаграмма структуры выплаты по срокам в формате Plotly JSON: тело как у /api/calculate.
+    "debug_html": true — вернуть HTML, отрисованный через Plotly (медленный отладочный путь).
+    """
+    try:
+        data = request.json
+        calc = build_calculator(data)
+        min_years = int(data['min_years'])
+        max_years = int(data['max_years'])
+        step = int(data['step']) if data.get('step') else None
+        if data.get('debug_html'):
+            calc.calculate(min_years, max_years, step)
+            return app.response_class(get_plot_html(calc), mimetype='text/html')
+        def build():
+            calc.calculate(min_years, max_years, step)
+            plot_data, plot_layout = calc.plot_graph_data()
+            return {'data': plot_data, 'layout': plot_layout}
+        return cached_json(('payment_structure', calculator_key(calc), min_years, max_years, step), build)
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/calculate_batch', methods=['POST'])
+def api_calculate_batch():
+    """
+    Расчет нескольких сценариев за один запрос.
+    Тело: {"scenarios": [...], "min_years": ..., "max_years": ..., "step": ...};
+    каждый сценарий содержит те же поля, что и запрос /api/calculate, и может переопределять сроки.
+    Ответ: {"scenarios": [{"results": [...]} | {"error": "..."}, ...]} в порядке запроса.
+    """
+    try:
+        data = request.json
+        scenarios = data.get('scenarios')
+        if not isinstance(scenarios, list) or not scenarios:
+            return jsonify({'error': 'Необходимо указать непустой список сценариев (scenarios)'}), 400
+        calculators = []
+        years_ranges = []
+        errors = {}
+        for i, scenario in enumerate(scenarios):
+            try:
+                calc = build_calculator(scenario)
+                min_years = int(scenario.get('min_years', data.get('min_years', 1)))
+                max_years = int(scenario.get('max_years', data.get('max_years', 30)))
+                step = scenario.get('step', data.get('step'))
+                years_ranges.append((min_years, max_years, int(step) if step else None))
+                calculators.append(calc)
+            except Exception as e:
+                errors[i] = str(e)
+        mark_phase('parse')
+        batches = iter(calculate_batch(calculators, years_ranges))
+        response = [{'error': errors[i]} if i in errors else {'results': next(batches).to_dicts()} for i in range(len(scenarios))]
+        mark_phase('compute')
+        body = jsonify({'scenarios': response})
+        mark_phase('serialize')
+        return body
     except Exception as e:
-        import traceback
-        print('ERROR:', e)
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 400
+        return error_response(e)
 
 @app.route('/api/annuity_payments', methods=['POST'])
 def api_annuity_payments():
     try:
-    data = request.json
-    interest_rate = float(data['interest_rate'])
-        initial_payment = float(data['initial_payment'])
-        min_initial_payment_percentage = float(data['min_initial_payment_percentage'])
+        data = request.json
         months = data.get('months')
         if months is not None:
             years = float(months) / 12
         else:
-    years = int(data['years'])
-        mode = data.get('mode') #or get_mode(data)
-        property_value = data.get('property_value')
-        monthly_payment = data.get('monthly_payment')
+            years = int(data['years'])
+        calc = build_calculator(data)
+        years = int(round(years))
+        mode2 = data.get('mode2', 'months')
+        bucket_months, month_range = get_detail(data, years * 12)
+        response_format = data.get('format', 'json')
+        if response_format == 'columnar':
+            dtype = data.get('dtype', 'float64')
+            if dtype not in COLUMNAR_DTYPES:
+                return jsonify({'error': f'Неподдерживаемый тип данных: {dtype}'}), 400
+            def build_columnar():
+                response = annuity_payments_columnar(calc, years, mode2, dtype, bucket_months, month_range)
+                if calc.prepayments:
+                    response['prepayment'] = calc.prepayment_summary(years * 12)
+                return response
+            return cached_json(('annuity_payments_columnar', calculator_key(calc), years, mode2, bucket_months, month_range, dtype),
+                               build_columnar)
+        def build():
+            plot_data, plot_layout = calc.plot_annuity_payments_data(years, mode2, bucket_months, month_range)
+            response = {'data': plot_data, 'layout': plot_layout}
+            if calc.prepayments:
+                response['prepayment'] = calc.prepayment_summary(years * 12)
+            return response
+        return cached_json(('annuity_payments', calculator_key(calc), years, mode2, bucket_months, month_range), build)
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/schedule_export', methods=['POST'])
+def api_schedule_export():
+    """
+    Потоковая выгрузка помесячного графика платежей.
+    Тело: параметры одного сценария (как в /api/annuity_payments, с years или months)
+    или {"scenarios": [...]}; "format": "csv" | "ndjson", необязательный "chunk_months".
+    """
+    try:
+        data = request.json
+        fmt = data.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f'Неизвестный формат выгрузки: {fmt}'}), 400
+        chunk_months = int(data.get('chunk_months', 1200))
+        if chunk_months <= 0:
+            return jsonify({'error': 'Размер блока должен быть больше 0'}), 400
+        scenarios = data['scenarios'] if 'scenarios' in data else [data]
+        if not isinstance(scenarios, list) or not scenarios:
+            return jsonify({'error': 'Необходимо указать непустой список сценариев (scenarios)'}), 400
+        plan = [(build_calculator(scenario), get_term_months(scenario)) for scenario in scenarios]
+        # Расчет и сериализация идут по мере отправки ответа, уже после записи метрик запроса
+        mark_phase('parse')
+    except Exception as e:
+        return error_response(e)
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(stream_schedules(plan, fmt, chunk_months)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=schedule.{fmt}'},
+    )
+
+@app.route('/api/solve', methods=['POST'])
+def api_solve():
+    """
+    Подбор срока, стоимости жилья или ставки под ограничения (см. mortgage_calculator.solver.solve).
+    Тело: один запрос с полем "goal" или {"queries": [...]}; ответ — объект или {"results": [...]}.
+    """
+    try:
+        data = request.json
+        if 'queries' in data and not isinstance(data['queries'], list):
+            return jsonify({'error': 'Поле queries должно быть списком'}), 400
+        mark_phase('parse')
+        # Разбор запросов solve() идет вместе с расчетом и попадает в фазу compute
+        answers = solve(data['queries'] if 'queries' in data else [data])
+        mark_phase('compute')
+        if 'queries' in data:
+            body, status = jsonify({'results': answers}), 200
+        else:
+            body, status = jsonify(answers[0]), 400 if 'error' in answers[0] else 200
+        mark_phase('serialize')
+        return body, status
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/stress_test', methods=['POST'])
+def api_stress_test():
+    """
+    Стресс-тест плавающей ставки методом Монте-Карло (см. mortgage_calculator.simulation.stress_test).
+    Тело: параметры сценария (как в /api/annuity_payments, с years или months) и необязательный
+    объект "simulation": paths, seed, model ('vasicek' | 'lognormal'), volatility, mean_reversion,
+    long_term_rate, reset_months, floor, cap, quantiles. Ставки и волатильность — в процентах годовых.
+    """
+    try:
+        data = request.json
+        calc = build_calculator(data)
+        if calc.rate_schedule:
+            return jsonify({'error': 'Стресс-тест моделирует ставку сам и не поддерживает rate_schedule'}), 400
+        if calc.differentiated:
+            return jsonify({'error': 'Стресс-тест поддерживает только аннуитетные платежи'}), 400
+        n = get_term_months(data)
+        sim = data.get('simulation') or {}
+        long_term_rate = sim.get('long_term_rate')
+        cap = sim.get('cap')
+        options = {
+            'paths': int(sim.get('paths', 10_000)),
+            'seed': int(sim.get('seed', 0)),
+            'model': sim.get('model', 'vasicek'),
+            'volatility': float(sim.get('volatility', 1)) / 100,
+            'mean_reversion': float(sim.get('mean_reversion', 0.2)),
+            'long_term_rate': float(long_term_rate) / 100 if long_term_rate is not None else None,
+            'reset_months': int(sim.get('reset_months', 12)),
+            'floor': float(sim.get('floor', 0)) / 100,
+            'cap': float(cap) / 100 if cap is not None else None,
+            'quantiles': tuple(float(q) for q in sim.get('quantiles', DEFAULT_QUANTILES)),
+        }
+        loan = calc.loan_for_months(n)
+        return cached_json(('stress_test', calculator_key(calc), n, tuple(sorted(options.items()))),
+                           lambda: stress_test(loan, calc.interest_rate, n, memory_cap=SIMULATION_MEMORY_CAP,
+                                               workers=SIMULATION_WORKERS, **options))
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/sensitivity', methods=['POST'])
+def api_sensitivity():
+    """
+    Чувствительность к ставке и сроку: матрицы ежемесячного платежа, общей выплаты и переплаты по сетке
+    (см. mortgage_calculator.sensitivity) и тепловая карта показателя "metric" в формате Plotly JSON.
+    Тело: "mode", "rates" и "years" — диапазоны {"min", "max", "step"} или списки (ставки в процентах),
+    "property_value" и "initial_payment" (в режиме property_value взнос может быть диапазоном)
+    или "monthly_payment" (может быть диапазоном) и "initial_payment".
+    """
+    try:
+        data = request.json
+        mode = get_mode(data)
         if not mode:
-            return jsonify({'error': 'Необходимо указать режим расчета (mode) или property_value/monthly_payment'}), 400
+            raise ValueError('Необходимо указать режим расчета (mode) или property_value/monthly_payment')
+        metric = data.get('metric', 'overpayment')
+        if metric not in SENSITIVITY_METRICS:
+            raise ValueError(f'Неизвестный показатель: {metric}')
+        rates = grid_axis(data['rates'], 'rates')
+        years = grid_axis(data['years'], 'years')
         if mode == 'property_value':
-            calc = MortgageCalculator(
-                interest_rate=interest_rate,
-                initial_payment=initial_payment,
-                min_initial_payment_percentage=min_initial_payment_percentage,
-                mode=mode,
-                property_value=property_value
-            )
-        elif mode == 'monthly_payment':
-            calc = MortgageCalculator(
-                interest_rate=interest_rate,
-                initial_payment=initial_payment,
-                min_initial_payment_percentage=min_initial_payment_percentage,
-                mode=mode,
-                monthly_payment=monthly_payment
-            )
+            initial_payment = grid_axis(data['initial_payment'], 'initial_payment')
+            value = float(data['property_value'])
+            axis_key = (tuple(initial_payment.tolist()), value)
         else:
-            return jsonify({'error': 'Неизвестный режим расчета'}), 400
-        plot_data, plot_layout = calc.plot_annuity_payments_data(int(round(years)), data.get('mode2', 'months'))
-        return jsonify({'data': plot_data, 'layout': plot_layout})
+            initial_payment = float(data['initial_payment'])
+            value = grid_axis(data['monthly_payment'], 'monthly_payment')
+            axis_key = (initial_payment, tuple(value.tolist()))
+        key = ('sensitivity', mode, metric, tuple(rates.tolist()), tuple(years.tolist()), axis_key)
+        def build():
+            grid = sensitivity_grid(mode=mode, rates=rates, years=years, initial_payment=initial_payment, value=value)
+            plot_data, plot_layout = sensitivity_figure(grid, metric)
+            return {'grid': grid, 'data': plot_data, 'layout': plot_layout}
+        return cached_json(key, build)
     except Exception as e:
-        import traceback
-        print('ERROR:', e)
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 400
+        return error_response(e)
+
+# Живые сессии для интерфейса с ползунками хранятся в памяти процесса, поэтому PATCH и поток событий
+# должны попадать в тот же процесс: gunicorn.conf.py включает их (MORTGAGE_SESSIONS=1) только при одном воркере
+SESSIONS_ENABLED = os.environ.get('MORTGAGE_SESSIONS', '1') == '1'
+live_sessions = SessionStore(
+    build_calculator,
+    ttl=float(os.environ.get('MORTGAGE_SESSION_TTL', 600)),
+    max_sessions=int(os.environ.get('MORTGAGE_SESSION_MAX', 1000)),
+    max_streams=int(os.environ.get('MORTGAGE_SESSION_STREAMS', 8)) or None,
+)
+SESSION_HEARTBEAT = 15.0
+
+def sessions_disabled_response():
+    return jsonify({'error': 'Живые сессии отключены на этом сервере (MORTGAGE_SESSIONS=0): '
+                             'они обслуживаются отдельным сервером с одним воркером'}), 503
+
+@app.route('/api/session', methods=['POST'])
+def api_session_create():
+    """
+    Создать живую сессию расчета (см. mortgage_calculator.session). Тело: параметры как в /api/calculate
+    и /api/annuity_payments (min_years, max_years, step, years, mode2). Ответ: {"session_id", "version"}.
+    Результаты приходят в поток событий GET /api/session/<id>/events.
+    """
+    if not SESSIONS_ENABLED:
+        return sessions_disabled_response()
+    try:
+        session = live_sessions.create(request.json)
+        # Части сессии считаются в ее фоновом потоке, вне фаз запроса
+        mark_phase('parse')
+        return jsonify({'session_id': session.id, 'version': session.version})
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/session/<session_id>', methods=['PATCH'])
+def api_session_update(session_id):
+    """
+    Изменить параметры сессии: тело содержит только изменившиеся поля. Ответ: {"version"} новой версии.
+    """
+    if not SESSIONS_ENABLED:
+        return sessions_disabled_response()
+    try:
+        session = live_sessions.get(session_id)
+    except KeyError:
+        return jsonify({'error': 'Сессия не найдена'}), 404
+    try:
+        version = session.update(request.json or {})
+        mark_phase('parse')
+        return jsonify({'version': version})
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/session/<session_id>', methods=['DELETE'])
+def api_session_close(session_id):
+    live_sessions.close(session_id)
+    return '', 204
+
+@app.route('/api/session/<session_id>/events', methods=['GET'])
+def api_session_events(session_id):
+    """
+    Поток Server-Sent Events сессии. При подключении приходят все части целиком, затем только изменения:
+    "results" (строки по срокам), "annuity" (точки графика), "done" (версия рассчитана полностью),
+    "error", "closed". В каждом событии есть "version"; пустые комментарии раз в 15 с поддерживают соединение.
+    Одновременно открыто не больше MORTGAGE_SESSION_STREAMS потоков, сверх этого — 503.
+    """
+    if not SESSIONS_ENABLED:
+        return sessions_disabled_response()
+    try:
+        session = live_sessions.get(session_id)
+    except KeyError:
+        return jsonify({'error': 'Сессия не найдена'}), 404
+    if not live_sessions.open_stream():
+        return jsonify({'error': 'Слишком много открытых потоков событий, повторите позже'}), 503
+    session.resync()
+    def generate():
+        for event in session.stream(SESSION_HEARTBEAT):
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            name, payload = event
+            yield f'event: {name}\ndata: {json.dumps(payload, ensure_ascii=False, separators=(",", ":"))}\n\n'
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Место освобождается при закрытии ответа сервером, даже если поток так и не начал читаться
+    response.call_on_close(live_sessions.release_stream)
+    return response
+
+@app.route('/api/cache_stats', methods=['GET'])
+def api_cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Метрики процесса в текстовом формате Prometheus (при нескольких воркерах — у каждого свои).
+    """
+    gauges = cache_gauges(result_cache.stats()) + singleflight_gauges(single_flight.stats())
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
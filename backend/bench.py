@@ -0,0 +1,268 @@
+"""
+Микробенчмарки расчетного ядра, отрисовки и API.
+
+Покрывает MortgageCalculator.calculate, plot_annuity_payments_data (месяцы и годы),
+print_table, plot_graph и эндпоинты Flask через тестовый клиент на сетке параметров:
+сроки 1–50 лет, нулевая и ненулевые ставки, оба режима расчета, точный расчет в копейках
+и дифференцированные платежи.
+Результаты записываются в JSON; с --baseline медиана каждого случая сравнивается
+с базовым прогоном, и при замедлении сильнее порога команда завершается с кодом 1.
+
+Пример:
+    python bench.py --output bench.json
+    python bench.py --baseline bench.json --threshold 1.25 --threshold-for 'api.*=1.5'
+    python bench.py --filter 'calculate*' --repeat 9
+"""
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Кэш ответов отключен, чтобы эндпоинты каждый раз выполняли расчет; логи — только ошибки
+os.environ.setdefault('MORTGAGE_CACHE_SIZE', '0')
+os.environ.setdefault('MORTGAGE_LOG_LEVEL', 'ERROR')
+
+import numpy as np
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.sensitivity import sensitivity_grid
+
+Case = Tuple[str, Callable[[], object]]
+
+MODES = ('property_value', 'monthly_payment')
+RATES = (0.0, 7.5, 16.0)
+TERMS = (1, 5, 10, 20, 30, 50)
+PROPERTY_VALUE = 8_000_000
+INITIAL_PAYMENT = 2_000_000
+MONTHLY_PAYMENT = 60_000
+
+
+def scenario(mode: str, rate: float) -> Dict:
+    """
+    Параметры сценария в формате API для режима mode и годовой ставки rate (%).
+    """
+    data = {'interest_rate': rate, 'initial_payment': INITIAL_PAYMENT, 'min_initial_payment_percentage': 20, 'mode': mode}
+    if mode == 'property_value':
+        data['property_value'] = PROPERTY_VALUE
+    else:
+        data['monthly_payment'] = MONTHLY_PAYMENT
+    return data
+
+
+def calculator(mode: str, rate: float, exact: bool = False, payment_scheme: str = 'annuity') -> MortgageCalculator:
+    data = scenario(mode, rate)
+    return MortgageCalculator(
+        interest_rate=rate,
+        initial_payment=data['initial_payment'],
+        min_initial_payment_percentage=data['min_initial_payment_percentage'],
+        mode=mode,
+        property_value=data.get('property_value'),
+        monthly_payment=data.get('monthly_payment'),
+        exact=exact,
+        payment_scheme=payment_scheme,
+    )
+
+
+def core_cases() -> List[Case]:
+    cases: List[Case] = []
+    for mode in MODES:
+        for rate in RATES:
+            calc = calculator(mode, rate)
+            for max_years in (1, 30, 50):
+                cases.append((f'calculate[{mode},rate={rate:g},years=1-{max_years}]',
+                              lambda calc=calc, max_years=max_years: calc.calculate(1, max_years)))
+            for years in TERMS:
+                for mode2 in ('months', 'years'):
+                    cases.append((f'annuity_data[{mode},rate={rate:g},years={years},{mode2}]',
+                                  lambda calc=calc, years=years, mode2=mode2: calc.plot_annuity_payments_data(years, mode2)))
+            exact = calculator(mode, rate, exact=True)
+            cases.append((f'calculate_exact[{mode},rate={rate:g},years=1-30]', lambda calc=exact: calc.calculate(1, 30)))
+            cases.append((f'annuity_data_exact[{mode},rate={rate:g},years=30,months]',
+                          lambda calc=exact: calc.plot_annuity_payments_data(30)))
+            differentiated = calculator(mode, rate, payment_scheme='differentiated')
+            cases.append((f'calculate_differentiated[{mode},rate={rate:g},years=1-50]',
+                          lambda calc=differentiated: calc.calculate(1, 50)))
+            cases.append((f'annuity_data_differentiated[{mode},rate={rate:g},years=30,months]',
+                          lambda calc=differentiated: calc.plot_annuity_payments_data(30)))
+    rates = np.round(np.arange(1, 201) * 0.1, 1)
+    years = np.arange(1, 51)
+    cases.append(('sensitivity_grid[property_value,rates=200,years=1-50]',
+                  lambda: sensitivity_grid(mode='property_value', rates=rates, years=years,
+                                           initial_payment=INITIAL_PAYMENT, value=PROPERTY_VALUE)))
+    return cases
+
+
+def render_cases() -> List[Case]:
+    cases: List[Case] = []
+    for mode in MODES:
+        for rate in (0.0, 7.5):
+            calc = calculator(mode, rate)
+            calc.calculate(1, 30)
+            cases.append((f'print_table[{mode},rate={rate:g},years=1-30]', lambda calc=calc: calc.print_table(return_html=True)))
+            cases.append((f'plot_graph[{mode},rate={rate:g},years=1-30]', lambda calc=calc: calc.plot_graph(return_html=True)))
+    return cases
+
+
+def api_cases() -> List[Case]:
+    from app import app
+    client = app.test_client()
+
+    def post(path: str, body: Dict) -> Callable[[], object]:
+        def call():
+            response = client.post(path, json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path}: {response.status_code} {response.get_data(as_text=True)}')
+            return response.get_data()
+        return call
+
+    cases: List[Case] = []
+    for mode in MODES:
+        for rate in (0.0, 7.5):
+            data = scenario(mode, rate)
+            cases.append((f'api.calculate[{mode},rate={rate:g},years=1-50]',
+                          post('/api/calculate', dict(data, min_years=1, max_years=50))))
+            cases.append((f'api.table[{mode},rate={rate:g},years=1-30]',
+                          post('/api/table', dict(data, min_years=1, max_years=30))))
+            cases.append((f'api.payment_structure[{mode},rate={rate:g},years=1-30]',
+                          post('/api/payment_structure', dict(data, min_years=1, max_years=30))))
+            for years in (1, 30, 50):
+                for mode2 in ('months', 'years'):
+                    cases.append((f'api.annuity_payments[{mode},rate={rate:g},years={years},{mode2}]',
+                                  post('/api/annuity_payments', dict(data, years=years, mode2=mode2))))
+        # Сетка 200 ставок × 50 сроков × 3 значения взноса (платежа)
+        axis_name = 'initial_payment' if mode == 'property_value' else 'monthly_payment'
+        axis = {'min': 1_000_000, 'max': 3_000_000, 'step': 1_000_000} if mode == 'property_value' else {'min': 40_000, 'max': 80_000, 'step': 20_000}
+        cases.append((f'api.sensitivity[{mode},rates=200,years=1-50,{axis_name}=3]',
+                      post('/api/sensitivity', dict(scenario(mode, 0.0), **{axis_name: axis},
+                                                   rates={'min': 0.1, 'max': 20, 'step': 0.1}, years={'min': 1, 'max': 50}))))
+    return cases
+
+
+SUITES = {'core': core_cases, 'render': render_cases, 'api': api_cases}
+
+
+def time_case(func: Callable[[], object], repeat: int = 5, min_time: float = 0.05) -> Dict:
+    """
+    Время одного вызова func в секундах: число вызовов в серии подбирается так, чтобы серия
+    длилась не меньше min_time; серия повторяется repeat раз.
+    """
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.1))
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'loops': loops,
+        'repeat': repeat,
+    }
+
+
+def run(cases: Sequence[Case], repeat: int = 5, min_time: float = 0.05, verbose: bool = True) -> Dict:
+    results = {}
+    for name, func in cases:
+        results[name] = time_case(func, repeat, min_time)
+        if verbose:
+            print(f'{results[name]["median"] * 1e3:10.3f} мс  {name}', file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'min_time': min_time,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float,
+            overrides: Sequence[Tuple[str, float]] = ()) -> List[Dict]:
+    """
+    Сравнить медианы с базовым прогоном. Порог — допустимое отношение текущей медианы к базовой;
+    overrides — пары (шаблон имени, порог), последний подходящий шаблон имеет приоритет.
+    Случаи, которых нет в одном из прогонов, пропускаются.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        limit = threshold
+        for pattern, value in overrides:
+            if fnmatch(name, pattern):
+                limit = value
+        ratio = result['median'] / base['median'] if base['median'] > 0 else float('inf')
+        status = 'regression' if ratio > limit else 'improvement' if ratio < 1 / limit else 'ok'
+        rows.append({'name': name, 'baseline': base['median'], 'current': result['median'],
+                     'ratio': ratio, 'threshold': limit, 'status': status})
+    return rows
+
+
+def _parse_override(text: str) -> Tuple[str, float]:
+    pattern, _, value = text.rpartition('=')
+    if not pattern:
+        raise argparse.ArgumentTypeError('Ожидается ШАБЛОН=ПОРОГ')
+    return pattern, float(value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Микробенчмарки калькулятора ипотеки')
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES), help='наборы случаев (по умолчанию все)')
+    parser.add_argument('--filter', action='append', default=[], help='шаблон имени случая (fnmatch), можно несколько')
+    parser.add_argument('--repeat', type=int, default=5, help='число серий на случай')
+    parser.add_argument('--min-time', type=float, default=0.05, help='минимальная длительность серии, с')
+    parser.add_argument('--output', default=None, help='файл JSON с результатами')
+    parser.add_argument('--baseline', default=None, help='файл JSON базового прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=1.25, help='допустимое замедление медианы (отношение к базовой)')
+    parser.add_argument('--threshold-for', type=_parse_override, action='append', default=[],
+                        help='порог для случаев по шаблону: ШАБЛОН=ПОРОГ')
+    parser.add_argument('--list', action='store_true', help='только вывести имена случаев')
+    args = parser.parse_args(argv)
+
+    cases = [case for suite in (args.suite or list(SUITES)) for case in SUITES[suite]()]
+    if args.filter:
+        cases = [case for case in cases if any(fnmatch(case[0], pattern) for pattern in args.filter)]
+    if args.list:
+        print('\n'.join(name for name, _ in cases))
+        return 0
+
+    report = run(cases, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.threshold, args.threshold_for)
+    for row in rows:
+        if row['status'] != 'ok':
+            print(f'{row["status"]:12s} {row["ratio"]:6.2f}x  {row["baseline"] * 1e3:9.3f} -> {row["current"] * 1e3:9.3f} мс  {row["name"]}')
+    regressions = sum(row['status'] == 'regression' for row in rows)
+    print(f'Сравнено случаев: {len(rows)}, замедлений сверх порога: {regressions}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
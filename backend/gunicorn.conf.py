@@ -0,0 +1,33 @@
+"""
+Настройки production-сервера: gunicorn -c gunicorn.conf.py app:app
+
+Расчеты на NumPy занимают GIL, поэтому масштабирование по ядрам дают процессы (workers),
+а потоки внутри процесса (threads) покрывают ожидание сети и ввода-вывода.
+Все значения задаются переменными окружения.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('MORTGAGE_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('MORTGAGE_THREADS', 4))
+# Живые сессии (/api/session) хранятся в памяти процесса: PATCH и поток событий другого воркера их не найдут.
+# Поэтому они включены по умолчанию только при одном воркере, а при нескольких — отключены (503);
+# в docker-compose.yml их обслуживает отдельный сервис sessions с MORTGAGE_WORKERS=1.
+sessions = os.environ.get('MORTGAGE_SESSIONS', '1' if workers == 1 else '0')
+if sessions == '1' and workers > 1:
+    raise RuntimeError('Живые сессии (MORTGAGE_SESSIONS=1) требуют MORTGAGE_WORKERS=1')
+os.environ['MORTGAGE_SESSIONS'] = sessions
+# Каждый поток событий занимает поток воркера; два потока остаются для обычных запросов
+os.environ.setdefault('MORTGAGE_SESSION_STREAMS', str(max(threads - 2, 1)))
+worker_class = 'gthread'
+timeout = int(os.environ.get('MORTGAGE_TIMEOUT', 30))
+keepalive = 5
+# Перезапуск воркера после заданного числа запросов (0 — без перезапуска)
+max_requests = int(os.environ.get('MORTGAGE_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+# Приложение загружается в каждом воркере после fork, чтобы в каждом процессе был свой поток записи логов
+preload_app = False
+# Журнал доступа gunicorn выключен: запросы и ошибки пишет само приложение через очередь логов
+accesslog = None
+loglevel = os.environ.get('MORTGAGE_LOG_LEVEL', 'info').lower()
@@ -1 +1,3 @@
-from .core import MortgageCalculator 
\ No newline at end of file
+from .core import MortgageCalculator
+
+__all__ = ['MortgageCalculator']
@@ -0,0 +1,108 @@
+"""
+Векторизованный расчет аннуитетного графика платежей в замкнутой форме.
+
+Вместо помесячного цикла доли процентов и тела кредита вычисляются сразу для
+всех месяцев: при аннуитетном платеже P и месячной ставке r часть платежа,
+идущая в погашение тела кредита в месяце k (из n), равна P * (1 + r) ** -(n - k + 1).
+"""
+from typing import Optional, Tuple
+import numpy as np
+
+
+def annuity_payment(principal: float, r: float, n: int) -> float:
+    """
+    Ежемесячный аннуитетный платеж для суммы кредита principal, месячной ставки r и n месяцев.
+    """
+    if r == 0:
+        return principal / n
+    return principal * r * (1 + r) ** n / ((1 + r) ** n - 1)
+
+
+def annuity_principal(payment: float, r: float, n: int) -> float:
+    """
+    Сумма кредита, которую погашает ежемесячный платеж payment за n месяцев при ставке r.
+    """
+    if r == 0:
+        return payment * n
+    return payment * (1 - (1 + r) ** -n) / r
+
+
+def annuity_payment_array(principal, r, n) -> np.ndarray:
+    """
+    Векторный вариант annuity_payment: аргументы — массивы NumPy (или числа), совместимые при broadcasting.
+    """
+    principal, r, n = np.broadcast_arrays(np.asarray(principal, dtype=float), np.asarray(r, dtype=float), np.asarray(n, dtype=float))
+    growth = (1 + r) ** n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(r == 0, principal / n, principal * r * growth / (growth - 1))
+
+
+def annuity_principal_array(payment, r, n) -> np.ndarray:
+    """
+    Векторный вариант annuity_principal.
+    """
+    payment, r, n = np.broadcast_arrays(np.asarray(payment, dtype=float), np.asarray(r, dtype=float), np.asarray(n, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(r == 0, payment * n, payment * (1 - (1 + r) ** -n) / r)
+
+
+def annuity_schedule(payment: float, r: float, n: int, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Помесячный график аннуитетного платежа без цикла по месяцам.
+    Возвращает два массива: проценты и погашение тела кредита для месяцев start+1..stop
+    (по умолчанию для всех месяцев 1..n), поэтому длинный график можно считать по частям.
+    """
+    stop = n if stop is None else min(stop, n)
+    if r == 0:
+        principal_paid = np.full(max(stop - start, 0), float(payment))
+    else:
+        remaining = n - np.arange(start, stop, dtype=float)
+        principal_paid = payment * (1 + r) ** -remaining
+    interest_paid = payment - principal_paid
+    return interest_paid, principal_paid
+
+
+def annuity_balance(payment: float, r: float, n: int, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Остаток долга после платежей start+1..stop (по умолчанию после каждого из n месяцев).
+    """
+    stop = n if stop is None else min(stop, n)
+    remaining = n - np.arange(start + 1, stop + 1, dtype=float)
+    if r == 0:
+        return payment * remaining
+    return payment * (1 - (1 + r) ** -remaining) / r
+
+
+def aggregate_by_year(values: np.ndarray) -> np.ndarray:
+    """
+    Суммы помесячных значений по полным годам (неполный последний год отбрасывается).
+    """
+    n_full_years = len(values) // 12
+    return values[:n_full_years * 12].reshape(n_full_years, 12).sum(axis=1)
+
+
+# Размеры корзин (в месяцах), между которыми выбирается детализация по целевому числу точек
+BUCKET_SIZES = (1, 3, 6, 12, 24, 60, 120)
+
+
+def aggregate_buckets(values: np.ndarray, bucket_months: int) -> np.ndarray:
+    """
+    Суммы помесячных значений по корзинам из bucket_months месяцев.
+    Последняя корзина может быть неполной, поэтому сумма всех корзин равна сумме исходного ряда.
+    """
+    if bucket_months <= 1 or len(values) == 0:
+        return values
+    return np.add.reduceat(values, np.arange(0, len(values), bucket_months))
+
+
+def choose_bucket_months(count: int, max_points: int) -> int:
+    """
+    Наименьший размер корзины из BUCKET_SIZES (или больше, если не хватает), при котором
+    count месяцев укладываются не более чем в max_points точек.
+    """
+    if max_points <= 0:
+        raise ValueError('Число точек должно быть больше 0')
+    for size in BUCKET_SIZES:
+        if -(-count // size) <= max_points:
+            return size
+    return -(-count // max_points)
@@ -0,0 +1,55 @@
+"""
+Пакетный расчет нескольких сценариев ипотеки одним векторизованным вычислением.
+
+Все пары (сценарий, срок) разворачиваются в плоские массивы NumPy, и формулы
+results.evaluate_terms применяются к ним сразу, без цикла по сценариям и срокам.
+Результат каждого сценария — срез общего ResultColumns, без копирования столбцов.
+"""
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from .core import MortgageCalculator
+from .results import ResultColumns, evaluate_terms, result_columns
+
+YearsRange = Tuple[int, int, Optional[int]]
+
+
+def calculate_batch(calculators: Sequence[MortgageCalculator], years_ranges: Sequence[YearsRange]) -> List[ResultColumns]:
+    """
+    Рассчитать результаты для набора калькуляторов за одно векторизованное вычисление.
+    years_ranges — кортежи (min_years, max_years, step) для каждого калькулятора.
+    Возвращает список результатов в том же формате, что MortgageCalculator.results.
+    """
+    if not calculators:
+        return []
+    if any(calc.rate_schedule or calc.exact or calc.differentiated for calc in calculators):
+        # Плавающая ставка, точный расчет в копейках и дифференцированные платежи считаются своими векторными путями
+        # (см. MortgageCalculator._calculate_variable_rate, _calculate_exact и _calculate_differentiated)
+        fixed = [i for i, calc in enumerate(calculators) if not (calc.rate_schedule or calc.exact or calc.differentiated)]
+        batches = dict(zip(fixed, calculate_batch([calculators[i] for i in fixed], [years_ranges[i] for i in fixed])))
+        for i, calc in enumerate(calculators):
+            if calc.rate_schedule or calc.exact or calc.differentiated:
+                calc.calculate(*years_ranges[i])
+                batches[i] = calc.results
+        return [batches[i] for i in range(len(calculators))]
+    years_per_scenario = [np.arange(lo, hi + 1, step or 1) for lo, hi, step in years_ranges]
+    counts = np.array([len(y) for y in years_per_scenario])
+    years = np.concatenate(years_per_scenario)
+    idx = np.repeat(np.arange(len(calculators)), counts)
+
+    is_value_mode = np.array([c.mode == 'property_value' for c in calculators])
+    value = np.array([c.property_value if c.mode == 'property_value' else c.monthly_payment for c in calculators])
+    interest_rate = np.array([c.interest_rate for c in calculators])
+    initial_payment = np.array([c.initial_payment for c in calculators])
+
+    columns = evaluate_terms(
+        mode=is_value_mode[idx],
+        interest_rate=interest_rate[idx],
+        initial_payment=initial_payment[idx],
+        value=value[idx],
+        years=years,
+    )
+    min_pct = np.array([c.min_initial_payment_percentage * 100 for c in calculators])
+    results = result_columns(years, columns, min_pct[idx])
+    bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+    return [results[bounds[i]:bounds[i + 1]] for i in range(len(calculators))]
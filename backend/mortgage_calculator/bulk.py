@@ -0,0 +1,280 @@
+"""
+Массовый расчет заявок из файлов CSV или Parquet.
+
+Одна строка входного файла — одна заявка: interest_rate (годовая ставка, %), initial_payment, years
+(срок в годах) и, в зависимости от режима, property_value или monthly_payment; режим берется
+из столбца mode или задается для всего файла. Файл читается блоками по chunk_rows строк, каждый
+блок считается одним вызовом results.evaluate_terms (те же формулы, что у MortgageCalculator.calculate)
+и сразу дописывается в выходной файл, поэтому память ограничена несколькими блоками независимо
+от размера файла. Блоки распределяются по пулу процессов; порядок строк на выходе сохраняется.
+
+К столбцам заявки добавляются principal, property_value, monthly_payment, total_payment, overpayment
+(до рубля), overpayment_percentage и error — причина, по которой заявка не посчитана (поля результата
+такой строки пустые, кроме входных property_value и monthly_payment). С summary_years для каждого
+срока k добавляются balance_{k}y и interest_{k}y: остаток долга и выплаченные проценты за первые k лет,
+в замкнутой форме без помесячного графика.
+
+Parquet читается и пишется через pyarrow (необязательная зависимость).
+"""
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, Optional, Sequence
+import os
+import time
+import numpy as np
+
+FILE_FORMATS = ('csv', 'parquet')
+MODES = ('property_value', 'monthly_payment')
+INPUT_FIELDS = ('interest_rate', 'initial_payment', 'years', 'property_value', 'monthly_payment')
+MONEY_FIELDS = ('principal', 'property_value', 'monthly_payment', 'total_payment', 'overpayment')
+DEFAULT_CHUNK_ROWS = 200_000
+
+ProgressCallback = Callable[[Dict], None]
+
+
+def file_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Формат файла: явно заданный или по расширению (.csv, .parquet/.pq).
+    """
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}.get(ext)
+        if fmt is None:
+            raise ValueError(f'Не удалось определить формат файла по расширению: {path}')
+    if fmt not in FILE_FORMATS:
+        raise ValueError(f'Неизвестный формат файла: {fmt}')
+    return fmt
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError('Для файлов Parquet нужен пакет pyarrow') from None
+    return pyarrow
+
+
+def count_rows(path: str, fmt: str) -> Optional[int]:
+    """
+    Число строк файла, если оно известно без чтения данных (метаданные Parquet), иначе None.
+    """
+    if fmt == 'parquet':
+        return _pyarrow().parquet.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def read_chunks(path: str, fmt: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator['pd.DataFrame']:
+    """
+    Блоки входного файла по chunk_rows строк (последний может быть короче).
+    """
+    import pandas as pd
+    if chunk_rows <= 0:
+        raise ValueError('Размер блока должен быть больше 0')
+    if fmt == 'parquet':
+        for batch in _pyarrow().parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    # Числовые поля заявки читаются как float: пустые ячейки становятся NaN, а не меняют тип столбца
+    dtype = dict.fromkeys(INPUT_FIELDS, float)
+    with pd.read_csv(path, chunksize=chunk_rows, dtype=dtype) as reader:
+        yield from reader
+
+
+def _numeric(frame, field: str) -> np.ndarray:
+    import pandas as pd
+    if field not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def validate_rows(modes: np.ndarray, rate: np.ndarray, initial_payment: np.ndarray, years: np.ndarray,
+                  property_value: np.ndarray, monthly_payment: np.ndarray) -> np.ndarray:
+    """
+    Причина ошибки для каждой заявки (None — заявка корректна); проверки и сообщения те же,
+    что у MortgageCalculator, из нескольких ошибок строки сообщается первая.
+    """
+    is_value_mode = modes == 'property_value'
+    is_payment_mode = modes == 'monthly_payment'
+    checks = (
+        (~(is_value_mode | is_payment_mode), 'Неизвестный режим расчета'),
+        (np.isnan(rate), 'Не указана процентная ставка'),
+        ((rate < 0) | (rate > 100), 'Процентная ставка должна быть от 0 до 100'),
+        (np.isnan(initial_payment), 'Не указан первоначальный взнос'),
+        (initial_payment < 0, 'Первоначальный взнос не может быть отрицательным'),
+        (np.isnan(years) | (years < 1) | (years != np.floor(years)), 'Срок должен быть целым числом лет не меньше 1'),
+        (is_value_mode & np.isnan(property_value), 'В режиме property_value необходимо указать property_value'),
+        (is_value_mode & (property_value <= 0), 'Стоимость жилья должна быть больше 0'),
+        (is_value_mode & (initial_payment > property_value), 'Первоначальный взнос не может превышать стоимость жилья'),
+        (is_payment_mode & np.isnan(monthly_payment), 'В режиме monthly_payment необходимо указать monthly_payment'),
+        (is_payment_mode & (monthly_payment <= 0), 'Ежемесячный платеж должен быть больше 0'),
+    )
+    errors = np.full(len(modes), None, dtype=object)
+    for mask, message in reversed(checks):
+        errors[mask] = message
+    return errors
+
+
+def summary_balances(principal: np.ndarray, payment: np.ndarray, r: np.ndarray, n: np.ndarray,
+                     months: int) -> Dict[str, np.ndarray]:
+    """
+    Остаток долга и выплаченные проценты после первых months платежей (не больше срока n)
+    в замкнутой форме: B_m = L (1 + r) ** m - P ((1 + r) ** m - 1) / r.
+    """
+    m = np.minimum(months, n)
+    growth = np.expm1(m * np.log1p(r))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        repaid = np.where(r == 0, payment * m, payment * growth / r - principal * growth)
+    balance = np.where(m >= n, 0.0, np.maximum(principal - repaid, 0.0))
+    return {'balance': balance, 'interest': payment * m - (principal - balance)}
+
+
+def score_chunk(frame: 'pd.DataFrame', mode: str = 'property_value', summary_years: Sequence[int] = ()) -> 'pd.DataFrame':
+    """
+    Посчитать блок заявок: входные столбцы и столбцы результата (см. описание модуля).
+    mode — режим для строк без столбца mode (или с пустым значением в нем).
+    """
+    import pandas as pd
+    from .results import evaluate_terms
+
+    if 'mode' in frame:
+        modes = frame['mode'].fillna(mode).astype(str).to_numpy(dtype=object)
+    else:
+        modes = np.full(len(frame), mode, dtype=object)
+    rate, initial_payment, years, property_value, monthly_payment = (_numeric(frame, field) for field in INPUT_FIELDS)
+    errors = validate_rows(modes, rate, initial_payment, years, property_value, monthly_payment)
+    valid = np.equal(errors, None)
+
+    # Некорректные строки считаются с подставленными допустимыми значениями и затем очищаются
+    is_value_mode = modes == 'property_value'
+    interest_rate = np.where(valid, rate, 0) / 100
+    initial = np.where(valid, initial_payment, 0)
+    term = np.where(valid, years, 1)
+    value = np.where(valid, np.where(is_value_mode, property_value, monthly_payment), 1)
+    values = evaluate_terms(mode=is_value_mode, interest_rate=interest_rate, initial_payment=initial,
+                            value=value, years=term)
+
+    result = frame.copy()
+    given = {'property_value': property_value, 'monthly_payment': monthly_payment}
+    for field in MONEY_FIELDS:
+        # В некорректных строках входные property_value и monthly_payment остаются как в заявке
+        column = np.where(valid, values[field], given.get(field, np.nan))
+        result[field] = pd.array(np.rint(column), dtype='Int64')
+    result['overpayment_percentage'] = np.where(valid, values['overpayment_percentage'], np.nan)
+    if summary_years:
+        n = term * 12
+        for k in summary_years:
+            summary = summary_balances(values['principal'], values['monthly_payment'], interest_rate / 12, n, k * 12)
+            for name, column in summary.items():
+                result[f'{name}_{k}y'] = pd.array(np.rint(np.where(valid, column, np.nan)), dtype='Int64')
+    # Строковый тип задан явно: в блоке без ошибок столбец иначе не имел бы типа
+    result['error'] = pd.array(errors, dtype='string')
+    return result
+
+
+def encode_chunk(frame: 'pd.DataFrame', fmt: str, header: bool) -> object:
+    """
+    Блок результата в виде, готовом к записи: текст CSV или таблица pyarrow.
+    Выполняется в процессе пула, чтобы форматирование не ограничивало скорость основного процесса.
+    """
+    if fmt == 'csv':
+        return frame.to_csv(index=False, header=header)
+    return _pyarrow().Table.from_pandas(frame, preserve_index=False)
+
+
+def process_chunk(frame: 'pd.DataFrame', mode: str, summary_years: Sequence[int], fmt: str, header: bool):
+    """
+    Задача для пула процессов: посчитать блок и подготовить его к записи. Возвращает (число строк, ошибочных, данные).
+    """
+    result = score_chunk(frame, mode, summary_years)
+    return len(result), int(result['error'].notna().sum()), encode_chunk(result, fmt, header)
+
+
+class ChunkWriter:
+    """
+    Последовательная запись подготовленных блоков (encode_chunk) в CSV или Parquet.
+    """
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self._file = None
+        self._writer = None
+
+    def write(self, data) -> None:
+        if self.fmt == 'csv':
+            if self._file is None:
+                self._file = open(self.path, 'w', encoding='utf-8', newline='')
+            self._file.write(data)
+            return
+        if self._writer is None:
+            self._writer = _pyarrow().parquet.ParquetWriter(self.path, data.schema)
+        # Типы столбцов всех блоков приводятся к схеме первого (например, столбец без значений в первом блоке)
+        self._writer.write_table(data.cast(self._writer.schema))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _InlineExecutor(Executor):
+    """
+    Выполнение задач в текущем процессе (workers=1): без пересылки блоков между процессами.
+    """
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def run_bulk(input_path: str, output_path: str, *, input_format: Optional[str] = None,
+             output_format: Optional[str] = None, mode: str = 'property_value', summary_years: Sequence[int] = (),
+             chunk_rows: int = DEFAULT_CHUNK_ROWS, workers: Optional[int] = None,
+             progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Посчитать все заявки файла input_path и записать результат в output_path.
+    workers — число процессов (по умолчанию — число ядер); в обработке одновременно не больше 2 * workers блоков.
+    progress вызывается после записи каждого блока со словарем rows, errors, total (None, если неизвестно),
+    elapsed и rows_per_second; те же поля возвращаются по окончании.
+    """
+    input_format = file_format(input_path, input_format)
+    output_format = file_format(output_path, output_format)
+    if mode not in MODES:
+        raise ValueError('Неизвестный режим расчета')
+    if any(int(k) < 1 for k in summary_years):
+        raise ValueError('Сроки сводки должны быть не меньше 1 года')
+    workers = workers or os.cpu_count() or 1
+    total = count_rows(input_path, input_format)
+    stats = {'rows': 0, 'errors': 0, 'total': total, 'elapsed': 0.0, 'rows_per_second': 0.0}
+    started = time.perf_counter()
+    pending: Deque[Future] = deque()
+    writer = ChunkWriter(output_path, output_format)
+
+    def write_next():
+        rows, errors, data = pending.popleft().result()
+        writer.write(data)
+        stats['rows'] += rows
+        stats['errors'] += errors
+        stats['elapsed'] = time.perf_counter() - started
+        stats['rows_per_second'] = stats['rows'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        if progress is not None:
+            progress(dict(stats))
+
+    executor = _InlineExecutor() if workers == 1 else ProcessPoolExecutor(workers)
+    try:
+        for number, frame in enumerate(read_chunks(input_path, input_format, chunk_rows)):
+            pending.append(executor.submit(process_chunk, frame, mode, tuple(summary_years), output_format, number == 0))
+            while len(pending) >= 2 * workers:
+                write_next()
+        while pending:
+            write_next()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        writer.close()
+    return stats
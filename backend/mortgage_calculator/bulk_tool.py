@@ -0,0 +1,72 @@
+"""
+Массовый расчет заявок из файла CSV или Parquet в файл того же или другого формата (см. bulk).
+
+Пример:
+    python -m mortgage_calculator.bulk_tool applications.csv scored.csv --workers 8
+    python -m mortgage_calculator.bulk_tool applications.parquet scored.parquet --mode monthly_payment --summary-years 1,5,10
+"""
+from typing import Dict, List, Optional
+import argparse
+import sys
+import time
+
+from .bulk import DEFAULT_CHUNK_ROWS, FILE_FORMATS, MODES, run_bulk
+
+# Не чаще одной строки прогресса за столько секунд
+PROGRESS_INTERVAL = 1.0
+
+
+def parse_years(text: str) -> List[int]:
+    try:
+        return [int(part) for part in text.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError('Ожидается список лет через запятую, например 1,5,10') from None
+
+
+def _number(value: float) -> str:
+    return f'{value:,.0f}'.replace(',', ' ')
+
+
+def format_progress(stats: Dict) -> str:
+    done = _number(stats['rows'])
+    if stats['total']:
+        done += f' из {_number(stats["total"])} ({stats["rows"] / stats["total"]:.0%})'
+    return f'Обработано {done} строк, ошибок {_number(stats["errors"])}, {_number(stats["rows_per_second"])} строк/с'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Массовый расчет ипотечных заявок')
+    parser.add_argument('input', help='входной файл .csv или .parquet')
+    parser.add_argument('output', help='выходной файл .csv или .parquet')
+    parser.add_argument('--input-format', choices=FILE_FORMATS, help='формат входного файла, если не ясен из расширения')
+    parser.add_argument('--output-format', choices=FILE_FORMATS, help='формат выходного файла, если не ясен из расширения')
+    parser.add_argument('--mode', choices=MODES, default='property_value', help='режим для строк без столбца mode')
+    parser.add_argument('--summary-years', type=parse_years, default=[],
+                        help='сроки (лет) для остатка долга и выплаченных процентов, через запятую')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='строк в блоке')
+    parser.add_argument('--workers', type=int, default=None, help='число процессов (по умолчанию — число ядер)')
+    parser.add_argument('--quiet', action='store_true', help='не печатать прогресс')
+    args = parser.parse_args(argv)
+
+    last_report = 0.0
+
+    def report(stats: Dict):
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            print(format_progress(stats), file=sys.stderr, flush=True)
+
+    try:
+        stats = run_bulk(args.input, args.output, input_format=args.input_format, output_format=args.output_format,
+                         mode=args.mode, summary_years=args.summary_years, chunk_rows=args.chunk_rows,
+                         workers=args.workers, progress=None if args.quiet else report)
+    except (OSError, ValueError) as e:
+        print(f'Ошибка: {e}', file=sys.stderr)
+        return 1
+    print(f'{format_progress(stats)}; записано {args.output} за {stats["elapsed"]:.1f} с', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
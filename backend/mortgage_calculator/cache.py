@@ -0,0 +1,75 @@
+"""
+Ограниченный по размеру LRU-кэш результатов с вытеснением по времени жизни (TTL).
+
+Используется API для повторных запросов с одинаковыми нормализованными параметрами:
+в кэше хранится уже сериализованный ответ, поэтому попадание пропускает и расчет, и сборку JSON.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+import time
+
+
+class ResultCache:
+    """
+    Потокобезопасный LRU-кэш с TTL и счетчиками попаданий, промахов и вытеснений.
+    maxsize=0 отключает кэширование, ttl=None — записи не устаревают.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0, clock: Callable[[], float] = time.monotonic):
+        if maxsize < 0:
+            raise ValueError('Размер кэша не может быть отрицательным')
+        if ttl is not None and ttl <= 0:
+            raise ValueError('Время жизни записи должно быть больше 0')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -1,22 +1,37 @@
-import plotly.graph_objs as go
-import pandas as pd
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Tuple, Union
 import math
+import numpy as np
+from .amortization import aggregate_buckets, aggregate_by_year, annuity_payment, annuity_principal, annuity_principal_array, annuity_schedule
+from .differentiated import PAYMENT_SCHEMES, differentiated_principal, differentiated_schedule, differentiated_totals
+from .exact import KOPECKS, exact_payment, exact_schedule, exact_totals, rate_fraction, to_kopecks
+from .figures import annuity_layout, annuity_trace_styles, payment_structure_figure, prepayment_trace_style
+from .prepayment import PREPAYMENT_STRATEGIES, expand_prepayments, normalize_prepayments, prepayment_summary
+from .rates import monthly_rate_changes, normalize_rate_schedule, variable_rate_totals
+from .results import ResultColumns, evaluate_terms, result_columns
+from .schedule import payment_schedule
+from .table import table_html, table_rows
 
 class MortgageCalculator:
     """
     Класс для расчета ипотеки в двух режимах:
     1. По ежемесячному платежу (mode='monthly_payment')
     2. По стоимости жилья (mode='property_value')
+    Схема платежей payment_scheme: 'annuity' (равные платежи) или 'differentiated' (равные доли тела кредита
+    и проценты на остаток; в режиме monthly_payment заданный платеж — первый, наибольший).
     """
-    def __init__(self, *, interest_rate: float, initial_payment: float, min_initial_payment_percentage: float = 20, mode: str = 'monthly_payment', monthly_payment: Optional[float] = None, property_value: Optional[float] = None):
+    def __init__(self, *, interest_rate: float, initial_payment: float, min_initial_payment_percentage: float = 20, mode: str = 'monthly_payment', monthly_payment: Optional[float] = None, property_value: Optional[float] = None, prepayments: Optional[List[Dict]] = None, prepayment_strategy: str = 'reduce_term', rate_schedule: Optional[List[Dict]] = None, exact: bool = False, payment_scheme: str = 'annuity'):
         self.interest_rate = float(interest_rate) / 100
         self.initial_payment = float(initial_payment)
         self.min_initial_payment_percentage = float(min_initial_payment_percentage) / 100
         self.mode = mode
         self.monthly_payment = float(monthly_payment) if monthly_payment is not None else None
         self.property_value = float(property_value) if property_value is not None else None
-        self.results: List[Dict] = []
+        self.prepayments = normalize_prepayments(prepayments or [])
+        self.prepayment_strategy = prepayment_strategy
+        self.rate_schedule = normalize_rate_schedule(rate_schedule or [])
+        self.exact = bool(exact)
+        self.payment_scheme = payment_scheme
+        self.results: ResultColumns = ResultColumns.empty()
         self._validate()
 
     def _validate(self):
@@ -40,559 +55,312 @@ class MortgageCalculator:
                 raise ValueError('Ежемесячный платеж должен быть больше 0')
         else:
             raise ValueError('Неизвестный режим расчета')
+        if self.prepayment_strategy not in PREPAYMENT_STRATEGIES:
+            raise ValueError(f'Неизвестная стратегия досрочного погашения: {self.prepayment_strategy}')
+        if self.exact and (self.prepayments or self.rate_schedule):
+            raise ValueError('Точный расчет в копейках не поддерживает плавающую ставку и досрочные погашения')
+        if self.payment_scheme not in PAYMENT_SCHEMES:
+            raise ValueError(f'Неизвестная схема платежей: {self.payment_scheme}')
+        if self.differentiated and (self.prepayments or self.rate_schedule or self.exact):
+            raise ValueError('Дифференцированные платежи не поддерживают плавающую ставку, досрочные погашения и точный расчет')
+
+    @property
+    def differentiated(self) -> bool:
+        return self.payment_scheme == 'differentiated'
 
     def calculate(self, min_years: int = 1, max_years: int = 30, step: Optional[int] = None) -> None:
-        if self.mode == 'property_value':
-            self._calculate_by_property_value(min_years, max_years, step)
-        elif self.mode == 'monthly_payment':
-            self._calculate_by_monthly_payment(min_years, max_years, step)
-        else:
+        if self.mode not in ('property_value', 'monthly_payment'):
             raise ValueError('Неизвестный режим расчета')
+        if self.rate_schedule:
+            self._calculate_variable_rate(min_years, max_years, step)
+        elif self.exact:
+            self._calculate_exact(min_years, max_years, step)
+        elif self.differentiated:
+            self._calculate_differentiated(min_years, max_years, step)
+        else:
+            self._calculate_terms(min_years, max_years, step)
 
-    def _calculate_by_property_value(self, min_years: int, max_years: int, step: Optional[int]):
-        self.results = []
+    def _calculate_terms(self, min_years: int, max_years: int, step: Optional[int]):
+        """
+        Расчет сразу для всех сроков по формулам аннуитета (см. results.evaluate_terms).
+        """
+        years = np.arange(min_years, max_years + 1, step or 1)
+        value = self.property_value if self.mode == 'property_value' else self.monthly_payment
+        values = evaluate_terms(mode=np.bool_(self.mode == 'property_value'), interest_rate=np.float64(self.interest_rate),
+                                initial_payment=np.float64(self.initial_payment), value=np.float64(value), years=years)
+        self.results = result_columns(years, values, self.min_initial_payment_percentage * 100)
+
+    def _calculate_variable_rate(self, min_years: int, max_years: int, step: Optional[int]):
+        """
+        Расчет при плавающей ставке сразу для всех сроков (см. rates.variable_rate_totals).
+        monthly_payment — платеж первого периода; в режиме monthly_payment он определяет сумму кредита
+        по основной ставке, а после смены ставки платеж пересчитывается.
+        """
+        years = np.arange(min_years, max_years + 1, step or 1)
+        n = years * 12
         r = self.interest_rate / 12
-        years_range = range(min_years, max_years + 1, step or 1)
-        for years in years_range:
-            n = years * 12
-            principal = self.property_value - self.initial_payment
-            if r == 0:
-                monthly_payment = principal / n
-            else:
-                monthly_payment = principal * r * (1 + r) ** n / ((1 + r) ** n - 1)
-            total_payment = self.initial_payment + monthly_payment * n
-            overpayment = total_payment - self.property_value
-            overpayment_percentage = overpayment / principal if principal != 0 else 0
-            self.results.append({
-                'years': years,
-                'principal': round(principal),
-                'initial_payment': round(self.initial_payment),
-                'property_value': round(self.property_value),
-                'monthly_payment': round(monthly_payment),
-                'total_payment': round(total_payment),
-                'overpayment': round(overpayment),
-                'overpayment_percentage': overpayment_percentage,
-                'min_initial_payment_percentage': self.min_initial_payment_percentage * 100
-            })
+        if self.mode == 'property_value':
+            principal = np.full(len(n), self.property_value - self.initial_payment)
+        else:
+            principal = annuity_principal_array(self.monthly_payment, r, n)
+        totals = variable_rate_totals(principal, n, monthly_rate_changes(self.interest_rate, self.rate_schedule))
+        property_value = principal + self.initial_payment
+        total_payment = self.initial_payment + totals['total_payment']
+        overpayment = total_payment - property_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overpayment_percentage = np.where(principal != 0, overpayment / principal, 0.0)
+        self.results = result_columns(years, {
+            'principal': principal,
+            'initial_payment': np.full(len(n), self.initial_payment),
+            'property_value': property_value,
+            'monthly_payment': totals['first_payment'],
+            'total_payment': total_payment,
+            'overpayment': overpayment,
+            'overpayment_percentage': overpayment_percentage,
+            'last_monthly_payment': totals['last_payment'],
+        }, self.min_initial_payment_percentage * 100)
+
+    def _exact_terms(self, n) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Сумма кредита и платеж в копейках для сроков n месяцев: в режиме property_value платеж — аннуитет,
+        округленный до копейки; в режиме monthly_payment сумма кредита — по формуле аннуитета для заданного платежа.
+        """
+        num, den = rate_fraction(self.interest_rate)
+        n = np.asarray(n)
+        if self.mode == 'property_value':
+            loan = np.broadcast_to(to_kopecks(self.property_value - self.initial_payment), n.shape)
+            return loan, exact_payment(loan, num, den, n)
+        loan = to_kopecks(annuity_principal_array(self.monthly_payment, self.interest_rate / 12, n))
+        return loan, np.broadcast_to(to_kopecks(self.monthly_payment), n.shape)
 
-    def _calculate_by_monthly_payment(self, min_years: int, max_years: int, step: Optional[int]):
-        self.results = []
+    def _calculate_exact(self, min_years: int, max_years: int, step: Optional[int]):
+        """
+        Расчет по точному банковскому графику в копейках сразу для всех сроков (см. exact.exact_totals):
+        суммы — до копейки, last_monthly_payment — последний платеж после корректировки.
+        """
+        years = np.arange(min_years, max_years + 1, step or 1)
+        n = years * 12
+        loan, payment = self._exact_terms(n)
+        totals = exact_totals(loan, payment, *rate_fraction(self.interest_rate), n)
+        principal = loan / KOPECKS
+        property_value = principal + self.initial_payment
+        total_payment = self.initial_payment + totals['total_payment'] / KOPECKS
+        overpayment = total_payment - property_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overpayment_percentage = np.where(principal != 0, overpayment / principal, 0.0)
+        self.results = result_columns(years, {
+            'principal': principal,
+            'initial_payment': np.full(len(n), self.initial_payment),
+            'property_value': property_value,
+            'monthly_payment': payment / KOPECKS,
+            'total_payment': total_payment,
+            'overpayment': overpayment,
+            'overpayment_percentage': overpayment_percentage,
+            'last_monthly_payment': totals['last_payment'] / KOPECKS,
+        }, self.min_initial_payment_percentage * 100, kopecks=True)
+
+    def _calculate_differentiated(self, min_years: int, max_years: int, step: Optional[int]):
+        """
+        Расчет при дифференцированных платежах сразу для всех сроков по формулам арифметической прогрессии
+        (см. differentiated.differentiated_totals), без построения графика: monthly_payment — первый платеж,
+        last_monthly_payment — последний.
+        """
+        years = np.arange(min_years, max_years + 1, step or 1)
+        n = years * 12
         r = self.interest_rate / 12
-        years_range = range(min_years, max_years + 1, step or 1)
-        for years in years_range:
-            n = years * 12
-            if r == 0:
-                principal = self.monthly_payment * n
-            else:
-                principal = self.monthly_payment * (1 - (1 + r) ** -n) / r
-            property_value = principal + self.initial_payment
-            total_payment = self.initial_payment + self.monthly_payment * n
-            overpayment = total_payment - property_value
-            overpayment_percentage = overpayment / principal if principal != 0 else 0
-            self.results.append({
-                'years': years,
-                'principal': round(principal),
-                'initial_payment': round(self.initial_payment),
-                'property_value': round(property_value),
-                'monthly_payment': round(self.monthly_payment),
-                'total_payment': round(total_payment),
-                'overpayment': round(overpayment),
-                'overpayment_percentage': overpayment_percentage,
-                'min_initial_payment_percentage': self.min_initial_payment_percentage * 100
-            })
+        principal = self._differentiated_principal(n)
+        totals = differentiated_totals(principal, r, n)
+        property_value = principal + self.initial_payment
+        total_payment = property_value + totals['total_interest']
+        overpayment = total_payment - property_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overpayment_percentage = np.where(principal != 0, overpayment / principal, 0.0)
+        self.results = result_columns(years, {
+            'principal': principal,
+            'initial_payment': np.full(len(n), self.initial_payment),
+            'property_value': property_value,
+            'monthly_payment': totals['first_payment'],
+            'total_payment': total_payment,
+            'overpayment': overpayment,
+            'overpayment_percentage': overpayment_percentage,
+            'last_monthly_payment': totals['last_payment'],
+        }, self.min_initial_payment_percentage * 100)
+
+    def _differentiated_principal(self, n) -> np.ndarray:
+        # В режиме monthly_payment заданный платеж — первый (наибольший) платеж графика
+        if self.mode == 'property_value':
+            return np.full(np.shape(n), self.property_value - self.initial_payment)
+        return differentiated_principal(self.monthly_payment, self.interest_rate / 12, n)
 
     def optimize(self) -> Optional[Dict]:
         """
         Return the scenario with the minimum overpayment.
         :return: Dictionary with the optimal scenario or None if no results
         """
-        if not self.results:
-            return None
-        return min(self.results, key=lambda x: x['overpayment'])
+        index = self.results.argmin('overpayment')
+        return None if index is None else self.results[index]
+
+    def _format_table(self, df):
+        from .rendering import format_table
+        return format_table(df)
 
-    def _format_table(self, df: pd.DataFrame) -> pd.DataFrame:
+    def table_rows(self) -> Dict:
         """
-        Форматирует DataFrame для отображения: добавляет разделители тысяч (пробел), 'руб.' для денежных столбцов и проценты для переплаты.
+        Таблица результатов для JSON: русские заголовки и отформатированные строки (без pandas и Plotly).
         """
-        for col in ['principal', 'initial_payment', 'property_value', 'monthly_payment', 'total_payment', 'overpayment']:
-            df[col] = df[col].apply(lambda x: f"{x:,.0f}".replace(",", " ") + " руб.")
-        df['overpayment_percentage'] = df['overpayment_percentage'].apply(lambda x: f"{x:.2%}")
-        return df
+        return table_rows(self.results)
 
-    def print_table(self, return_html: bool = False) -> None:
+    def table_html(self) -> str:
         """
-        Отобразить результаты в виде красивой таблицы Plotly на русском языке.
-        Если return_html=True, вернуть HTML-строку для вставки в Flask.
+        Таблица результатов в виде простого HTML (без pandas и Plotly).
         """
         if not self.results:
-            if return_html:
-                return '<div style="color:red;">Нет данных для отображения. Сначала выполните расчет (calculate()).</div>'
-            print("Нет данных для отображения. Сначала выполните расчет (calculate()).")
-            return
-        import pandas as pd
-        df = pd.DataFrame(self.results)
-        df = self._format_table(df)
-        columns_map = {
-            'years': 'Срок (лет)',
-            'principal': 'Сумма кредита',
-            'initial_payment': 'Первоначальный взнос',
-            'property_value': 'Стоимость недвижимости',
-            'monthly_payment': 'Ежемесячный платеж',
-            'total_payment': 'Общая выплата',
-            'overpayment': 'Переплата',
-            'overpayment_percentage': 'Процент переплаты',
-        }
-        header = dict(
-            values=[columns_map[col] for col in df.columns],
-            fill_color=[["#3a6073", "#3a7bd5"]*int(len(df.columns)/2+1)][:len(df.columns)],
-            font=dict(color='white', size=12, family='Arial, sans-serif'),
-            align=['center']*len(df.columns),
-            height=72
-        )
-        fill_colors = []
-        for i in range(len(df)):
-            fill_colors.append('#FFFFFF' if i % 2 == 0 else '#F4F9F4')
-        cells = dict(
-            values=[df[col] for col in df.columns],
-            fill_color=[fill_colors]*len(df.columns),
-            align=['center']*len(df.columns),
-            font=dict(color='#444', size=12, family='Arial, sans-serif'),
-            height=27,
-            format=[None]*len(df.columns),
-            suffix=[None]*len(df.columns),
-        )
-        import plotly.graph_objs as go
-        fig = go.Figure(data=[go.Table(header=header, cells=cells)])
-        fig.update_layout(
-            title={
-                'text': 'Результаты расчета ипотеки',
-                'x': 0.5,
-                'xanchor': 'center',
-                'font': dict(size=28, family='Arial, sans-serif', color='#264653', weight='bold'),
-                'yanchor': 'top',
-            },
-            margin=dict(l=20, r=20, t=80, b=20),
-            paper_bgcolor='#FFFFFF',
-            autosize=True,
-            width=None,
-            height=None,
-        )
-        fig_html = fig.to_html(full_html=False, include_plotlyjs='cdn')
-        custom_css = '''
-        <style>
-        .js-plotly-plot .plotly table {
-            border-radius: 18px !important;
-            box-shadow: 0 4px 24px 0 rgba(60,60,60,0.10), 0 1.5px 6px 0 rgba(60,60,60,0.08);
-            overflow: hidden;
-        }
-        .js-plotly-plot .plotly table th {
-            padding: 14px 8px !important;
-        }
-        .js-plotly-plot .plotly table td {
-            padding: 12px 8px !important;
-            transition: background 0.2s;
-        }
-        .js-plotly-plot .plotly table tr:hover td {
-            background: #e0f7fa !important;
-        }
-        </style>
-        '''
-        if return_html:
-            return custom_css + fig_html
-        else:
-            from IPython.display import display, HTML
-            display(HTML(custom_css + fig_html))
+            return '<div style="color:red;">Нет данных для отображения. Сначала выполните расчет (calculate()).</div>'
+        return table_html(self.results)
 
-    def plot_graph(self, return_html: bool = False) -> Optional[str]:
+    def print_table(self, return_html: bool = False) -> Optional[str]:
         """
-        Построить составную столбчатую диаграмму для каждого срока, показывающую сумму кредита, первоначальный взнос и переплату в составе общей выплаты.
-        Добавить процентные подписи для каждого компонента, аннотацию общей выплаты вверху каждого столбца,
-        а также сбоку S-образную фигурную скобку и подпись стоимости недвижимости (сумма кредита + первоначальный взнос).
-        Если return_html=True, вернуть HTML-код графика для вставки во Flask.
+        Отобразить результаты в виде таблицы Plotly на русском языке (см. rendering.print_table).
+        Если return_html=True, вернуть HTML-строку для вставки в Flask.
         """
-        if not self.results:
-            if return_html:
-                return '<div style="color:red;">Нет данных для построения графика. Сначала выполните расчет (calculate()).</div>'
-            print("Нет данных для построения графика. Сначала выполните расчет (calculate()).")
-            return
-        import pandas as pd
-        import plotly.graph_objs as go
-        df = pd.DataFrame(self.results)
-        years = df['years']
-        principal = df['principal'].astype(float)
-        initial_payment = df['initial_payment'].astype(float)
-        overpayment = df['overpayment'].astype(float)
-        total_payment = df['total_payment'].astype(float)
-        property_value = df['property_value'].astype(float)
+        from .rendering import print_table
+        return print_table(self, return_html)
 
-        # Проценты для каждого компонента
-        principal_pct = principal / total_payment
-        initial_payment_pct = initial_payment / total_payment
-        overpayment_pct = overpayment / total_payment
+    def plot_graph_data(self):
+        """
+        Данные диаграммы структуры выплаты по срокам (data, layout) в формате Plotly JSON, без Plotly.
+        """
+        return payment_structure_figure(self.results)
 
-        # Цвета
-        colors = {
-            'principal': '#264653',        # синий/темный
-            'initial_payment': '#00CC96',  # зеленый
-            'overpayment': '#EF553B'       # красный
-        }
+    def plot_graph(self, return_html: bool = False) -> Optional[str]:
+        """
+        Построить диаграмму структуры выплаты по срокам (см. rendering.plot_graph).
+        Если return_html=True, вернуть HTML-код графика для вставки во Flask.
+        """
+        from .rendering import plot_graph
+        return plot_graph(self, return_html)
 
-        bar_width = 0.4
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            y=years, x=principal, name='Сумма кредита', marker_color=colors['principal'],
-            width=[bar_width]*len(years),
-            text=[f"{p:.0%}" for p in principal_pct], textposition='inside',
-            insidetextanchor='middle',
-            orientation='h',
-            hovertemplate='Сумма кредита: %{x:,.0f} руб.<br>Срок: %{y} лет<extra></extra>',
-            textfont=dict(size=10)
-        ))
-        fig.add_trace(go.Bar(
-            y=years, x=initial_payment, name='Первоначальный взнос', marker_color=colors['initial_payment'],
-            width=[bar_width]*len(years),
-            text=[f"{p:.0%}" for p in initial_payment_pct], textposition='inside',
-            insidetextanchor='middle',
-            orientation='h',
-            hovertemplate='Первоначальный взнос: %{x:,.0f} руб.<br>Срок: %{y} лет<extra></extra>',
-            textfont=dict(size=10)
-        ))
-        fig.add_trace(go.Bar(
-            y=years, x=overpayment, name='Переплата', marker_color=colors['overpayment'],
-            width=[bar_width]*len(years),
-            text=[f"{p:.0%}" for p in overpayment_pct], textposition='inside',
-            insidetextanchor='middle',
-            orientation='h',
-            hovertemplate='Переплата: %{x:,.0f} руб.<br>Срок: %{y} лет<extra></extra>',
-            textfont=dict(size=10)
-        ))
+    def plot_annuity_payments(self, years: int, return_html: bool = False) -> Optional[str]:
+        from .rendering import plot_annuity_payments
+        return plot_annuity_payments(self, years, return_html)
 
-        # Аннотация для общей выплаты справа от каждого бара
-        for i, year in enumerate(years):
-            total_mln = total_payment.iloc[i] / 1_000_000
-            if total_mln.is_integer():
-                total_str = f"{int(total_mln)} млн руб."
-            else:
-                total_str = f"{total_mln:.1f} млн руб."
-            annotation_text = f"<span style='color:#264653;font-size:10px;font-family:Arial,sans-serif'>Общая выплата</span><br><span style='color:#444;font-size:10px;font-family:Arial,sans-serif'>{total_str}</span>"
-            fig.add_annotation(
-                x=total_payment.iloc[i],
-                y=year,
-                text=annotation_text,
-                showarrow=False,
-                xshift=12,
-                font=dict(size=10, color="#444", family="Arial, sans-serif"),
-                bgcolor="rgba(255,255,255,0.7)",
-                bordercolor="#cccccc",
-                borderwidth=1,
-                borderpad=4,
-                opacity=0.95,
-                textangle=0,
-                xanchor="left",
-                yanchor="middle"
-            )
+    def payment_for_months(self, n: int) -> float:
+        """
+        Ежемесячный аннуитетный платеж для срока n месяцев в текущем режиме расчета.
+        """
+        if self.mode == 'property_value':
+            return annuity_payment(self.property_value - self.initial_payment, self.interest_rate / 12, n)
+        elif self.mode == 'monthly_payment':
+            return self.monthly_payment
+        else:
+            raise ValueError('Неизвестный режим расчета')
 
-        # S-образная фигурная скобка и подпись стоимости недвижимости сверху от бара
-        for i, year in enumerate(years):
-            x0 = initial_payment.iloc[i]
-            x1 = initial_payment.iloc[i] + principal.iloc[i]
-            y_pos = year
-            # Скобка вплотную к бару
-            y_bracket = y_pos - bar_width/2
-            x_bracket_right = x1
-            x_bracket_left = 0
-            bracket_path = (
-                f"M{x_bracket_left},{y_bracket} "
-                f"C{x_bracket_left+0.18*(x_bracket_right-x_bracket_left)},{y_bracket-0.10} "
-                f"{x_bracket_right-0.18*(x_bracket_right-x_bracket_left)},{y_bracket-0.10} "
-                f"{x_bracket_right},{y_bracket}"
-            )
-            fig.add_shape(
-                type="path",
-                path=bracket_path,
-                line=dict(color="#222", width=1),
-                xref="x", yref="y"
-            )
-            # Подпись "Стоимость недвижимости" над скобкой, жирным только число
-            prop_mln = property_value.iloc[i] / 1_000_000
-            if prop_mln.is_integer():
-                prop_num = f"{int(prop_mln)}"
-                prop_str = f"{int(prop_mln)} млн руб."
-            else:
-                prop_num = f"{prop_mln:.1f}"
-                prop_str = f"{prop_mln:.1f} млн руб."
-            annotation_text = f"<span style='color:#264653;font-size:11px;font-family:Arial,sans-serif'>Стоимость недвижимости: <b style='color:#222'>{prop_num}</b> млн руб.</span>"
-            fig.add_annotation(
-                x=(x_bracket_left+x_bracket_right)/2,
-                y=y_bracket-0.18,  # чуть выше скобки
-                text=annotation_text,
-                showarrow=False,
-                font=dict(size=11, color="#264653", family="Arial, sans-serif"),
-                align="center",
-                bgcolor="rgba(255,255,255,0)",
-                bordercolor="rgba(0,0,0,0)",
-                borderwidth=0,
-                borderpad=2,
-                opacity=1,
-                textangle=0,
-                xanchor="center",
-                yanchor="bottom"
-            )
+    def loan_for_months(self, n: int) -> float:
+        """
+        Сумма кредита для срока n месяцев в текущем режиме расчета.
+        """
+        if self.mode == 'property_value':
+            return self.property_value - self.initial_payment
+        if self.differentiated:
+            return float(self._differentiated_principal(n))
+        return annuity_principal(self.monthly_payment, self.interest_rate / 12, n)
 
-        # Адаптивная высота и уменьшенная ширина графика
-        min_height = 350
-        px_per_year = 80
-        height = max(min_height, px_per_year * len(years))
+    def payment_schedule(self, n: int, with_prepayments: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Помесячный график на срок n месяцев с учетом плавающей ставки и досрочных погашений
+        (см. schedule.payment_schedule), при exact=True — точный график в копейках (см. exact.exact_schedule),
+        при дифференцированных платежах — в замкнутой форме (см. differentiated.differentiated_schedule).
+        """
+        if self.differentiated:
+            interest, principal, balance = differentiated_schedule(self.loan_for_months(n), self.interest_rate / 12, n)
+            return {'payment': interest + principal, 'interest': interest, 'principal': principal,
+                    'extra': np.zeros(n), 'balance': balance}
+        if self.exact:
+            loan, payment = self._exact_terms(n)
+            schedule = {key: values / KOPECKS for key, values in
+                        exact_schedule(int(loan), int(payment), *rate_fraction(self.interest_rate), n).items()}
+            return dict(schedule, extra=np.zeros_like(schedule['payment']))
+        prepayments = expand_prepayments(self.prepayments, n) if with_prepayments else ()
+        return payment_schedule(self.loan_for_months(n), n, monthly_rate_changes(self.interest_rate, self.rate_schedule),
+                                prepayments, self.prepayment_strategy)
 
-        fig.update_layout(
-            barmode='stack',
-            title={
-                'text': 'Структура выплаты',
-                'x': 0.5,
-                'xanchor': 'center',
-                'font': dict(size=28, family='Arial, sans-serif', color='#264653', weight='bold'),
-                'yanchor': 'top',
-            },
-            xaxis_title='Сумма (руб.)',
-            yaxis_title='Срок (лет)',
-            font=dict(family='Arial, sans-serif', size=13, color='#444'),
-            plot_bgcolor='#FFFFFF',
-            paper_bgcolor='#FFFFFF',
-            xaxis=dict(showgrid=False, zeroline=False,
-                       title_font=dict(size=11, family='Arial, sans-serif', color='#222'),
-                       tickfont=dict(size=11, family='Arial, sans-serif', color='#444')),
-            yaxis=dict(showgrid=False, zeroline=False, tickmode='linear', range=[min(years)-0.7, max(years)+0.7],
-                       title_font=dict(size=11, family='Arial, sans-serif', color='#222'),
-                       tickfont=dict(size=11, family='Arial, sans-serif', color='#444'),
-                       autorange='reversed',
-                       ticklabelposition='outside'),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='center',
-                x=0.5,
-                bgcolor='rgba(0,0,0,0)',
-                font=dict(size=13)
-            ),
-            margin=dict(l=120, r=40, t=170, b=40),
-            height=height
-        )
-        if return_html:
-            html = fig.to_html(full_html=False, include_plotlyjs='cdn')
-            return f"<div style='width:50vw;min-width:320px;max-width:100vw;margin:0 auto'>{html}</div>"
-        else:
-            fig.show()
-            return None
+    def prepayment_summary(self, n: int) -> Dict:
+        """
+        Итоги и экономия от досрочных погашений для срока n месяцев.
+        """
+        return prepayment_summary(self.payment_schedule(n, with_prepayments=False), self.payment_schedule(n), n)
 
-    def plot_annuity_payments(self, years: int, return_html: bool = False) -> Optional[str]:
-        print(f"plot_annuity_payments called with years={years}, interest_rate={self.interest_rate}, monthly_payment={self.monthly_payment}, initial_payment={self.initial_payment}, min_initial_payment_percentage={self.min_initial_payment_percentage}")
-        import plotly.graph_objs as go
-        import numpy as np
-        n = years * 12
+    def _closed_form_schedule(self, n: int, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Проценты и погашение тела кредита для месяцев start+1..stop без событий в замкнутой форме
+        по схеме платежей калькулятора.
+        """
         r = self.interest_rate / 12
-        P = self.monthly_payment
-        principal_left = self.monthly_payment * (1 - (1 + r) ** -n) / r if r != 0 else self.monthly_payment * n
-        principal = principal_left
-        months = np.arange(1, n + 1)
-        interest_paid = []
-        principal_paid = []
-        for month in months:
-            interest = principal * r
-            principal_part = P - interest
-            interest_paid.append(interest)
-            principal_paid.append(principal_part)
-            principal -= principal_part
-        interest_paid = np.array(interest_paid)
-        principal_paid = np.array(principal_paid)
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=months,
-            y=interest_paid,
-            name='Проценты',
-            marker_color='#e63946',
-            hovertemplate='Месяц %{x}: %{y:,.0f} руб. — проценты'
-        ))
-        fig.add_trace(go.Bar(
-            x=months,
-            y=principal_paid,
-            name='Тело кредита',
-            marker_color='#457b9d',
-            hovertemplate='Месяц %{x}: %{y:,.0f} руб. — тело кредита'
-        ))
-        fig.update_layout(
-            barmode='stack',
-            title=f'Структура аннуитетного платежа по месяцам (срок: {years} лет)',
-            xaxis_title='Месяц',
-            yaxis_title='Сумма платежа (руб.)',
-            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
-            margin=dict(l=40, r=40, t=60, b=40),
-            height=400,
-            plot_bgcolor='#fff',
-            paper_bgcolor='#fff',
-        )
-        if return_html:
-            html = fig.to_html(full_html=False, include_plotlyjs='cdn')
-            print(f"plot_annuity_payments finished, returning HTML of length {len(html)}")
-            return f"<div style='width:100%;min-width:320px;max-width:100vw;margin:0 auto'>{html}</div>"
-        else:
-            print("plot_annuity_payments finished, showing figure")
-            fig.show()
-            return None 
+        if self.differentiated:
+            return differentiated_schedule(self.loan_for_months(n), r, n, start, stop)[:2]
+        return annuity_schedule(self.payment_for_months(n), r, n, start, stop)
 
-    def plot_annuity_payments_data(self, years: int, mode: str = 'months'):
-        import numpy as np
+    def annuity_payments_series(self, years: int, mode: str = 'months', bucket_months: int = 1,
+                                month_range: Optional[Tuple[int, int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Ряды для графика платежей (по схеме payment_scheme): 'y' — номера месяцев (или лет при mode='years'),
+        'end' — последний месяц (год) каждой точки, 'interest' и 'principal' — проценты и погашение тела кредита,
+        'extra' — досрочные погашения (только если они заданы).
+        В режиме месяцев bucket_months > 1 суммирует ряды по корзинам (номер — первый месяц корзины),
+        а month_range=(с, по) ограничивает расчет диапазоном месяцев; суммы при этом точные.
+        """
         n = int(round(years * 12))
-        r = self.interest_rate / 12
-        if self.mode == 'property_value':
-            principal = self.property_value - self.initial_payment
-            if r == 0:
-                monthly_payment = principal / n
+        scheduled = bool(self.prepayments or self.rate_schedule or self.exact)
+        if scheduled:
+            schedule = self.payment_schedule(n)
+            keys = ('interest', 'principal', 'extra') if self.prepayments else ('interest', 'principal')
+            columns = {key: schedule[key] for key in keys}
+            n = len(schedule['payment'])
+        if mode == 'years':
+            if scheduled:
+                # Срок может сократиться досрочными погашениями, поэтому последний неполный год тоже показывается
+                columns = {key: aggregate_buckets(values, 12) for key, values in columns.items()}
             else:
-                monthly_payment = principal * r * (1 + r) ** n / ((1 + r) ** n - 1)
-        elif self.mode == 'monthly_payment':
-            monthly_payment = self.monthly_payment
+                # Только полные года
+                interest_paid, principal_paid = self._closed_form_schedule(n)
+                columns = {'interest': aggregate_by_year(interest_paid), 'principal': aggregate_by_year(principal_paid)}
+            y = np.arange(1, len(columns['interest']) + 1)
+            return dict(columns, y=y, end=y)
+        first, last = month_range if month_range is not None else (1, n)
+        first, last = max(int(first), 1), min(int(last), n)
+        if first > last:
+            raise ValueError('Некорректный диапазон месяцев')
+        if scheduled:
+            columns = {key: values[first - 1:last] for key, values in columns.items()}
         else:
-            raise ValueError('Неизвестный режим расчета')
-        P = monthly_payment
-        principal_left = P * (1 - (1 + r) ** -n) / r if r != 0 else P * n
-        principal = principal_left
-        months = np.arange(1, n + 1)
-        interest_paid = []
-        principal_paid = []
-        for month in months:
-            interest = principal * r
-            principal_part = P - interest
-            interest_paid.append(interest)
-            principal_paid.append(principal_part)
-            principal -= principal_part
-        interest_paid = np.array(interest_paid)
-        principal_paid = np.array(principal_paid)
-        total_paid = interest_paid + principal_paid
-        interest_pct = np.where(total_paid > 0, interest_paid / total_paid, 0)
-        principal_pct = np.where(total_paid > 0, principal_paid / total_paid, 0)
+            interest_paid, principal_paid = self._closed_form_schedule(n, first - 1, last)
+            columns = {'interest': interest_paid, 'principal': principal_paid}
+        columns = {key: aggregate_buckets(values, bucket_months) for key, values in columns.items()}
+        y = np.arange(first, last + 1, max(bucket_months, 1))
+        return dict(columns, y=y, end=np.minimum(y + max(bucket_months, 1) - 1, last))
 
-        if mode == 'years':
-            # Только полные года
-            n_full_years = n // 12
-            years_arr = list(range(1, n_full_years + 1))
-            interest_by_year = []
-            principal_by_year = []
-            years_labels = []
-            for y in years_arr:
-                start = (y - 1) * 12
-                end = y * 12
-                interest_by_year.append(interest_paid[start:end].sum())
-                principal_by_year.append(principal_paid[start:end].sum())
-                years_labels.append(f'{y} год   ')
-            y_vals = years_arr
-            interest_by_year = np.array(interest_by_year)
-            principal_by_year = np.array(principal_by_year)
-            total_by_year = interest_by_year + principal_by_year
-            interest_pct_year = np.where(total_by_year > 0, interest_by_year / total_by_year, 0)
-            principal_pct_year = np.where(total_by_year > 0, principal_by_year / total_by_year, 0)
-            data = [
-                {
-                    'y': y_vals,
-                    'x': interest_by_year.tolist(),
-                    'name': 'Проценты',
-                    'type': 'bar',
-                    'orientation': 'h',
-                    'marker': {'color': '#e63946'},
-                    'hovertemplate': 'Год %{y}: %{x:,.0f} руб. — проценты',
-                    'text': [f'{p:.0%}' for p in interest_pct_year],
-                    'textposition': 'inside',
-                },
-                {
-                    'y': y_vals,
-                    'x': principal_by_year.tolist(),
-                    'name': 'Тело кредита',
-                    'type': 'bar',
-                    'orientation': 'h',
-                    'marker': {'color': '#457b9d'},
-                    'hovertemplate': 'Год %{y}: %{x:,.0f} руб. — тело кредита',
-                    'text': [f'{p:.0%}' for p in principal_pct_year],
-                    'textposition': 'inside',
-                }
-            ]
-            adaptive_height = max(100, 25 * len(y_vals))
-            layout = {
-                'barmode': 'stack',
-                'xaxis': {
-                    'title': '',
-                    'showline': False,
-                    'showgrid': False,
-                    'zeroline': False,
-                    'showticklabels': False
-                },
-                'yaxis': {
-                    'title': '',
-                    'autorange': 'reversed',
-                    'showline': False,
-                    'showgrid': False,
-                    'zeroline': False,
-                    'tickmode': 'array',
-                    'tickvals': y_vals,
-                    'ticktext': years_labels,
-                    'ticklabelstep': 1,
-                    'ticklabelposition': 'outside',
-                    'tickangle': 0,
-                    'ticklabelpadding': 40,
-                    'tickpad': 40,
-                },
-                'showlegend': False,
-                'margin': {'l': 80, 'r': 40, 't': 0, 'b': 40},
-                'plot_bgcolor': '#fff',
-                'paper_bgcolor': '#fff',
-                'height': adaptive_height,
-            }
-        else:
-            adaptive_height = max(100, 25 * len(months))
-            months_labels = [f'{m} ({(m-1)//12+1} год)   ' for m in months]
-            data = [
-                {
-                    'y': months.tolist(),
-                    'x': interest_paid.tolist(),
-                    'name': 'Проценты',
-                    'type': 'bar',
-                    'orientation': 'h',
-                    'marker': {'color': '#e63946'},
-                    'hovertemplate': 'Месяц %{y}: %{x:,.0f} руб. — проценты',
-                    'text': [f'{p:.0%}' for p in interest_pct],
-                    'textposition': 'inside',
-                },
-                {
-                    'y': months.tolist(),
-                    'x': principal_paid.tolist(),
-                    'name': 'Тело кредита',
-                    'type': 'bar',
-                    'orientation': 'h',
-                    'marker': {'color': '#457b9d'},
-                    'hovertemplate': 'Месяц %{y}: %{x:,.0f} руб. — тело кредита',
-                    'text': [f'{p:.0%}' for p in principal_pct],
-                    'textposition': 'inside',
-                }
-            ]
-            layout = {
-                'barmode': 'stack',
-                'xaxis': {
-                    'title': '',
-                    'showline': False,
-                    'showgrid': False,
-                    'zeroline': False,
-                    'showticklabels': False
-                },
-                'yaxis': {
-                    'title': '',
-                    'autorange': 'reversed',
-                    'showline': False,
-                    'showgrid': False,
-                    'zeroline': False,
-                },
-                'showlegend': False,
-                'margin': {'l': 80, 'r': 40, 't': 0, 'b': 40},
-                'plot_bgcolor': '#fff',
-                'paper_bgcolor': '#fff',
-                'height': adaptive_height,
-            }
-        return data, layout 
\ No newline at end of file
+    def plot_annuity_payments_data(self, years: int, mode: str = 'months', bucket_months: int = 1,
+                                   month_range: Optional[Tuple[int, int]] = None):
+        series = self.annuity_payments_series(years, mode, bucket_months, month_range)
+        keys = [key for key in ('interest', 'principal', 'extra') if key in series]
+        total_paid = sum(series[key] for key in keys)
+        y_vals = series['y'].tolist()
+        traces = annuity_trace_styles(mode, bucket_months)
+        if 'extra' in series:
+            traces = traces + (prepayment_trace_style(mode, bucket_months),)
+        for key, trace in zip(keys, traces):
+            # При нулевом кредите платежей нет: доля 0 без предупреждения о делении 0 / 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                share = np.where(total_paid > 0, series[key] / total_paid, 0)
+            trace.update({
+                'y': y_vals,
+                'x': series[key].tolist(),
+                'text': [f'{p:.0%}' for p in share],
+            })
+        layout = annuity_layout(mode, y_vals)
+        if mode != 'years' and (bucket_months > 1 or month_range is not None):
+            bucket_ends = series['end'].tolist()
+            for trace in traces:
+                trace['customdata'] = bucket_ends
+            layout['meta'] = {'bucket_months': bucket_months, 'month_range': [y_vals[0], bucket_ends[-1]]}
+        return list(traces), layout
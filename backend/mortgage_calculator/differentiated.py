@@ -0,0 +1,48 @@
+"""
+Дифференцированные платежи: тело кредита гасится равными долями L / n, проценты начисляются на остаток.
+
+Остаток перед месяцем k равен L (1 - (k - 1) / n), поэтому проценты по месяцам образуют
+арифметическую прогрессию от L r до L r / n, и итоги считаются без графика:
+первый платеж L / n + L r, последний (L / n) (1 + r), сумма процентов L r (n + 1) / 2.
+Помесячный график тоже строится в замкнутой форме, сразу для всех месяцев.
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+PAYMENT_SCHEMES = ('annuity', 'differentiated')
+
+
+def differentiated_totals(principal, r, n) -> Dict[str, np.ndarray]:
+    """
+    Первый и последний платежи и сумма процентов для кредита principal на n месяцев при месячной ставке r;
+    аргументы — массивы NumPy (или числа), совместимые при broadcasting.
+    """
+    principal, r, n = np.broadcast_arrays(np.asarray(principal, dtype=float), np.asarray(r, dtype=float), np.asarray(n, dtype=float))
+    share = principal / n
+    return {
+        'first_payment': share + principal * r,
+        'last_payment': share * (1 + r),
+        'total_interest': principal * r * (n + 1) / 2,
+    }
+
+
+def differentiated_principal(first_payment, r, n) -> np.ndarray:
+    """
+    Сумма кредита на n месяцев, при которой первый (наибольший) платеж равен first_payment.
+    """
+    first_payment, r, n = np.broadcast_arrays(np.asarray(first_payment, dtype=float), np.asarray(r, dtype=float), np.asarray(n, dtype=float))
+    return first_payment * n / (1 + r * n)
+
+
+def differentiated_schedule(principal: float, r: float, n: int, start: int = 0,
+                            stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Помесячный график для месяцев start+1..stop (по умолчанию 1..n): проценты, погашение тела кредита
+    и остаток долга после платежа.
+    """
+    stop = n if stop is None else min(stop, n)
+    share = principal / n
+    months = np.arange(start + 1, stop + 1, dtype=float)
+    balance = np.maximum(principal - share * months, 0)
+    interest = (balance + share) * r
+    return interest, np.full(len(months), share), balance
@@ -0,0 +1,147 @@
+"""
+Точный банковский график в копейках на целочисленной арифметике.
+
+Правила как в выписке банка: платеж округляется до копейки, проценты каждого месяца
+(остаток × годовая ставка / 12) округляются до копейки по правилу «половина вверх»,
+последний платеж корректируется так, чтобы остаток стал ровно нулевым.
+Ставка задается точной дробью num / den с шагом 0.0001% годовых.
+
+Остаток после округления процентов зависит от предыдущего месяца, поэтому вместо
+помесячного цикла используется итерация по всему графику сразу: по текущему приближению
+остатков одним векторным действием считаются проценты всех месяцев, а новые остатки —
+накопленной суммой L + cumsum(проценты - платеж) в int64. Точное решение — неподвижная
+точка этой итерации; начальное приближение берется из формулы аннуитета, и после каждой
+итерации верный префикс графика только удлиняется, поэтому обычно хватает нескольких итераций.
+"""
+from typing import Dict, Tuple
+import numpy as np
+
+KOPECKS = 100
+# Годовая ставка в долях единицы хранится как целое число миллионных долей (0.0001%)
+RATE_SCALE = 10 ** 6
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def rate_fraction(annual_rate: float) -> Tuple[int, int]:
+    """
+    Месячная ставка annual_rate / 12 в виде точной дроби (числитель, знаменатель).
+    """
+    return int(round(annual_rate * RATE_SCALE)), 12 * RATE_SCALE
+
+
+def to_kopecks(rubles) -> np.ndarray:
+    """
+    Суммы в рублях в целые копейки (округление половины вверх).
+    """
+    return np.floor(np.asarray(rubles, dtype=float) * KOPECKS + 0.5).astype(np.int64)
+
+
+def _interest(balance: np.ndarray, num: int, den: int) -> np.ndarray:
+    # Проценты с округлением половины вверх: floor((B * num / den) + 1/2) в целых числах
+    return (2 * balance * num + den) // (2 * den)
+
+
+def exact_payment(loan, num: int, den: int, n) -> np.ndarray:
+    """
+    Аннуитетный платеж в копейках, округленный до копейки, для кредитов loan (копейки) на n месяцев.
+    """
+    loan, n = np.broadcast_arrays(np.asarray(loan, dtype=float), np.asarray(n, dtype=float))
+    r = num / den
+    if num == 0:
+        return np.floor(loan / n + 0.5).astype(np.int64)
+    growth = (1 + r) ** n
+    return np.floor(loan * r * growth / (growth - 1) + 0.5).astype(np.int64)
+
+
+def exact_balances(loan: np.ndarray, payment: np.ndarray, num: int, den: int, n,
+                   max_iter: int = 10_000) -> np.ndarray:
+    """
+    Остатки на начало месяцев (форма: сценарии × max(n)) без коррекции последнего платежа:
+    B[0] = loan, B[t + 1] = B[t] + проценты(B[t]) - payment. Все величины — копейки int64.
+    n — срок в месяцах (число или массив по сценариям); значения после срока сценария не определены.
+    """
+    loan = np.asarray(loan, dtype=np.int64).reshape(-1, 1)
+    payment = np.asarray(payment, dtype=np.int64).reshape(-1, 1)
+    n = np.broadcast_to(np.asarray(n, dtype=np.int64), (loan.shape[0],))
+    limit = int(np.abs(loan).max(initial=0))
+    if 2 * limit * num + den > _INT64_MAX:
+        raise ValueError('Сумма слишком велика для точного расчета в копейках')
+    months = int(n.max(initial=1))
+    t = np.arange(months, dtype=float)
+    r = num / den
+    with np.errstate(over='ignore', invalid='ignore'):
+        if num == 0:
+            guess = loan - payment * t
+        else:
+            growth = (1 + r) ** t
+            guess = loan * growth - payment * (growth - 1) / r
+    # До погашения остаток лежит в [0, loan]; за этими пределами приближение бесполезно
+    balance = np.rint(np.clip(np.nan_to_num(guess), 0, limit)).astype(np.int64)
+    balance[:, 0] = loan[:, 0]
+    valid = t < n[:, None]
+    # balance[:, start] уже точен; каждый проход пересчитывает хвост графика после него
+    start = 0
+    for _ in range(max_iter):
+        tail = np.cumsum(_interest(balance[:, start:-1], num, den) - payment, axis=1)
+        tail += balance[:, start:start + 1]
+        changed = ((tail != balance[:, start + 1:]) & valid[:, start + 1:]).any(axis=0)
+        if not changed.any():
+            return balance
+        balance[:, start + 1:] = tail
+        start += 1 + int(np.argmax(changed))
+    raise RuntimeError('Точный график не сошелся')
+
+
+def _payoff(balance: np.ndarray, interest: np.ndarray, payment: np.ndarray, n) -> np.ndarray:
+    """
+    Индекс последнего месяца: первый месяц, в котором остаток с процентами не больше платежа,
+    но не позже месяца n (там остаток закрывается корректировкой последнего платежа).
+    """
+    n = np.broadcast_to(np.asarray(n), (balance.shape[0],))
+    months = np.arange(balance.shape[1])
+    done = (balance + interest <= payment.reshape(-1, 1)) | (months >= (n - 1).reshape(-1, 1))
+    return np.argmax(done, axis=1)
+
+
+def exact_schedule(loan: int, payment: int, num: int, den: int, n: int) -> Dict[str, np.ndarray]:
+    """
+    Помесячный график в копейках (int64): 'payment', 'interest', 'principal', 'balance' (остаток после платежа).
+    Последний платеж равен остатку с процентами.
+    """
+    balance = exact_balances(np.array([loan]), np.array([payment]), num, den, n)[0]
+    interest = _interest(balance, num, den)
+    last = int(_payoff(balance[None, :], interest[None, :], np.array([payment]), n)[0])
+    balance, interest = balance[:last + 1], interest[:last + 1]
+    payments = np.full(last + 1, payment, dtype=np.int64)
+    payments[-1] = balance[-1] + interest[-1]
+    principal = payments - interest
+    return {
+        'payment': payments,
+        'interest': interest,
+        'principal': principal,
+        'balance': balance - principal,
+    }
+
+
+def exact_totals(loan, payment, num: int, den: int, n) -> Dict[str, np.ndarray]:
+    """
+    Итоги точных графиков сразу для набора кредитов (копейки) с разными сроками n:
+    сумма платежей, сумма процентов, последний (скорректированный) платеж и фактический срок.
+    """
+    loan = np.asarray(loan, dtype=np.int64)
+    payment = np.asarray(payment, dtype=np.int64)
+    n = np.asarray(n, dtype=np.int64)
+    balance = exact_balances(loan, payment, num, den, n)
+    interest = _interest(balance, num, den)
+    last = _payoff(balance, interest, payment, n)
+    months = np.arange(balance.shape[1])
+    active = months <= last[:, None]
+    rows = np.arange(len(last))
+    last_payment = balance[rows, last] + interest[rows, last]
+    total_interest = np.where(active, interest, 0).sum(axis=1)
+    return {
+        'total_payment': loan + total_interest,
+        'total_interest': total_interest,
+        'last_payment': last_payment,
+        'months': last + 1,
+    }
@@ -0,0 +1,69 @@
+"""
+Потоковая выгрузка помесячного графика платежей в CSV или NDJSON.
+
+График считается кусками по chunk_months месяцев в замкнутой форме
+(amortization.annuity_schedule), и каждый кусок сразу форматируется в текст,
+поэтому потребление памяти не зависит от срока и количества сценариев.
+При плавающей ставке или досрочных погашениях график одного сценария строится
+целиком (schedule.payment_schedule) и выгружается теми же кусками.
+"""
+from typing import Iterator, Sequence, Tuple
+import io
+import numpy as np
+
+from .amortization import annuity_balance, annuity_schedule
+from .core import MortgageCalculator
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+COLUMNS = ('scenario', 'month', 'year', 'payment', 'interest', 'principal', 'balance')
+
+_CSV_ROW = '%d,%d,%d,%.2f,%.2f,%.2f,%.2f'
+_NDJSON_ROW = ('{"scenario": %d, "month": %d, "year": %d, "payment": %.2f, '
+               '"interest": %.2f, "principal": %.2f, "balance": %.2f}')
+
+
+def iter_schedule_chunks(calc: MortgageCalculator, n: int, chunk_months: int = 1200) -> Iterator[np.ndarray]:
+    """
+    Помесячный график для срока n месяцев кусками по chunk_months строк.
+    Каждый кусок — массив формы (k, 6): месяц, год, платеж, проценты, тело кредита, остаток долга.
+    """
+    if n <= 0:
+        raise ValueError('Срок должен быть больше 0')
+    if chunk_months <= 0:
+        raise ValueError('Размер блока должен быть больше 0')
+    if calc.rate_schedule or calc.prepayments or calc.exact or calc.differentiated:
+        # Ставка или платеж меняются по ходу графика: график строится целиком и отдается кусками
+        schedule = calc.payment_schedule(n)
+        for start in range(0, len(schedule['payment']), chunk_months):
+            stop = min(start + chunk_months, len(schedule['payment']))
+            months = np.arange(start + 1, stop + 1)
+            yield np.column_stack([months, (months - 1) // 12 + 1]
+                                  + [schedule[key][start:stop] for key in ('payment', 'interest', 'principal', 'balance')])
+        return
+    r = calc.interest_rate / 12
+    payment = calc.payment_for_months(n)
+    for start in range(0, n, chunk_months):
+        stop = min(start + chunk_months, n)
+        interest, principal = annuity_schedule(payment, r, n, start, stop)
+        balance = np.maximum(annuity_balance(payment, r, n, start, stop), 0)
+        months = np.arange(start + 1, stop + 1)
+        yield np.column_stack((months, (months - 1) // 12 + 1, np.full(len(months), payment), interest, principal, balance))
+
+
+def stream_schedules(scenarios: Sequence[Tuple[MortgageCalculator, int]], fmt: str = 'csv',
+                     chunk_months: int = 1200) -> Iterator[str]:
+    """
+    Сгенерировать текст выгрузки для списка сценариев (калькулятор, срок в месяцах).
+    Первым для CSV отдается заголовок, затем по одному текстовому блоку на кусок графика.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
+    row_format = _CSV_ROW if fmt == 'csv' else _NDJSON_ROW
+    if fmt == 'csv':
+        yield ','.join(COLUMNS) + '\n'
+    for index, (calc, n) in enumerate(scenarios):
+        for chunk in iter_schedule_chunks(calc, n, chunk_months):
+            rows = np.column_stack((np.full(len(chunk), index), chunk))
+            buffer = io.StringIO()
+            np.savetxt(buffer, rows, fmt=row_format)
+            yield buffer.getvalue()
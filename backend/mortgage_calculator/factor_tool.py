@@ -0,0 +1,86 @@
+"""
+Построение и проверка таблицы аннуитетных коэффициентов (см. factors).
+
+Пример:
+    python -m mortgage_calculator.factor_tool build factors.npy --step 0.01 --max-rate 100 --max-months 600
+    python -m mortgage_calculator.factor_tool validate factors.npy
+"""
+from decimal import Decimal, getcontext
+from typing import List, Optional
+import argparse
+import sys
+import numpy as np
+
+from .factors import DEFAULT_MAX_MONTHS, DEFAULT_MAX_RATE, DEFAULT_STEP, FactorTable, annuity_factors, build_table, save_table
+
+# Допустимая относительная ошибка коэффициента против расчета с 50 знаками
+MAX_RELATIVE_ERROR = 1e-13
+
+
+def reference_factor(annual_rate: float, n: int) -> Decimal:
+    """
+    Коэффициент с 50 значащими цифрами для проверки таблицы.
+    """
+    getcontext().prec = 50
+    r = Decimal(repr(float(annual_rate))) / 12
+    if r == 0:
+        return Decimal(1) / n
+    return r / (1 - (1 + r) ** -n)
+
+
+def validate_table(table: FactorTable, samples: int = 20000, seed: int = 0) -> List[str]:
+    """
+    Проверить таблицу: конечность и монотонность коэффициентов, совпадение с прямым расчетом во всех ячейках
+    и относительную ошибку на случайной выборке ячеек против расчета с 50 знаками.
+    Возвращает список найденных проблем (пустой — таблица корректна) и печатает сводку.
+    """
+    problems = []
+    data = np.asarray(table.table)
+    factors = data[:, 1:]
+    if not np.isfinite(factors).all() or (factors <= 0).any():
+        problems.append('в таблице есть нечисловые или неположительные коэффициенты')
+    if (np.diff(factors, axis=1) > 0).any():
+        problems.append('коэффициент растет с увеличением срока')
+    if (np.diff(factors, axis=0) < 0).any():
+        problems.append('коэффициент убывает с ростом ставки')
+    expected = annuity_factors(data[:, :1], np.arange(1, table.max_months + 1))
+    if not np.array_equal(factors, expected):
+        problems.append(f'расхождение с прямым расчетом: {int((factors != expected).sum())} ячеек')
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, data.shape[0], samples)
+    months = rng.integers(1, table.max_months + 1, samples)
+    errors = np.array([float(abs(Decimal(data[i, n]) / reference_factor(data[i, 0], n) - 1)) for i, n in zip(rows, months)])
+    print(f'Ставок: {data.shape[0]}, шаг {table.step * 100:g}%, сроки 1..{table.max_months} месяцев, '
+          f'размер {data.nbytes / 2 ** 20:.1f} МБ')
+    print(f'Относительная ошибка на {samples} ячейках: макс. {errors.max():.2e}, средн. {errors.mean():.2e}')
+    if errors.max() > MAX_RELATIVE_ERROR:
+        problems.append(f'относительная ошибка {errors.max():.2e} больше {MAX_RELATIVE_ERROR:g}')
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Таблица аннуитетных коэффициентов')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='построить таблицу и записать в файл .npy')
+    build.add_argument('output')
+    build.add_argument('--step', type=float, default=DEFAULT_STEP * 100, help='шаг сетки годовых ставок, %%')
+    build.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE * 100, help='наибольшая годовая ставка, %%')
+    build.add_argument('--max-months', type=int, default=DEFAULT_MAX_MONTHS, help='наибольший срок, месяцев')
+    validate = commands.add_parser('validate', help='проверить точность таблицы')
+    validate.add_argument('path')
+    validate.add_argument('--samples', type=int, default=20000, help='число ячеек для сравнения с точным расчетом')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        table = build_table(args.step / 100, args.max_rate / 100, args.max_months)
+        save_table(args.output, table)
+        print(f'Записано {args.output}: {table.shape[0]} ставок × {table.shape[1] - 1} сроков, {table.nbytes / 2 ** 20:.1f} МБ')
+        return 0
+    problems = validate_table(FactorTable(args.path), args.samples)
+    for problem in problems:
+        print(f'Ошибка: {problem}', file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Предвычисленная таблица аннуитетных коэффициентов с отображением файла в память.
+
+Коэффициент a(r, n) = r / (1 - (1 + r) ** -n) — платеж на рубль кредита при месячной ставке r
+и сроке n месяцев; сумма кредита для платежа P равна P / a. Таблица покрывает сетку годовых
+ставок с шагом step (по умолчанию 0.01%) и сроки 1..max_months месяцев и хранится в файле .npy:
+строка i соответствует годовой ставке i * step, столбец 0 — сама ставка, столбец n — a(r, n).
+Файл открывается через np.load(mmap_mode='r'), поэтому воркеры gunicorn читают одни и те же
+страницы из кэша ОС, а не держат по копии. Ставки вне сетки и сроки вне таблицы считаются напрямую.
+
+Таблица подключается переменной окружения MORTGAGE_FACTOR_TABLE (путь к файлу);
+построение и проверка — модуль mortgage_calculator.factor_tool.
+"""
+from typing import Optional, Tuple
+import os
+import numpy as np
+
+DEFAULT_STEP = 0.0001
+DEFAULT_MAX_RATE = 1.0
+DEFAULT_MAX_MONTHS = 600
+# Допуск, с которым годовая ставка считается лежащей на сетке (в долях шага)
+GRID_TOLERANCE = 1e-6
+
+_table: Optional['FactorTable'] = None
+_loaded = False
+
+
+def annuity_factors(annual_rate, n) -> np.ndarray:
+    """
+    Коэффициенты a(r, n) прямым расчетом; annual_rate — годовая ставка в долях единицы.
+    (1 + r) ** n - 1 считается через expm1/log1p, без потери точности при малых ставках.
+    """
+    r, n = np.broadcast_arrays(np.asarray(annual_rate, dtype=float) / 12, np.asarray(n, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(r == 0, 1 / n, r / -np.expm1(-n * np.log1p(r)))
+
+
+def build_table(step: float = DEFAULT_STEP, max_rate: float = DEFAULT_MAX_RATE,
+                max_months: int = DEFAULT_MAX_MONTHS) -> np.ndarray:
+    """
+    Таблица в формате файла: (число ставок) × (max_months + 1), столбец 0 — годовая ставка.
+    """
+    if step <= 0 or max_rate < 0 or max_months < 1:
+        raise ValueError('Некорректные параметры таблицы коэффициентов')
+    rates = np.arange(int(round(max_rate / step)) + 1) * step
+    table = np.empty((len(rates), max_months + 1))
+    table[:, 0] = rates
+    table[:, 1:] = annuity_factors(rates[:, None], np.arange(1, max_months + 1))
+    return table
+
+
+def save_table(path: str, table: np.ndarray) -> None:
+    # Запись во временный файл и замена: воркеры, уже отобразившие старый файл, продолжают его читать
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, table)
+    os.replace(tmp, path)
+
+
+class FactorTable:
+    """
+    Таблица коэффициентов, отображенная в память. lookup — O(1) на элемент для ставок на сетке.
+    Отсутствующий или поврежденный файл — ValueError, чтобы ошибка настройки была видна при запуске сервера.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self.table = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            raise ValueError(f'Не удалось прочитать таблицу коэффициентов {path}: {e}') from e
+        if self.table.ndim != 2 or self.table.shape[0] < 2 or self.table.shape[1] < 2:
+            raise ValueError(f'Некорректная таблица коэффициентов: {path}')
+        self.step = float(self.table[1, 0] - self.table[0, 0])
+        self.max_months = self.table.shape[1] - 1
+        last = self.table.shape[0] - 1
+        if self.table[0, 0] != 0 or self.step <= 0 or abs(self.table[last, 0] - last * self.step) > GRID_TOLERANCE * self.step:
+            raise ValueError(f'Сетка ставок таблицы коэффициентов неравномерна: {path}')
+
+    def lookup(self, annual_rate, n) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (коэффициенты, маска попаданий в таблицу) для массивов годовых ставок и сроков в месяцах;
+        вне маски коэффициенты не заполнены (NaN).
+        """
+        annual_rate, n = np.broadcast_arrays(np.asarray(annual_rate, dtype=float), np.asarray(n, dtype=float))
+        position = annual_rate / self.step
+        row = np.rint(position)
+        hit = ((np.abs(position - row) <= GRID_TOLERANCE) & (row >= 0) & (row < self.table.shape[0])
+               & (n >= 1) & (n <= self.max_months) & (n == np.floor(n)))
+        if hit.all():
+            return self.table[row.astype(np.intp), n.astype(np.intp)], hit
+        values = np.full(annual_rate.shape, np.nan)
+        values[hit] = self.table[row[hit].astype(np.intp), n[hit].astype(np.intp)]
+        return values, hit
+
+    def factors(self, annual_rate, n) -> np.ndarray:
+        """
+        Коэффициенты из таблицы, а для ставок вне сетки и сроков вне таблицы — прямым расчетом.
+        """
+        values, hit = self.lookup(annual_rate, n)
+        if not hit.all():
+            miss = ~hit
+            rates, terms = np.broadcast_arrays(np.asarray(annual_rate, dtype=float), np.asarray(n, dtype=float))
+            values[miss] = annuity_factors(rates[miss], terms[miss])
+        return values
+
+
+def factor_table() -> Optional[FactorTable]:
+    """
+    Таблица из файла MORTGAGE_FACTOR_TABLE (загружается один раз на процесс) или None, если путь не задан.
+    """
+    global _table, _loaded
+    if not _loaded:
+        path = os.environ.get('MORTGAGE_FACTOR_TABLE')
+        _table = FactorTable(path) if path else None
+        _loaded = True
+    return _table
+
+
+def set_factor_table(table: Optional[FactorTable]) -> None:
+    """
+    Подключить таблицу явно (или отключить, передав None) вместо переменной окружения.
+    """
+    global _table, _loaded
+    _table, _loaded = table, True
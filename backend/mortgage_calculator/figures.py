@@ -0,0 +1,304 @@
+"""
+Шаблоны трасс и макетов графиков в виде обычных словарей (формат Plotly JSON).
+
+Данные (x, y, подписи) подставляются вызывающим кодом, поэтому одни и те же
+шаблоны используются и для полного JSON-ответа, и для компактного столбцового.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .results import ResultColumns
+
+
+def annuity_trace_styles(mode: str = 'months', bucket_months: int = 1) -> Tuple[Dict, Dict]:
+    """
+    Оформление трасс «Проценты» и «Тело кредита» графика аннуитетных платежей без данных.
+    Для корзин из нескольких месяцев подсказка показывает диапазон «первый–последний месяц»
+    (последний месяц передается в customdata).
+    """
+    if mode == 'years':
+        label = 'Год %{y}'
+    elif bucket_months > 1:
+        label = 'Месяцы %{y}–%{customdata}'
+    else:
+        label = 'Месяц %{y}'
+    interest_trace = {
+        'name': 'Проценты',
+        'type': 'bar',
+        'orientation': 'h',
+        'marker': {'color': '#e63946'},
+        'hovertemplate': label + ': %{x:,.0f} руб. — проценты',
+        'textposition': 'inside',
+    }
+    principal_trace = {
+        'name': 'Тело кредита',
+        'type': 'bar',
+        'orientation': 'h',
+        'marker': {'color': '#457b9d'},
+        'hovertemplate': label + ': %{x:,.0f} руб. — тело кредита',
+        'textposition': 'inside',
+    }
+    return interest_trace, principal_trace
+
+
+def prepayment_trace_style(mode: str = 'months', bucket_months: int = 1) -> Dict:
+    """
+    Оформление трассы «Досрочное погашение» для графика с досрочными взносами.
+    """
+    interest_trace, _ = annuity_trace_styles(mode, bucket_months)
+    return dict(
+        interest_trace,
+        name='Досрочное погашение',
+        marker={'color': '#2a9d8f'},
+        hovertemplate=interest_trace['hovertemplate'].replace('проценты', 'досрочное погашение'),
+    )
+
+
+def annuity_layout(mode: str, y_vals: List[int]) -> Dict:
+    """
+    Макет графика аннуитетных платежей; высота растет с числом столбцов.
+    """
+    yaxis = {
+        'title': '',
+        'autorange': 'reversed',
+        'showline': False,
+        'showgrid': False,
+        'zeroline': False,
+    }
+    if mode == 'years':
+        yaxis.update({
+            'tickmode': 'array',
+            'tickvals': y_vals,
+            'ticktext': [f'{y} год   ' for y in y_vals],
+            'ticklabelstep': 1,
+            'ticklabelposition': 'outside',
+            'tickangle': 0,
+            'ticklabelpadding': 40,
+            'tickpad': 40,
+        })
+    return {
+        'barmode': 'stack',
+        'xaxis': {
+            'title': '',
+            'showline': False,
+            'showgrid': False,
+            'zeroline': False,
+            'showticklabels': False
+        },
+        'yaxis': yaxis,
+        'showlegend': False,
+        'margin': {'l': 80, 'r': 40, 't': 0, 'b': 40},
+        'plot_bgcolor': '#fff',
+        'paper_bgcolor': '#fff',
+        'height': max(100, 25 * len(y_vals)),
+    }
+
+
+PAYMENT_STRUCTURE_COLORS = {
+    'principal': '#264653',        # синий/темный
+    'initial_payment': '#00CC96',  # зеленый
+    'overpayment': '#EF553B'       # красный
+}
+
+
+def _mln(value: float) -> str:
+    mln = value / 1_000_000
+    return f"{int(mln)}" if mln.is_integer() else f"{mln:.1f}"
+
+
+def payment_structure_figure(results: ResultColumns, bar_width: float = 0.4) -> Tuple[List[Dict], Dict]:
+    """
+    Составная диаграмма структуры выплаты по срокам (сумма кредита, первоначальный взнос, переплата)
+    с подписью общей выплаты у каждого столбца и скобкой стоимости недвижимости под ним.
+    Все трассы, аннотации и фигуры собираются списками словарей за один проход, без валидации Plotly.
+    """
+    years = results.column('years').tolist()
+    principal = results.column('principal').astype(float)
+    initial_payment = results.column('initial_payment').astype(float)
+    overpayment = results.column('overpayment').astype(float)
+    total_payment = results.column('total_payment').astype(float)
+    property_value = results.column('property_value').astype(float)
+
+    def bar(name: str, key: str, x: np.ndarray) -> Dict:
+        return {
+            'type': 'bar',
+            'y': years,
+            'x': x.tolist(),
+            'name': name,
+            'marker': {'color': PAYMENT_STRUCTURE_COLORS[key]},
+            'width': [bar_width] * len(years),
+            'text': [f"{p:.0%}" for p in (x / total_payment).tolist()],
+            'textposition': 'inside',
+            'insidetextanchor': 'middle',
+            'orientation': 'h',
+            'hovertemplate': f'{name}: %{{x:,.0f}} руб.<br>Срок: %{{y}} лет<extra></extra>',
+            'textfont': {'size': 10},
+        }
+
+    data = [
+        bar('Сумма кредита', 'principal', principal),
+        bar('Первоначальный взнос', 'initial_payment', initial_payment),
+        bar('Переплата', 'overpayment', overpayment),
+    ]
+
+    # Аннотация общей выплаты справа от каждого бара
+    total_annotations = [
+        {
+            'x': total,
+            'y': year,
+            'text': ("<span style='color:#264653;font-size:10px;font-family:Arial,sans-serif'>Общая выплата</span><br>"
+                     f"<span style='color:#444;font-size:10px;font-family:Arial,sans-serif'>{_mln(total)} млн руб.</span>"),
+            'showarrow': False,
+            'xshift': 12,
+            'font': {'size': 10, 'color': '#444', 'family': 'Arial, sans-serif'},
+            'bgcolor': 'rgba(255,255,255,0.7)',
+            'bordercolor': '#cccccc',
+            'borderwidth': 1,
+            'borderpad': 4,
+            'opacity': 0.95,
+            'textangle': 0,
+            'xanchor': 'left',
+            'yanchor': 'middle',
+        }
+        for year, total in zip(years, total_payment.tolist())
+    ]
+
+    # S-образная скобка под баром (от 0 до конца суммы кредита) и подпись стоимости недвижимости над ней
+    bracket_right = (initial_payment + principal).tolist()
+    shapes = []
+    property_annotations = []
+    for year, x1, value in zip(years, bracket_right, property_value.tolist()):
+        y_bracket = year - bar_width / 2
+        shapes.append({
+            'type': 'path',
+            'path': (f"M0,{y_bracket} "
+                     f"C{0.18 * x1},{y_bracket - 0.10} "
+                     f"{x1 - 0.18 * x1},{y_bracket - 0.10} "
+                     f"{x1},{y_bracket}"),
+            'line': {'color': '#222', 'width': 1},
+            'xref': 'x',
+            'yref': 'y',
+        })
+        property_annotations.append({
+            'x': x1 / 2,
+            'y': y_bracket - 0.18,
+            'text': ("<span style='color:#264653;font-size:11px;font-family:Arial,sans-serif'>Стоимость недвижимости: "
+                     f"<b style='color:#222'>{_mln(value)}</b> млн руб.</span>"),
+            'showarrow': False,
+            'font': {'size': 11, 'color': '#264653', 'family': 'Arial, sans-serif'},
+            'align': 'center',
+            'bgcolor': 'rgba(255,255,255,0)',
+            'bordercolor': 'rgba(0,0,0,0)',
+            'borderwidth': 0,
+            'borderpad': 2,
+            'opacity': 1,
+            'textangle': 0,
+            'xanchor': 'center',
+            'yanchor': 'bottom',
+        })
+
+    axis_title_font = {'size': 11, 'family': 'Arial, sans-serif', 'color': '#222'}
+    axis_tick_font = {'size': 11, 'family': 'Arial, sans-serif', 'color': '#444'}
+    layout = {
+        'barmode': 'stack',
+        'title': {
+            'text': 'Структура выплаты',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 28, 'family': 'Arial, sans-serif', 'color': '#264653', 'weight': 'bold'},
+            'yanchor': 'top',
+        },
+        'font': {'family': 'Arial, sans-serif', 'size': 13, 'color': '#444'},
+        'plot_bgcolor': '#FFFFFF',
+        'paper_bgcolor': '#FFFFFF',
+        'xaxis': {
+            'title': {'text': 'Сумма (руб.)', 'font': axis_title_font},
+            'showgrid': False,
+            'zeroline': False,
+            'tickfont': axis_tick_font,
+        },
+        'yaxis': {
+            'title': {'text': 'Срок (лет)', 'font': axis_title_font},
+            'showgrid': False,
+            'zeroline': False,
+            'tickmode': 'linear',
+            'range': [min(years) - 0.7, max(years) + 0.7] if years else None,
+            'tickfont': axis_tick_font,
+            'autorange': 'reversed',
+            'ticklabelposition': 'outside',
+        },
+        'legend': {
+            'orientation': 'h',
+            'yanchor': 'bottom',
+            'y': 1.02,
+            'xanchor': 'center',
+            'x': 0.5,
+            'bgcolor': 'rgba(0,0,0,0)',
+            'font': {'size': 13},
+        },
+        'margin': {'l': 120, 'r': 40, 't': 170, 'b': 40},
+        # Адаптивная высота: не меньше 350 px, 80 px на каждый срок
+        'height': max(350, 80 * len(years)),
+        'annotations': total_annotations + property_annotations,
+        'shapes': shapes,
+    }
+    return data, layout
+
+
+SENSITIVITY_TITLES = {
+    'monthly_payment': 'Ежемесячный платеж',
+    'total_payment': 'Общая выплата',
+    'overpayment': 'Переплата',
+}
+SENSITIVITY_AXIS_LABELS = {
+    'initial_payment': 'Первоначальный взнос',
+    'monthly_payment': 'Ежемесячный платеж',
+}
+
+
+def sensitivity_figure(grid: Dict, metric: str = 'overpayment') -> Tuple[List[Dict], Dict]:
+    """
+    Тепловая карта показателя metric по сетке «срок (x) × ставка (y)» из sensitivity.sensitivity_grid.
+    По одной трассе на значение третьей оси; если значений несколько, видна первая,
+    а переключает их ползунок (sliders) без повторного запроса.
+    """
+    title = SENSITIVITY_TITLES[metric]
+    axis_label = SENSITIVITY_AXIS_LABELS[grid['axis']]
+    count = len(grid['values'])
+    data = [
+        {
+            'type': 'heatmap',
+            'x': grid['years'],
+            'y': grid['rates'],
+            'z': matrix,
+            'colorscale': 'RdYlGn',
+            'reversescale': True,
+            'colorbar': {'title': {'text': f'{title}, руб.'}},
+            'hovertemplate': (f'Ставка: %{{y}}%<br>Срок: %{{x}} лет<br>{title}: %{{z:,.0f}} руб.'
+                              f'<extra>{axis_label}: {value:,.0f} руб.</extra>'),
+            'visible': i == 0,
+            'name': f'{axis_label}: {value:,.0f} руб.',
+        }
+        for i, (matrix, value) in enumerate(zip(grid[metric], grid['values']))
+    ]
+    layout = {
+        'title': {'text': title, 'x': 0.5, 'xanchor': 'center'},
+        'xaxis': {'title': {'text': 'Срок (лет)'}},
+        'yaxis': {'title': {'text': 'Ставка (%)'}},
+        'margin': {'l': 80, 'r': 40, 't': 60, 'b': 60 if count == 1 else 120},
+        'plot_bgcolor': '#fff',
+        'paper_bgcolor': '#fff',
+        'height': 500,
+    }
+    if count > 1:
+        layout['sliders'] = [{
+            'active': 0,
+            'currentvalue': {'prefix': f'{axis_label}: ', 'suffix': ' руб.'},
+            'pad': {'t': 50},
+            'steps': [
+                {'method': 'restyle', 'label': f'{value:,.0f}', 'args': ['visible', [j == i for j in range(count)]]}
+                for i, value in enumerate(grid['values'])
+            ],
+        }]
+    return data, layout
@@ -0,0 +1,115 @@
+"""
+Сжатие ответов API и условные запросы (ETag / If-None-Match).
+
+ETag вычисляется из нормализованного ключа запроса (того же, что у кэша результатов), а не из тела
+ответа, поэтому совпадение If-None-Match проверяется до расчета и ответ 304 ничего не пересчитывает.
+Ключ хешируется через repr, так что ETag одинаков во всех процессах и после перезапуска.
+ETag слабый (W/"..."): сжатые и несжатые варианты одного ответа равнозначны по содержанию.
+
+Сжатие — gzip из стандартной библиотеки или brotli, если установлен пакет brotli;
+кодировка выбирается по Accept-Encoding с учетом q-значений. Сжатые варианты хранятся вместе
+с телом ответа (CachedBody), поэтому при попадании в кэш повторно не сжимаются.
+"""
+from typing import Dict, Hashable, Optional, Tuple
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+# Версия формата ответов: увеличить, если при тех же параметрах запроса меняется тело ответа
+ETAG_VERSION = 1
+# Ответы меньше этого размера не сжимаются: выигрыш меньше накладных расходов
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Поддерживаемые кодировки в порядке предпочтения сервера
+ENCODINGS: Tuple[str, ...] = (('br',) if brotli is not None else ()) + ('gzip',)
+
+
+def request_etag(key: Hashable) -> str:
+    """
+    Слабый ETag для нормализованного ключа запроса.
+    """
+    digest = hashlib.blake2b(repr((ETAG_VERSION, key)).encode('utf-8'), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Совпадает ли заголовок If-None-Match с etag (слабое сравнение, '*' совпадает с любым).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Кодировка сжатия для заголовка Accept-Encoding или None (без сжатия).
+    Из допустимых клиентом (q > 0) выбирается кодировка с наибольшим q, при равенстве — по порядку ENCODINGS.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best = None
+    best_q = 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        # mtime=0 — одинаковые байты при повторном сжатии
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise ValueError(f'Неподдерживаемая кодировка: {encoding}')
+
+
+class CachedBody:
+    """
+    Сериализованный ответ и его сжатые варианты, которые создаются при первом запросе кодировки.
+    """
+    __slots__ = ('body', '_encoded')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Тело в кодировке encoding и фактическая кодировка (None, если сжатие не нужно).
+        """
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+        data = self._encoded.get(encoding)
+        if data is None:
+            # Гонка двух потоков приводит лишь к повторному сжатию с тем же результатом
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data, encoding
@@ -0,0 +1,118 @@
+"""
+Структурированное асинхронное логирование для сервера.
+
+Обработчики запросов только кладут запись в очередь (QueueHandler); форматирование
+(JSON или текст) и запись в поток выполняет отдельный поток QueueListener, поэтому
+вывод не блокирует запрос. Аргументы сообщения тоже подставляются в потоке записи.
+Записи ниже WARNING можно прореживать (sample_rate); предупреждения, ошибки
+и трассировки исключений сохраняются всегда.
+"""
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+LOG_FORMATS = ('json', 'text')
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(process)d] %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна строка JSON на запись: время, уровень, логгер, сообщение, процесс и поток,
+    дополнительные поля из extra={'fields': {...}} и трассировка исключения ('exc').
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю sample_rate записей ниже уровня always_level; остальные записи — всегда.
+    """
+    def __init__(self, sample_rate: float = 1.0, always_level: int = logging.WARNING):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.always_level = always_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.always_level or self.sample_rate >= 1 or random.random() < self.sample_rate
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    Очередь живет в том же процессе, поэтому запись передается как есть: без форматирования
+    и без сериализации исключения в потоке запроса.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json', sample_rate: float = 1.0,
+                      stream: Optional[TextIO] = None) -> QueueListener:
+    """
+    Настроить корневой логгер: QueueHandler с прореживанием и поток записи в stream (по умолчанию stdout).
+    Повторный вызов заменяет предыдущую настройку.
+    """
+    global _listener
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f'Неизвестный формат логов: {fmt}')
+    if not 0 <= sample_rate <= 1:
+        raise ValueError('Доля записей в логе должна быть от 0 до 1')
+    _stop_listener()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _InProcessQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rate))
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def configure_logging_from_env() -> QueueListener:
+    """
+    Настройка логирования из переменных окружения MORTGAGE_LOG_LEVEL, MORTGAGE_LOG_FORMAT и MORTGAGE_LOG_SAMPLE.
+    """
+    return configure_logging(
+        level=os.environ.get('MORTGAGE_LOG_LEVEL', 'INFO'),
+        fmt=os.environ.get('MORTGAGE_LOG_FORMAT', 'json'),
+        sample_rate=float(os.environ.get('MORTGAGE_LOG_SAMPLE', 1)),
+    )
+
+
+def _stop_listener():
+    # QueueListener.stop() нельзя вызывать повторно, поэтому остановленный поток записи забывается
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
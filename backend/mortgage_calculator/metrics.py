@@ -0,0 +1,135 @@
+"""
+Метрики сервера в текстовом формате Prometheus без внешних зависимостей.
+
+Гистограммы хранят счетчики по фиксированным корзинам, поэтому наблюдение — это
+поиск корзины (bisect) и несколько сложений под блокировкой, а накопленные суммы
+по корзинам считаются только при выдаче /metrics.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import threading
+
+# Корзины задержек (секунды) и размеров тел запросов и ответов (байты)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in items) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасный набор счетчиков и гистограмм с метками.
+    Метрика объявляется один раз (counter / histogram), затем обновляется через inc / observe.
+    """
+    def __init__(self, prefix: str = 'mortgage'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List]] = {}
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._meta[name] = ('counter', help_text, None)
+        self._counters[name] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+        self._histograms[name] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        buckets = self._meta[name][2]
+        index = bisect_left(buckets, value)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            state = series.get(key)
+            if state is None:
+                # Счетчики по корзинам (последняя — больше всех границ), сумма и количество
+                state = series[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self, gauges: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """
+        Все метрики в текстовом формате Prometheus. gauges — дополнительные значения
+        (имя, тип, описание, значение), снятые в момент выдачи, например статистика кэша.
+        """
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: (list(state[0]), state[1], state[2]) for key, state in series.items()}
+                          for name, series in self._histograms.items()}
+        lines: List[str] = []
+        for name, (kind, help_text, buckets) in self._meta.items():
+            full = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full} {help_text}')
+            lines.append(f'# TYPE {full} {kind}')
+            if kind == 'counter':
+                for labels, value in sorted(counters[name].items()):
+                    lines.append(f'{full}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            for labels, (counts, total, count) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(tuple(buckets) + (math.inf,), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{full}_bucket{_format_labels(labels, ("le", _format_value(bound)))} {cumulative}')
+                lines.append(f'{full}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{full}_count{_format_labels(labels)} {count}')
+        for name, kind, help_text, value in gauges:
+            full = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full} {help_text}')
+            lines.append(f'# TYPE {full} {kind}')
+            lines.append(f'{full} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def cache_gauges(stats: Dict) -> List[Tuple[str, str, str, float]]:
+    """
+    Статистика ResultCache.stats() в виде значений для MetricsRegistry.render.
+    """
+    return [
+        ('cache_hits_total', 'counter', 'Попадания в кэш результатов', stats['hits']),
+        ('cache_misses_total', 'counter', 'Промахи кэша результатов', stats['misses']),
+        ('cache_evictions_total', 'counter', 'Вытеснения из кэша по размеру', stats['evictions']),
+        ('cache_expirations_total', 'counter', 'Устаревшие записи кэша', stats['expirations']),
+        ('cache_entries', 'gauge', 'Записей в кэше', stats['size']),
+    ]
+
+
+def singleflight_gauges(stats: Dict) -> List[Tuple[str, str, str, float]]:
+    """
+    Статистика SingleFlight.stats() в виде значений для MetricsRegistry.render.
+    """
+    return [
+        ('coalesced_leaders_total', 'counter', 'Вычисления, выполненные для группы одинаковых запросов', stats['leaders']),
+        ('coalesced_shared_total', 'counter', 'Запросы, получившие результат одинакового одновременного запроса', stats['shared']),
+        ('coalesced_shared_errors_total', 'counter', 'Запросы, получившие ошибку одинакового одновременного запроса', stats['shared_errors']),
+        ('coalesced_timeouts_total', 'counter', 'Запросы, не дождавшиеся результата одинакового запроса', stats['timeouts']),
+        ('coalesced_errors_total', 'counter', 'Объединенные вычисления, завершившиеся ошибкой', stats['errors']),
+        ('coalesced_in_flight', 'gauge', 'Выполняющиеся объединенные вычисления', stats['in_flight']),
+        ('coalesced_waiting', 'gauge', 'Запросы, ожидающие одинаковое вычисление', stats['waiting']),
+    ]
@@ -0,0 +1,67 @@
+"""
+Компактный столбцовый формат ответа для графика аннуитетных платежей.
+
+Числовые ряды передаются упакованными массивами (little-endian, base64),
+а оформление трасс и макет — обычным JSON. Подписи процентов, номера месяцев
+и ось Y клиент восстанавливает сам, поэтому ответ не растет за счет текста.
+"""
+from typing import Dict, Optional, Tuple
+import base64
+import numpy as np
+
+from .core import MortgageCalculator
+from .figures import annuity_layout, annuity_trace_styles, prepayment_trace_style
+
+COLUMNAR_DTYPES = {'float32': '<f4', 'float64': '<f8'}
+
+
+def encode_array(values: np.ndarray, dtype: str = 'float64') -> Dict:
+    """
+    Упаковать массив в словарь {'dtype', 'length', 'data'} с данными в base64.
+    """
+    if dtype not in COLUMNAR_DTYPES:
+        raise ValueError(f'Неподдерживаемый тип данных: {dtype}')
+    packed = np.ascontiguousarray(values, dtype=COLUMNAR_DTYPES[dtype])
+    return {
+        'dtype': dtype,
+        'length': len(packed),
+        'data': base64.b64encode(packed.tobytes()).decode('ascii'),
+    }
+
+
+def decode_array(column: Dict) -> np.ndarray:
+    """
+    Обратное преобразование для encode_array.
+    """
+    return np.frombuffer(base64.b64decode(column['data']), dtype=COLUMNAR_DTYPES[column['dtype']])
+
+
+def annuity_payments_columnar(calc: MortgageCalculator, years: int, mode: str = 'months', dtype: str = 'float64',
+                              bucket_months: int = 1, month_range: Optional[Tuple[int, int]] = None) -> Dict:
+    """
+    Данные графика аннуитетных платежей в столбцовом виде.
+    Ось Y — арифметическая прогрессия start, start + step, ... (месяцы, первые месяцы корзин или годы),
+    трасса ссылается на свой столбец полем 'column'. Для корзин и диапазона месяцев последний месяц
+    каждой точки передается столбцом 'end' (customdata трасс), а описание детализации — в layout.meta.
+    """
+    series = calc.annuity_payments_series(years, mode, bucket_months, month_range)
+    y = series['y']
+    traces = list(annuity_trace_styles(mode, bucket_months))
+    if 'extra' in series:
+        traces.append(prepayment_trace_style(mode, bucket_months))
+    columns = {}
+    for key, trace in zip(('interest', 'principal', 'extra'), traces):
+        trace['column'] = key
+        columns[key] = encode_array(series[key], dtype)
+    layout = annuity_layout(mode, y.tolist())
+    if mode != 'years' and (bucket_months > 1 or month_range is not None):
+        columns['end'] = encode_array(series['end'], dtype)
+        layout['meta'] = {'bucket_months': bucket_months, 'month_range': [int(y[0]), int(series['end'][-1])]}
+    return {
+        'format': 'columnar',
+        'length': len(y),
+        'y': {'start': int(y[0]) if len(y) else 1, 'step': 1 if mode == 'years' else max(bucket_months, 1)},
+        'columns': columns,
+        'traces': traces,
+        'layout': layout,
+    }
@@ -0,0 +1,78 @@
+"""
+Досрочные погашения: график платежей с разовыми и регулярными досрочными взносами.
+
+Сам график строится общим движком schedule.payment_schedule: между событиями платеж
+постоянен, и каждый отрезок считается в замкнутой форме.
+
+Стратегии:
+- 'reduce_term' — платеж сохраняется, срок сокращается;
+- 'reduce_payment' — срок сохраняется, платеж пересчитывается после каждого взноса.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .schedule import PREPAYMENT_STRATEGIES, payment_schedule
+
+# Нормализованное описание взноса: (первый месяц, сумма, периодичность в месяцах или 0, последний месяц или None)
+Prepayment = Tuple[int, float, int, Optional[int]]
+
+def normalize_prepayments(items: Iterable[Dict]) -> Tuple[Prepayment, ...]:
+    """
+    Проверить и привести к кортежам описания досрочных взносов в формате API:
+    {'month': m, 'amount': a} — разовый взнос в конце месяца m;
+    {'amount': a, 'start': s, 'every': k[, 'end': e]} — взнос каждые k месяцев начиная с месяца s.
+    """
+    normalized = []
+    for item in items:
+        amount = float(item['amount'])
+        if amount <= 0:
+            raise ValueError('Сумма досрочного погашения должна быть больше 0')
+        every = int(item.get('every', 0) or 0)
+        start = int(item['start'] if every else item['month'])
+        end = item.get('end')
+        end = int(end) if end is not None else None
+        if start < 1 or every < 0 or (end is not None and end < start):
+            raise ValueError('Некорректный месяц досрочного погашения')
+        normalized.append((start, amount, every, end))
+    return tuple(sorted(normalized))
+
+
+def expand_prepayments(prepayments: Sequence[Prepayment], n: int) -> List[Tuple[int, float]]:
+    """
+    Развернуть описания взносов в отсортированный список (месяц, суммарный взнос) в пределах срока n.
+    """
+    by_month: Dict[int, float] = {}
+    for start, amount, every, end in prepayments:
+        last = min(end if end is not None else n, n)
+        months = range(start, last + 1, every) if every else ([start] if start <= n else [])
+        for month in months:
+            by_month[month] = by_month.get(month, 0.0) + amount
+    return sorted(by_month.items())
+
+
+def prepayment_schedule(loan: float, r: float, n: int, prepayments: Sequence[Prepayment],
+                        strategy: str = 'reduce_term') -> Dict[str, np.ndarray]:
+    """
+    Помесячный график кредита loan на n месяцев при постоянной месячной ставке r с досрочными взносами.
+    Возвращает массивы 'payment', 'interest', 'principal', 'extra', 'balance' одинаковой длины
+    (фактический срок в месяцах).
+    """
+    return payment_schedule(loan, n, ((1, r),), expand_prepayments(prepayments, n), strategy)
+
+
+def prepayment_summary(base: Dict[str, np.ndarray], schedule: Dict[str, np.ndarray], n: int) -> Dict:
+    """
+    Итоги графика schedule с досрочными погашениями и экономия относительно графика base без них.
+    """
+    base_interest = float(base['interest'].sum())
+    total_interest = float(schedule['interest'].sum())
+    return {
+        'months': len(schedule['payment']),
+        'months_saved': n - len(schedule['payment']),
+        'total_interest': round(total_interest),
+        'total_extra': round(float(schedule['extra'].sum())),
+        'total_paid': round(float(schedule['payment'].sum() + schedule['extra'].sum())),
+        'interest_saved': round(base_interest - total_interest),
+        'first_payment': round(float(schedule['payment'][0])) if len(schedule['payment']) else 0,
+        'last_payment': round(float(schedule['payment'][-1])) if len(schedule['payment']) else 0,
+    }
@@ -0,0 +1,76 @@
+"""
+Плавающая (многопериодная) ставка: ставка меняется с заданных месяцев, платеж пересчитывается
+на оставшийся срок при каждой смене.
+
+Итоги считаются сразу для всех сроков: цикл идет только по периодам ставки, а внутри периода
+остаток долга после k платежей вычисляется в замкнутой форме B * g - P * (g - 1) / r, g = (1 + r) ** k.
+"""
+from typing import Dict, Iterable, Sequence, Tuple
+import numpy as np
+
+from .amortization import annuity_payment_array
+from .schedule import RateChange
+
+# Нормализованная смена ставки: (первый месяц действия, годовая ставка в долях единицы)
+RatePeriod = Tuple[int, float]
+
+
+def normalize_rate_schedule(items: Iterable[Dict]) -> Tuple[RatePeriod, ...]:
+    """
+    Проверить и привести к кортежам смены ставки в формате API:
+    {'from_month': m, 'rate': x} или {'from_year': y, 'rate': x} — ставка x% действует
+    с месяца m (с начала года y). До первой смены действует основная ставка interest_rate.
+    """
+    normalized = {}
+    for item in items:
+        rate = float(item['rate']) / 100
+        if rate < 0 or rate > 1:
+            raise ValueError('Процентная ставка должна быть от 0 до 100')
+        if item.get('from_month') is not None:
+            month = int(item['from_month'])
+        elif item.get('from_year') is not None:
+            month = (int(item['from_year']) - 1) * 12 + 1
+        else:
+            raise ValueError('Для смены ставки необходимо указать from_month или from_year')
+        if month < 2:
+            raise ValueError('Смена ставки возможна не раньше второго месяца')
+        if month in normalized:
+            raise ValueError(f'Ставка для месяца {month} указана несколько раз')
+        normalized[month] = rate
+    return tuple(sorted(normalized.items()))
+
+
+def monthly_rate_changes(interest_rate: float, rate_schedule: Sequence[RatePeriod]) -> Tuple[RateChange, ...]:
+    """
+    Смены месячной ставки для движка графика: основная ставка с месяца 1, затем периоды rate_schedule.
+    """
+    return ((1, interest_rate / 12),) + tuple((month, rate / 12) for month, rate in rate_schedule)
+
+
+def variable_rate_totals(loan, n, rate_changes: Sequence[RateChange]) -> Dict[str, np.ndarray]:
+    """
+    Итоги кредита loan на n месяцев при смене месячной ставки rate_changes для массивов loan и n
+    (совместимых при broadcasting): первый и последний ежемесячный платеж и сумма всех платежей.
+    """
+    loan, n = np.broadcast_arrays(np.asarray(loan, dtype=float), np.asarray(n, dtype=float))
+    balance = loan.copy()
+    total = np.zeros(loan.shape)
+    first_payment = last_payment = None
+    for i, (start, r) in enumerate(rate_changes):
+        end = rate_changes[i + 1][0] - 1 if i + 1 < len(rate_changes) else np.inf
+        remaining = n - (start - 1)
+        active = remaining > 0
+        months = np.clip(np.minimum(end, n) - (start - 1), 0, None)
+        payment = np.where(active, annuity_payment_array(balance, r, np.maximum(remaining, 1)), 0.0)
+        if first_payment is None:
+            first_payment = payment
+            last_payment = payment.copy()
+        else:
+            last_payment = np.where(active, payment, last_payment)
+        if r == 0:
+            balance = balance - payment * months
+        else:
+            growth = (1 + r) ** months
+            balance = balance * growth - payment * (growth - 1) / r
+        total = total + payment * months
+    return {'first_payment': first_payment, 'last_payment': last_payment, 'total_payment': total}
@@ -0,0 +1,141 @@
+"""
+Отрисовка результатов MortgageCalculator: таблица и графики Plotly.
+
+Модуль зависит от pandas и plotly и импортируется лениво при первом вызове
+print_table / plot_graph / plot_annuity_payments, чтобы расчетное ядро
+загружалось только с NumPy.
+"""
+from typing import Optional
+import logging
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from .figures import payment_structure_figure
+from .table import MONEY_COLUMNS, TABLE_COLUMNS, format_columns, format_money, format_percent
+
+logger = logging.getLogger(__name__)
+
+
+def format_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Форматирует DataFrame для отображения: добавляет разделители тысяч (пробел), 'руб.' для денежных столбцов и проценты для переплаты.
+    """
+    for col in MONEY_COLUMNS:
+        df[col] = format_money(df[col].to_numpy())
+    df['overpayment_percentage'] = format_percent(df['overpayment_percentage'].to_numpy())
+    return df
+
+
+def print_table(calc, return_html: bool = False) -> None:
+    """
+    Отобразить результаты в виде красивой таблицы Plotly на русском языке.
+    Если return_html=True, вернуть HTML-строку для вставки в Flask.
+    """
+    if not calc.results:
+        if return_html:
+            return '<div style="color:red;">Нет данных для отображения. Сначала выполните расчет (calculate()).</div>'
+        print("Нет данных для отображения. Сначала выполните расчет (calculate()).")
+        return
+    # Столбцы форматируются прямо из массивов результатов, без промежуточного DataFrame
+    columns = format_columns(calc.results)
+    count = len(columns)
+    header = dict(
+        values=[TABLE_COLUMNS[col] for col in columns],
+        fill_color=[["#3a6073", "#3a7bd5"]*int(count/2+1)][:count],
+        font=dict(color='white', size=12, family='Arial, sans-serif'),
+        align=['center']*count,
+        height=72
+    )
+    fill_colors = ['#FFFFFF' if i % 2 == 0 else '#F4F9F4' for i in range(len(calc.results))]
+    cells = dict(
+        values=list(columns.values()),
+        fill_color=[fill_colors]*count,
+        align=['center']*count,
+        font=dict(color='#444', size=12, family='Arial, sans-serif'),
+        height=27,
+        format=[None]*count,
+        suffix=[None]*count,
+    )
+    fig = go.Figure(data=[go.Table(header=header, cells=cells)])
+    fig.update_layout(
+        title={
+            'text': 'Результаты расчета ипотеки',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': dict(size=28, family='Arial, sans-serif', color='#264653', weight='bold'),
+            'yanchor': 'top',
+        },
+        margin=dict(l=20, r=20, t=80, b=20),
+        paper_bgcolor='#FFFFFF',
+        autosize=True,
+        width=None,
+        height=None,
+    )
+    fig_html = fig.to_html(full_html=False, include_plotlyjs='cdn')
+    custom_css = '''
+    <style>
+    .js-plotly-plot .plotly table {
+        border-radius: 18px !important;
+        box-shadow: 0 4px 24px 0 rgba(60,60,60,0.10), 0 1.5px 6px 0 rgba(60,60,60,0.08);
+        overflow: hidden;
+    }
+    .js-plotly-plot .plotly table th {
+        padding: 14px 8px !important;
+    }
+    .js-plotly-plot .plotly table td {
+        padding: 12px 8px !important;
+        transition: background 0.2s;
+    }
+    .js-plotly-plot .plotly table tr:hover td {
+        background: #e0f7fa !important;
+    }
+    </style>
+    '''
+    if return_html:
+        return custom_css + fig_html
+    else:
+        from IPython.display import display, HTML
+        display(HTML(custom_css + fig_html))
+
+
+def plot_graph(calc, return_html: bool = False) -> Optional[str]:
+    """
+    Построить составную столбчатую диаграмму для каждого срока, показывающую сумму кредита, первоначальный взнос и переплату в составе общей выплаты.
+    Добавить процентные подписи для каждого компонента, аннотацию общей выплаты вверху каждого столбца,
+    а также сбоку S-образную фигурную скобку и подпись стоимости недвижимости (сумма кредита + первоначальный взнос).
+    Если return_html=True, вернуть HTML-код графика для вставки во Flask.
+    """
+    if not calc.results:
+        if return_html:
+            return '<div style="color:red;">Нет данных для построения графика. Сначала выполните расчет (calculate()).</div>'
+        print("Нет данных для построения графика. Сначала выполните расчет (calculate()).")
+        return
+    # Фигура собирается словарями; Plotly здесь только валидирует и рендерит HTML (отладочный путь)
+    data, layout = payment_structure_figure(calc.results)
+    fig = go.Figure(data=data, layout=layout)
+    if return_html:
+        html = fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return f"<div style='width:50vw;min-width:320px;max-width:100vw;margin:0 auto'>{html}</div>"
+    else:
+        fig.show()
+        return None
+
+
+def plot_annuity_payments(calc, years: int, return_html: bool = False) -> Optional[str]:
+    logger.debug('plot_annuity_payments called', extra={'fields': {
+        'years': years, 'interest_rate': calc.interest_rate, 'mode': calc.mode, 'monthly_payment': calc.monthly_payment,
+        'initial_payment': calc.initial_payment, 'min_initial_payment_percentage': calc.min_initial_payment_percentage}})
+    # Фигура собирается теми же данными, что и ответ /api/annuity_payments: с учетом режима расчета,
+    # досрочных погашений, плавающей ставки, точного графика и схемы платежей
+    data, layout = calc.plot_annuity_payments_data(years)
+    fig = go.Figure(data=data, layout=layout)
+    fig.update_layout(title=f'Структура платежа по месяцам (срок: {years} лет)', margin={'t': 60})
+    if return_html:
+        html = fig.to_html(full_html=False, include_plotlyjs='cdn')
+        logger.debug('plot_annuity_payments finished, returning HTML of length %d', len(html))
+        return f"<div style='width:100%;min-width:320px;max-width:100vw;margin:0 auto'>{html}</div>"
+    else:
+        logger.debug('plot_annuity_payments finished, showing figure')
+        fig.show()
+        return None
@@ -0,0 +1,123 @@
+"""
+Результаты расчета по срокам в колоночном виде: один массив NumPy на поле.
+
+ResultColumns ведет себя как последовательность словарей (len, индекс, итерация),
+но словари строятся только при обращении, например при отдаче JSON из API.
+Расчет, поиск оптимума и отрисовка работают с массивами напрямую.
+"""
+from typing import Dict, Iterator, List, Mapping, Optional
+import numpy as np
+
+from .amortization import annuity_payment_array, annuity_principal_array
+from .factors import factor_table
+
+# Поля результата в порядке вывода; денежные суммы округлены до рубля (int64),
+# в точном расчете (MortgageCalculator(exact=True)) — до копейки (float)
+RESULT_FIELDS = ('years', 'principal', 'initial_payment', 'property_value', 'monthly_payment',
+                 'total_payment', 'overpayment', 'overpayment_percentage', 'min_initial_payment_percentage')
+FLOAT_FIELDS = ('overpayment_percentage', 'min_initial_payment_percentage')
+
+
+class ResultColumns:
+    """
+    Колоночное представление списка результатов MortgageCalculator.results.
+    columns — массивы одинаковой длины; кроме RESULT_FIELDS могут быть дополнительные поля
+    (например, 'last_monthly_payment' при плавающей ставке).
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, columns: Mapping[str, np.ndarray]):
+        self.columns: Dict[str, np.ndarray] = dict(columns)
+
+    @classmethod
+    def empty(cls) -> 'ResultColumns':
+        return cls({field: np.empty(0, dtype=float if field in FLOAT_FIELDS else np.int64) for field in RESULT_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.columns['years'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultColumns({key: values[index] for key, values in self.columns.items()})
+        return {key: values[index].item() for key, values in self.columns.items()}
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_dicts())
+
+    def __repr__(self) -> str:
+        return f'ResultColumns(len={len(self)}, fields={list(self.columns)})'
+
+    def column(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        Список словарей в прежнем формате results: одно преобразование tolist() на столбец.
+        """
+        keys = list(self.columns)
+        return [dict(zip(keys, row)) for row in zip(*(values.tolist() for values in self.columns.values()))]
+
+    def argmin(self, field: str) -> Optional[int]:
+        if not len(self):
+            return None
+        return int(np.argmin(self.columns[field]))
+
+
+def evaluate_terms(*, mode: np.ndarray, interest_rate: np.ndarray, initial_payment: np.ndarray,
+                   value: np.ndarray, years: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Вычислить показатели ипотеки для массивов параметров одинаковой формы (или совместимых при broadcasting).
+    mode — булев массив: True для режима property_value (value — стоимость жилья),
+    False для режима monthly_payment (value — ежемесячный платеж).
+    interest_rate — годовая ставка в долях единицы.
+    Если подключена таблица коэффициентов (factors.factor_table), (1 + r) ** n берется из нее.
+    Возвращает словарь массивов без округления.
+    """
+    r = interest_rate / 12
+    n = years * 12
+    loan = value - initial_payment
+    table = factor_table()
+    if table is None:
+        payment_by_value = annuity_payment_array(loan, r, n)
+        principal_by_payment = annuity_principal_array(value, r, n)
+    else:
+        factor = table.factors(interest_rate, n)
+        payment_by_value = loan * factor
+        principal_by_payment = value / factor
+    principal = np.where(mode, loan, principal_by_payment)
+    monthly_payment = np.where(mode, payment_by_value, value)
+    property_value = np.where(mode, value, principal + initial_payment)
+    total_payment = initial_payment + monthly_payment * n
+    overpayment = total_payment - property_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overpayment_percentage = np.where(principal != 0, overpayment / principal, 0.0)
+    return {
+        'principal': principal,
+        'initial_payment': np.broadcast_to(initial_payment, principal.shape),
+        'property_value': property_value,
+        'monthly_payment': monthly_payment,
+        'total_payment': total_payment,
+        'overpayment': overpayment,
+        'overpayment_percentage': overpayment_percentage,
+    }
+
+
+def result_columns(years: np.ndarray, values: Mapping[str, np.ndarray], min_initial_payment_percentage,
+                   kopecks: bool = False) -> ResultColumns:
+    """
+    Собрать ResultColumns из неокругленных показателей (как у evaluate_terms): суммы округляются до рубля
+    (kopecks=True — до копейки), min_initial_payment_percentage — в процентах (число или массив).
+    """
+    def money(values):
+        return np.round(np.asarray(values, dtype=float), 2) if kopecks else np.rint(values).astype(np.int64)
+
+    columns = {'years': np.asarray(years, dtype=np.int64)}
+    for field in RESULT_FIELDS[1:7]:
+        columns[field] = money(values[field])
+    columns['overpayment_percentage'] = np.asarray(values['overpayment_percentage'], dtype=float)
+    columns['min_initial_payment_percentage'] = np.broadcast_to(
+        np.asarray(min_initial_payment_percentage, dtype=float), columns['years'].shape).copy()
+    for field, extra in values.items():
+        if field not in columns:
+            columns[field] = money(extra)
+    return ResultColumns(columns)
@@ -0,0 +1,128 @@
+"""
+Общий движок помесячного графика платежей с событиями: сменой ставки и досрочными погашениями.
+
+Между событиями ставка и платеж постоянны, поэтому остаток долга на каждом отрезке
+считается в замкнутой форме (B * (1 + r) ** j - P * ((1 + r) ** j - 1) / r) сразу для всех
+месяцев отрезка. Цикл идет только по событиям, а не по месяцам.
+
+Смена ставки действует с указанного месяца; платеж при этом пересчитывается на оставшийся срок.
+Досрочный взнос вносится в конце месяца после регулярного платежа; при стратегии 'reduce_payment'
+платеж пересчитывается, при 'reduce_term' сохраняется и сокращается срок.
+"""
+from typing import Dict, List, Sequence, Tuple
+import math
+import numpy as np
+
+from .amortization import annuity_payment
+
+PREPAYMENT_STRATEGIES = ('reduce_term', 'reduce_payment')
+
+# Смена ставки: (первый месяц действия, месячная ставка)
+RateChange = Tuple[int, float]
+
+_EPS = 1e-6
+
+
+def remaining_term(balance: float, payment: float, r: float) -> int:
+    """
+    Число месяцев, за которое платеж payment гасит долг balance при месячной ставке r
+    (0, если платеж не покрывает проценты).
+    """
+    if r == 0:
+        return math.ceil(balance / payment - 1e-9)
+    x = 1 - r * balance / payment
+    if x <= 0:
+        return 0
+    return math.ceil(-math.log(x) / math.log(1 + r) - 1e-9)
+
+
+def _segment(balance: float, payment: float, r: float, length: int):
+    """
+    Отрезок из length регулярных платежей с постоянным платежом в замкнутой форме.
+    Если долг гасится раньше, отрезок обрезается, а последний платеж уменьшается до остатка.
+    Возвращает (платежи, проценты, тело кредита, остаток после каждого месяца).
+    """
+    j = np.arange(length, dtype=float)
+    if r == 0:
+        opening = balance - payment * j
+    else:
+        growth = (1 + r) ** j
+        opening = balance * growth - payment * (growth - 1) / r
+    interest = opening * r
+    principal = payment - interest
+    paid_off = principal >= opening - _EPS
+    payments = np.full(length, float(payment))
+    if paid_off.any():
+        last = int(np.argmax(paid_off)) + 1
+        opening, interest, principal, payments = opening[:last], interest[:last], principal[:last], payments[:last]
+        principal[-1] = opening[-1]
+        payments[-1] = principal[-1] + interest[-1]
+    closing = opening - principal
+    return payments, interest, principal, closing
+
+
+def payment_schedule(loan: float, n: int, rate_changes: Sequence[RateChange],
+                     prepayments: Sequence[Tuple[int, float]] = (), strategy: str = 'reduce_term') -> Dict[str, np.ndarray]:
+    """
+    Помесячный график кредита loan на n месяцев.
+    rate_changes — отсортированные (месяц, месячная ставка), первая запись — с месяца 1;
+    prepayments — отсортированные (месяц, сумма) досрочных взносов.
+    Возвращает массивы 'payment', 'interest', 'principal', 'extra', 'balance' одинаковой длины
+    (фактический срок в месяцах).
+    """
+    if strategy not in PREPAYMENT_STRATEGIES:
+        raise ValueError(f'Неизвестная стратегия досрочного погашения: {strategy}')
+    r = rate_changes[0][1]
+    # События привязаны к границе «после месяца b»: смена ставки с месяца m — граница m - 1
+    boundaries: Dict[int, Dict[str, float]] = {}
+    for month, rate in rate_changes[1:]:
+        if 1 < month <= n:
+            boundaries.setdefault(month - 1, {})['rate'] = rate
+    for month, amount in prepayments:
+        if month < n:
+            boundaries.setdefault(month, {})['extra'] = amount
+
+    balance = float(loan)
+    payment = annuity_payment(balance, r, n)
+    month = 0
+    parts: List[tuple] = []
+    extras: List[Tuple[int, float]] = []
+    for boundary in sorted(boundaries):
+        event = boundaries[boundary]
+        segment = _segment(balance, payment, r, boundary - month)
+        parts.append(segment)
+        month += len(segment[0])
+        balance = float(segment[3][-1])
+        if balance <= _EPS or month < boundary:
+            balance = 0.0
+            break
+        if 'extra' in event:
+            extra = min(event['extra'], balance)
+            extras.append((month, extra))
+            balance -= extra
+            segment[3][-1] = balance
+            if balance <= _EPS:
+                break
+            if strategy == 'reduce_payment':
+                payment = annuity_payment(balance, r, n - month)
+        if 'rate' in event:
+            # При сокращении срока досрочными взносами новый платеж считается на фактический остаток срока
+            term = n - month
+            if strategy == 'reduce_term' and extras:
+                term = min(remaining_term(balance, payment, r) or term, term)
+            r = event['rate']
+            payment = annuity_payment(balance, r, term)
+    if balance > _EPS and month < n:
+        parts.append(_segment(balance, payment, r, n - month))
+
+    payments, interest, principal, closing = (np.concatenate(column) for column in zip(*parts))
+    extra = np.zeros(len(payments))
+    for extra_month, amount in extras:
+        extra[extra_month - 1] = amount
+    return {
+        'payment': payments,
+        'interest': interest,
+        'principal': principal,
+        'extra': extra,
+        'balance': np.maximum(closing, 0),
+    }
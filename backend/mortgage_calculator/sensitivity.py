@@ -0,0 +1,94 @@
+"""
+Чувствительность ипотеки к ставке и сроку: матрицы платежа, общей выплаты и переплаты
+для всей сетки «ставка × срок» (и, необязательно, первоначального взноса или платежа)
+одним вызовом results.evaluate_terms с broadcasting, без цикла по ставкам и срокам.
+
+Формулы те же, что у MortgageCalculator.calculate, поэтому ячейка матрицы совпадает
+со строкой результата /api/calculate для тех же параметров.
+"""
+from typing import Dict, Union
+import numpy as np
+
+from .results import evaluate_terms
+
+SENSITIVITY_METRICS = ('monthly_payment', 'total_payment', 'overpayment')
+# Ограничение размера сетки (ячеек), чтобы один запрос не занял процесс надолго
+MAX_CELLS = 1_000_000
+
+RangeSpec = Union[float, int, Dict]
+
+
+def grid_axis(spec: RangeSpec, name: str) -> np.ndarray:
+    """
+    Значения оси сетки: число, список чисел или диапазон {"min", "max", "step"} (границы включительно).
+    """
+    if isinstance(spec, dict):
+        lo, hi, step = float(spec['min']), float(spec['max']), float(spec.get('step', 1))
+        if step <= 0 or hi < lo:
+            raise ValueError(f'Некорректный диапазон {name}: нужно min <= max и step > 0')
+        count = int(np.floor((hi - lo) / step + 1e-9)) + 1
+        # Проверка до построения оси: слишком мелкий шаг не должен занять память процесса
+        if count > MAX_CELLS:
+            raise ValueError(f'Слишком большая сетка: не больше {MAX_CELLS} ячеек')
+        # Округление убирает накопленную ошибку шага (5.1 вместо 5.1000000000000005)
+        values = np.round(lo + step * np.arange(count), 10)
+    else:
+        values = np.atleast_1d(np.asarray(spec, dtype=float))
+    if values.ndim != 1 or not len(values):
+        raise ValueError(f'Не заданы значения {name}')
+    return values
+
+
+def sensitivity_grid(*, mode: str, rates, years, initial_payment, value) -> Dict:
+    """
+    Матрицы показателей формы (значения третьей оси, ставки, сроки).
+    rates — годовые ставки в процентах, years — сроки в годах; третья ось — первоначальный взнос
+    в режиме property_value (value — стоимость жилья) или ежемесячный платеж в режиме monthly_payment
+    (value — платеж, initial_payment — число). Суммы округлены до рубля.
+    """
+    rates = np.asarray(rates, dtype=float)
+    years = np.asarray(years, dtype=float)
+    if mode == 'property_value':
+        axis_name, axis = 'initial_payment', np.atleast_1d(np.asarray(initial_payment, dtype=float))
+        if np.ndim(value) != 0:
+            raise ValueError('В режиме property_value по сетке меняется первоначальный взнос, стоимость жилья — одно число')
+        if value <= 0:
+            raise ValueError('Стоимость жилья должна быть больше 0')
+        if (axis < 0).any() or (axis > value).any():
+            raise ValueError('Первоначальный взнос должен быть от 0 до стоимости жилья')
+    elif mode == 'monthly_payment':
+        axis_name, axis = 'monthly_payment', np.atleast_1d(np.asarray(value, dtype=float))
+        if np.ndim(initial_payment) != 0:
+            raise ValueError('В режиме monthly_payment по сетке меняется платеж, первоначальный взнос — одно число')
+        if (axis <= 0).any():
+            raise ValueError('Ежемесячный платеж должен быть больше 0')
+        if initial_payment < 0:
+            raise ValueError('Первоначальный взнос не может быть отрицательным')
+    else:
+        raise ValueError('Неизвестный режим расчета')
+    if (rates < 0).any() or (rates > 100).any():
+        raise ValueError('Процентная ставка должна быть от 0 до 100')
+    if (years < 1).any() or (years != np.floor(years)).any():
+        raise ValueError('Срок должен быть целым числом лет не меньше 1')
+    if len(axis) * len(rates) * len(years) > MAX_CELLS:
+        raise ValueError(f'Слишком большая сетка: не больше {MAX_CELLS} ячеек')
+
+    shape = (len(axis), len(rates), len(years))
+    is_value_mode = mode == 'property_value'
+    values = evaluate_terms(
+        mode=np.bool_(is_value_mode),
+        interest_rate=rates[None, :, None] / 100,
+        initial_payment=axis[:, None, None] if is_value_mode else np.float64(initial_payment),
+        value=np.float64(value) if is_value_mode else axis[:, None, None],
+        years=years[None, None, :],
+    )
+    grid = {
+        'mode': mode,
+        'rates': rates.tolist(),
+        'years': years.astype(int).tolist(),
+        'axis': axis_name,
+        'values': axis.tolist(),
+    }
+    for metric in SENSITIVITY_METRICS:
+        grid[metric] = np.broadcast_to(np.rint(values[metric]), shape).astype(np.int64).tolist()
+    return grid
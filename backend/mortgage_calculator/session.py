@@ -0,0 +1,312 @@
+"""
+Живые сессии расчета для интерфейсов с ползунками: клиент присылает только изменения параметров,
+сервер пересчитывает зависящие от них части и отправляет только изменившиеся значения.
+
+Сессия хранит текущие параметры (в формате тела запросов API), версию и последние отправленные
+клиенту результаты. Каждое изменение увеличивает версию и будит фоновый поток сессии; поток
+берет последнюю версию параметров, поэтому промежуточные изменения, пришедшие во время расчета,
+не считаются вовсе. Перед расчетом каждой части поток сверяет версии: если параметры изменились,
+оставшиеся части старого снимка не считаются, и расчет начинается заново с новыми параметрами;
+часть, устаревшая уже во время расчета, не отправляется.
+
+Части ответа и параметры, от которых они зависят:
+- 'results' (таблица по срокам, как /api/calculate): параметры калькулятора и min_years, max_years, step,
+  min_initial_payment_percentage;
+- 'annuity' (график платежей, как /api/annuity_payments): параметры калькулятора и years, mode2.
+Изменение только years или mode2 не пересчитывает результаты по срокам, и наоборот.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import queue
+import secrets
+import threading
+import time
+import numpy as np
+
+from .core import MortgageCalculator
+from .results import ResultColumns
+
+# Параметры, от которых зависит только одна из частей ответа
+RESULTS_PARAMS = frozenset({'min_years', 'max_years', 'step', 'min_initial_payment_percentage'})
+ANNUITY_PARAMS = frozenset({'years', 'mode2'})
+PARTS = ('results', 'annuity')
+
+Event = Tuple[str, Dict]
+
+
+def diff_results(previous: Optional[ResultColumns], current: ResultColumns) -> Dict:
+    """
+    Изменения результатов по срокам: при другом наборе сроков — все строки ('reset': True),
+    иначе только строки, в которых изменилось хотя бы одно поле.
+    """
+    if (previous is None or set(previous.columns) != set(current.columns)
+            or not np.array_equal(previous.column('years'), current.column('years'))):
+        return {'reset': True, 'rows': current.to_dicts()}
+    changed = np.zeros(len(current), dtype=bool)
+    for field, values in current.columns.items():
+        changed |= previous.column(field) != values
+    indices = np.flatnonzero(changed).tolist()
+    return {'reset': False, 'rows': [dict(current[i], index=i) for i in indices]}
+
+
+def diff_figure(previous: Optional[Tuple[List[Dict], Dict]], current: Tuple[List[Dict], Dict]) -> Dict:
+    """
+    Изменения графика (traces, layout) в формате Plotly: при другой оси y, подписях или оформлении —
+    график целиком ('reset': True), иначе по каждому следу только изменившиеся точки x и подписи text.
+    """
+    traces, layout = current
+    if previous is None or previous[1] != layout or len(previous[0]) != len(traces):
+        return {'reset': True, 'data': traces, 'layout': layout}
+    changes = []
+    for number, (old, new) in enumerate(zip(previous[0], traces)):
+        if {k: v for k, v in old.items() if k not in ('x', 'text')} != {k: v for k, v in new.items() if k not in ('x', 'text')}:
+            return {'reset': True, 'data': traces, 'layout': layout}
+        indices = [i for i, (a, b, s, t) in enumerate(zip(old['x'], new['x'], old['text'], new['text'])) if a != b or s != t]
+        if indices:
+            changes.append({'trace': number, 'index': indices,
+                            'x': [new['x'][i] for i in indices], 'text': [new['text'][i] for i in indices]})
+    return {'reset': False, 'traces': changes}
+
+
+class LiveSession:
+    """
+    Состояние одной сессии: параметры, версия, последние отправленные результаты и очередь событий для клиента.
+    build — функция, строящая MortgageCalculator из параметров (ошибка означает недопустимые параметры).
+    """
+    def __init__(self, session_id: str, params: Dict, build: Callable[[Dict], MortgageCalculator]):
+        self.id = session_id
+        self.build = build
+        self.params: Dict = {}
+        self.version = 0
+        self.touched = time.monotonic()
+        self.closed = False
+        self.events: 'queue.Queue[Event]' = queue.Queue()
+        # Версия параметров, от которых зависит каждая часть; части, ждущие пересчета;
+        # последние отправленные значения для расчета разницы
+        self._versions = dict.fromkeys(PARTS, 0)
+        self._dirty = set()
+        self._sent: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.update(params)
+
+    def update(self, delta: Dict) -> int:
+        """
+        Применить изменения параметров и запустить пересчет зависящих от них частей.
+        Параметры проверяются сразу: при ошибке ValueError состояние сессии не меняется. Возвращает новую версию.
+        """
+        with self._lock:
+            params = dict(self.params, **delta)
+            self.build(params)
+            changed = {key for key in params if params.get(key) != self.params.get(key)}
+            self.params = params
+            self.touched = time.monotonic()
+            if not changed:
+                return self.version
+            if changed <= RESULTS_PARAMS:
+                parts = ('results',)
+            elif changed <= ANNUITY_PARAMS:
+                parts = ('annuity',)
+            else:
+                parts = PARTS
+            self._invalidate(parts)
+            return self.version
+
+    def resync(self) -> int:
+        """
+        Отправить клиенту все части целиком (новое подключение к потоку событий):
+        недоставленные события отбрасываются, идущий расчет считается устаревшим.
+        """
+        with self._lock:
+            while not self.events.empty():
+                self.events.get_nowait()
+            self._sent.clear()
+            self.touched = time.monotonic()
+            self._invalidate(PARTS)
+            return self.version
+
+    def _invalidate(self, parts: Tuple[str, ...]):
+        # Вызывается под self._lock
+        self.version += 1
+        for part in parts:
+            self._versions[part] = self.version
+        self._dirty.update(parts)
+        if self._worker is None and not self.closed:
+            self._worker = threading.Thread(target=self._run, name=f'session-{self.id[:8]}', daemon=True)
+            self._worker.start()
+
+    def _snapshot(self) -> Optional[Tuple[Dict, Dict[str, int]]]:
+        """
+        Последние параметры и версии частей, ждущих пересчета, или None, если пересчитывать нечего.
+        """
+        with self._lock:
+            if not self._dirty or self.closed:
+                self._worker = None
+                return None
+            versions = {part: self._versions[part] for part in PARTS if part in self._dirty}
+            self._dirty.clear()
+            return dict(self.params), versions
+
+    def _publish(self, part: str, version: int, value) -> None:
+        """
+        Отправить разницу части part с прошлой отправкой, если ее параметры не изменились за время расчета
+        (иначе часть уже ждет пересчета с новыми параметрами).
+        """
+        with self._lock:
+            if self._versions[part] != version:
+                return
+            previous = self._sent.get(part)
+            diff = diff_results(previous, value) if part == 'results' else diff_figure(previous, value)
+            self._sent[part] = value
+            self.events.put((part, dict(diff, version=version)))
+
+    def _restart_if_stale(self, pending: Dict[str, int]) -> bool:
+        """
+        Вернуть True, если параметры изменились после снимка: части pending снова ждут пересчета
+        (с последними параметрами), а текущий проход прерывается.
+        """
+        with self._lock:
+            if all(self._versions[part] == version for part, version in pending.items()):
+                return False
+            self._dirty.update(pending)
+            return True
+
+    def _finish(self, event: str, payload: Dict) -> None:
+        # 'done' и 'error' отправляются, только если за время расчета не пришло новых изменений
+        with self._lock:
+            if not self._dirty:
+                self.events.put((event, dict(payload, version=self.version)))
+
+    def _run(self):
+        while True:
+            snapshot = self._snapshot()
+            if snapshot is None:
+                return
+            params, versions = snapshot
+            try:
+                calc = self.build(params)
+                pending = dict(versions)
+                for part, version in versions.items():
+                    if self._restart_if_stale(pending):
+                        break
+                    self._publish(part, version, self._compute(part, calc, params))
+                    del pending[part]
+                else:
+                    self._finish('done', {})
+            except Exception as e:
+                self._finish('error', {'error': str(e)})
+
+    @staticmethod
+    def _compute(part: str, calc: MortgageCalculator, params: Dict):
+        if part == 'results':
+            step = int(params['step']) if params.get('step') else None
+            calc.calculate(int(params.get('min_years', 1)), int(params.get('max_years', 30)), step)
+            return calc.results
+        years = int(round(float(params.get('years', 30))))
+        return calc.plot_annuity_payments_data(years, params.get('mode2', 'months'))
+
+    def stream(self, heartbeat: float = 15.0) -> Iterator[Optional[Event]]:
+        """
+        События для клиента по мере появления; None — нет событий за heartbeat секунд (для keep-alive).
+        Заканчивается после закрытия сессии.
+        """
+        while True:
+            try:
+                event = self.events.get(timeout=heartbeat)
+            except queue.Empty:
+                if self.closed:
+                    return
+                event = None
+            self.touched = time.monotonic()
+            yield event
+            if event is not None and event[0] == 'closed':
+                return
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._dirty.clear()
+        self.events.put(('closed', {}))
+
+
+class SessionStore:
+    """
+    Сессии процесса по идентификатору. Сессии без активности дольше ttl секунд закрываются
+    при обращении к хранилищу (create, get, len) и фоновым потоком, который запускается с первой сессией
+    и проверяет их не реже раза в минуту; при превышении max_sessions закрываются самые давние.
+    Каждый открытый поток событий занимает поток сервера, поэтому одновременно открыто не больше
+    max_streams потоков (None — без ограничения): open_stream() занимает место, release_stream() освобождает.
+    """
+    def __init__(self, build: Callable[[Dict], MortgageCalculator], ttl: float = 600.0, max_sessions: int = 1000,
+                 max_streams: Optional[int] = None):
+        self.build = build
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_streams = max_streams
+        self.streams = 0
+        self._sessions: Dict[str, LiveSession] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def create(self, params: Dict) -> LiveSession:
+        session = LiveSession(secrets.token_urlsafe(16), params, self.build)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name='session-reaper', daemon=True)
+                self._reaper.start()
+            excess = len(self._sessions) - self.max_sessions
+            if excess > 0:
+                for stale in sorted(self._sessions.values(), key=lambda s: s.touched)[:excess]:
+                    self._drop(stale)
+        return session
+
+    def get(self, session_id: str) -> LiveSession:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+        if session is None or session.closed:
+            raise KeyError(session_id)
+        return session
+
+    def close(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._drop(session)
+
+    def open_stream(self) -> bool:
+        """
+        Занять место для потока событий; False, если открыто уже max_streams потоков.
+        """
+        with self._lock:
+            if self.max_streams is not None and self.streams >= self.max_streams:
+                return False
+            self.streams += 1
+            return True
+
+    def release_stream(self) -> None:
+        with self._lock:
+            self.streams -= 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._sessions)
+
+    def _reap(self):
+        interval = min(self.ttl / 2, 60.0)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                self._expire()
+
+    def _expire(self):
+        # Вызывается под self._lock
+        deadline = time.monotonic() - self.ttl
+        for session in [s for s in self._sessions.values() if s.touched < deadline]:
+            self._drop(session)
+
+    def _drop(self, session: LiveSession):
+        session.close()
+        self._sessions.pop(session.id, None)
@@ -0,0 +1,180 @@
+"""
+Стресс-тест плавающей ставки методом Монте-Карло.
+
+Ставка моделируется случайным процессом с фиксированным seed и пересматривается каждые
+reset_months месяцев; при каждом пересмотре платеж пересчитывается на оставшийся срок.
+Все траектории × месяцы считаются одним вычислением над матрицами NumPy: при пересчете
+платежа каждый месяц остаток долга умножается на множитель
+((1 + r) ** m - (1 + r)) / ((1 + r) ** m - 1), где m — оставшийся срок, поэтому весь график
+по траектории — это накопленное произведение (cumprod) по месяцам. При постоянной ставке
+внутри периода пересмотра это совпадает с обычным аннуитетом.
+
+Траектории считаются блоками под ограничение памяти, а блоки при необходимости
+распределяются по пулу процессов. Случайные числа порождаются отдельно для каждой группы
+из BLOCK_PATHS траекторий, поэтому результат не зависит от размера блоков и числа процессов.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import math
+import numpy as np
+
+from .amortization import annuity_payment
+
+RATE_MODELS = ('vasicek', 'lognormal')
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+BLOCK_PATHS = 256
+DEFAULT_MEMORY_CAP = 64 * 2 ** 20
+MAX_PATHS = 100_000
+# Оценка числа одновременно живущих матриц float64 (траектории × месяцы) при расчете блока
+_MATRICES_PER_BLOCK = 8
+
+
+def simulate_rates(normals: np.ndarray, r0: float, *, model: str = 'vasicek', volatility: float = 0.01,
+                   mean_reversion: float = 0.2, long_term_rate: Optional[float] = None,
+                   reset_months: int = 12) -> np.ndarray:
+    """
+    Годовые ставки по периодам пересмотра для каждой траектории (форма траектории × периоды).
+    normals — стандартные нормальные величины формы (траектории, периоды - 1); первый период идет по ставке r0.
+    'vasicek' — ставка возвращается к long_term_rate со скоростью mean_reversion, volatility — в долях ставки за год;
+    'lognormal' — ставка умножается на логнормальный шум без сноса, volatility — относительная за год.
+    """
+    dt = reset_months / 12
+    paths, steps = normals.shape
+    rates = np.empty((paths, steps + 1))
+    rates[:, 0] = r0
+    if model == 'vasicek':
+        theta = r0 if long_term_rate is None else long_term_rate
+        phi = math.exp(-mean_reversion * dt)
+        scale = volatility * (math.sqrt((1 - phi ** 2) / (2 * mean_reversion)) if mean_reversion > 0 else math.sqrt(dt))
+        x = rates[:, 0].copy()
+        for t in range(steps):
+            x = theta + (x - theta) * phi + scale * normals[:, t]
+            rates[:, t + 1] = x
+    elif model == 'lognormal':
+        increments = volatility * math.sqrt(dt) * normals - volatility ** 2 * dt / 2
+        rates[:, 1:] = r0 * np.exp(np.cumsum(increments, axis=1))
+    else:
+        raise ValueError(f'Неизвестная модель ставки: {model}')
+    return rates
+
+
+def evaluate_paths(loan: float, n: int, annual_rates: np.ndarray, reset_months: int = 12) -> Dict[str, np.ndarray]:
+    """
+    Платежи по всем траекториям сразу. annual_rates — ставки по периодам пересмотра (траектории × периоды).
+    Возвращает по траектории: общую сумму и максимум платежей, среднюю ставку
+    и платеж каждого периода пересмотра ('payments', float32).
+    """
+    r = np.repeat(annual_rates / 12, reset_months, axis=1)[:, :n]
+    m = n - np.arange(n, dtype=float)
+    growth = (1 + r) ** m
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment_factor = np.where(r == 0, 1 / m, r * growth / (growth - 1))
+        balance_factor = np.where(r == 0, (m - 1) / m, (growth - (1 + r)) / (growth - 1))
+    opening = np.empty_like(r)
+    opening[:, 0] = loan
+    np.cumprod(balance_factor[:, :-1], axis=1, out=opening[:, 1:])
+    opening[:, 1:] *= loan
+    payments = opening * payment_factor
+    return {
+        'total_payment': payments.sum(axis=1),
+        'max_payment': payments.max(axis=1),
+        'average_rate': r.mean(axis=1) * 12,
+        'payments': payments[:, ::reset_months].astype(np.float32),
+    }
+
+
+def sorted_quantiles(values: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """
+    Квантили по первой оси (линейная интерполяция, как np.quantile по умолчанию).
+    Одна сортировка вместо частичной сортировки на каждый квантиль заметно быстрее для полос платежей.
+    """
+    ordered = np.sort(values, axis=0)
+    position = np.asarray(quantiles, dtype=float) * (len(ordered) - 1)
+    lo = np.floor(position).astype(np.int64)
+    hi = np.minimum(lo + 1, len(ordered) - 1)
+    frac = (position - lo).reshape((-1,) + (1,) * (ordered.ndim - 1))
+    return ordered[lo] * (1 - frac) + ordered[hi] * frac
+
+
+def _simulate_chunk(task) -> Dict[str, np.ndarray]:
+    """
+    Смоделировать и оценить блок траекторий; task — (loan, n, r0, параметры модели, список SeedSequence групп).
+    Функция верхнего уровня, чтобы ее можно было передать в пул процессов.
+    """
+    loan, n, r0, params, seeds = task
+    reset_months = params['reset_months']
+    steps = math.ceil(n / reset_months) - 1
+    normals = np.vstack([np.random.default_rng(seq).standard_normal((size, steps), dtype=np.float32) for seq, size in seeds])
+    rates = simulate_rates(normals, r0, **{key: params[key] for key in
+                                           ('model', 'volatility', 'mean_reversion', 'long_term_rate', 'reset_months')})
+    rates = np.clip(rates, params['floor'], params['cap'] if params['cap'] is not None else None)
+    return evaluate_paths(loan, n, rates, reset_months)
+
+
+def stress_test(loan: float, interest_rate: float, n: int, *, paths: int = 10_000, seed: int = 0,
+                model: str = 'vasicek', volatility: float = 0.01, mean_reversion: float = 0.2,
+                long_term_rate: Optional[float] = None, reset_months: int = 12, floor: float = 0.0,
+                cap: Optional[float] = None, quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                memory_cap: int = DEFAULT_MEMORY_CAP, workers: int = 1) -> Dict:
+    """
+    Распределение платежей и переплаты по кредиту loan на n месяцев при случайной траектории ставки.
+    interest_rate, long_term_rate, volatility, floor и cap — годовые величины в долях единицы.
+    Траектории делятся на блоки так, чтобы расчет блока укладывался в memory_cap байт;
+    при workers > 1 блоки считаются в пуле процессов.
+    Возвращает квантили итогов по траекториям, полосы квантилей платежа по периодам пересмотра
+    и базовый сценарий с неизменной ставкой.
+    """
+    if model not in RATE_MODELS:
+        raise ValueError(f'Неизвестная модель ставки: {model}')
+    if not 1 <= paths <= MAX_PATHS:
+        raise ValueError(f'Число траекторий должно быть от 1 до {MAX_PATHS}')
+    if n <= 0:
+        raise ValueError('Срок должен быть больше 0')
+    if reset_months <= 0:
+        raise ValueError('Период пересмотра ставки должен быть больше 0')
+    if volatility < 0 or mean_reversion < 0:
+        raise ValueError('Волатильность и скорость возврата к среднему не могут быть отрицательными')
+    if cap is not None and cap < floor:
+        raise ValueError('Максимальная ставка не может быть меньше минимальной')
+    quantiles = [float(q) for q in quantiles]
+    if not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError('Квантили должны быть от 0 до 1')
+
+    params = {'model': model, 'volatility': volatility, 'mean_reversion': mean_reversion, 'long_term_rate': long_term_rate,
+              'reset_months': reset_months, 'floor': floor, 'cap': cap}
+    groups = [min(BLOCK_PATHS, paths - start) for start in range(0, paths, BLOCK_PATHS)]
+    seeds = list(zip(np.random.SeedSequence(seed).spawn(len(groups)), groups))
+    groups_per_chunk = max(1, memory_cap // (_MATRICES_PER_BLOCK * 8 * n * BLOCK_PATHS))
+    tasks = [(loan, n, interest_rate, params, seeds[i:i + groups_per_chunk]) for i in range(0, len(seeds), groups_per_chunk)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts: List[Dict] = list(pool.map(_simulate_chunk, tasks))
+    else:
+        parts = [_simulate_chunk(task) for task in tasks]
+    result = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    def summary(values: np.ndarray, scale: float = 1.0, digits: Optional[int] = None) -> Dict:
+        q = sorted_quantiles(values, quantiles) * scale
+        mean = float(values.mean()) * scale
+        if digits is None:
+            return {'mean': round(mean), 'quantiles': [round(x) for x in q.tolist()]}
+        return {'mean': round(mean, digits), 'quantiles': [round(x, digits) for x in q.tolist()]}
+
+    base_payment = annuity_payment(loan, interest_rate / 12, n)
+    bands = sorted_quantiles(result['payments'].astype(np.float64), quantiles)
+    return {
+        'paths': paths,
+        'months': n,
+        'seed': seed,
+        'model': model,
+        'quantile_levels': quantiles,
+        'baseline': {'monthly_payment': round(base_payment), 'overpayment': round(base_payment * n - loan)},
+        'max_monthly_payment': summary(result['max_payment']),
+        'total_payment': summary(result['total_payment']),
+        'overpayment': summary(result['total_payment'] - loan),
+        'average_rate': summary(result['average_rate'], 100, 3),
+        'payment_bands': {
+            'month': list(range(1, n + 1, reset_months)),
+            'quantiles': np.rint(bands).astype(np.int64).tolist(),
+        },
+    }
@@ -0,0 +1,109 @@
+"""
+Объединение одинаковых одновременных вычислений (single-flight).
+
+Первый запрос с данным ключом (ведущий) выполняет вычисление в своем потоке; запросы с тем же
+ключом, пришедшие до его окончания, не считают заново, а ждут и получают тот же результат
+или ошибку (FlightError, исходное исключение — в __cause__). После окончания ключ освобождается: следующие запросы обслуживает
+кэш результатов или новое вычисление. Ожидание ограничено timeout секунд.
+"""
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+
+
+class FlightTimeout(TimeoutError):
+    """
+    Ведомый запрос не дождался результата вычисления за отведенное время.
+    """
+
+
+class FlightError(Exception):
+    """
+    Ошибка вычисления, которого ждал ведомый запрос: текст — как у исходного исключения (оно в __cause__).
+    Каждый ведомый запрос получает свой экземпляр, поэтому трассировки разных потоков не смешиваются.
+    """
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Потокобезопасное объединение вычислений по ключу со счетчиками: leaders — выполненные вычисления,
+    shared — запросы, получившие чужой результат, shared_errors — получившие чужую ошибку,
+    timeouts — не дождавшиеся, errors — вычисления с ошибкой.
+    timeout=None — ждать без ограничения.
+    """
+    def __init__(self, timeout: Optional[float] = 25.0):
+        if timeout is not None and timeout <= 0:
+            raise ValueError('Время ожидания должно быть больше 0')
+        self.timeout = timeout
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        self.shared_errors = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Результат compute() для ключа key и признак того, что он получен от другого запроса.
+        Ошибка ведущего вычисления поднимается в каждом ожидавшем запросе как отдельный FlightError;
+        при превышении timeout ведомый запрос получает FlightTimeout, а вычисление продолжается.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                flight.waiters += 1
+        if leader:
+            return self._lead(key, flight, compute), False
+        if not flight.done.wait(self.timeout):
+            with self._lock:
+                flight.waiters -= 1
+                self.timeouts += 1
+            raise FlightTimeout(f'Не дождались результата одинакового запроса за {self.timeout:g} с')
+        if flight.error is not None:
+            with self._lock:
+                self.shared_errors += 1
+            raise FlightError(str(flight.error)) from flight.error
+        with self._lock:
+            self.shared += 1
+        return flight.value, True
+
+    def _lead(self, key: Hashable, flight: _Flight, compute: Callable[[], Any]) -> Any:
+        try:
+            flight.value = compute()
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'waiting': sum(flight.waiters for flight in self._flights.values()),
+                'timeout': self.timeout,
+                'leaders': self.leaders,
+                'shared': self.shared,
+                'shared_errors': self.shared_errors,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+            }
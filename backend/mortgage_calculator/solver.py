@@ -0,0 +1,232 @@
+"""
+Подбор параметров ипотеки под ограничения без перебора всех сроков.
+
+Каждая функция принимает массивы запросов (или числа) и решает их все сразу:
+монотонные задачи решаются векторной бисекцией по формуле аннуитета
+(O(log n) вычислений на запрос), остальные — в замкнутой форме.
+Недостижимые запросы не отбрасываются: они помечаются feasible=False
+с описанием нарушенного ограничения.
+"""
+from typing import Dict, List, Sequence
+import numpy as np
+
+from .amortization import annuity_payment_array, annuity_principal_array
+
+MAX_TERM_MONTHS = 600
+MAX_RATE = 1.0
+SOLVER_GOALS = ('min_term', 'max_property_value', 'rate_for_overpayment')
+
+
+def _as_arrays(*values):
+    return np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in values))
+
+
+def min_term_for_payment(loan, interest_rate, max_payment, term_step: int = 12,
+                         max_months: int = MAX_TERM_MONTHS) -> Dict[str, np.ndarray]:
+    """
+    Кратчайший срок (кратный term_step месяцев), при котором аннуитетный платеж по кредиту loan
+    не превышает max_payment. interest_rate — годовая ставка в долях единицы.
+    Возвращает {'months', 'payment', 'feasible'}; для недостижимых запросов months = 0.
+    """
+    loan, r, max_payment = _as_arrays(loan, interest_rate, max_payment)
+    r = r / 12
+    max_steps = max_months // term_step
+    feasible = annuity_payment_array(loan, r, max_steps * term_step) <= max_payment
+    lo = np.ones(loan.shape, dtype=np.int64)
+    hi = np.full(loan.shape, max_steps, dtype=np.int64)
+    # Платеж убывает с ростом срока, поэтому ищем первый подходящий шаг бисекцией
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        ok = annuity_payment_array(loan, r, mid * term_step) <= max_payment
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid + 1)
+    months = np.where(feasible, lo * term_step, 0)
+    payment = np.where(feasible, annuity_payment_array(loan, r, np.maximum(months, 1)), np.nan)
+    return {'months': months, 'payment': payment, 'feasible': feasible}
+
+
+def max_property_value(max_payment, initial_payment, interest_rate, months,
+                       min_initial_payment_percentage) -> Dict[str, np.ndarray]:
+    """
+    Максимальная стоимость жилья при ежемесячном бюджете max_payment, сроке months,
+    имеющемся первоначальном взносе и минимальной доле взноса (в долях единицы).
+    Стоимость ограничена и платежом (взнос + доступный кредит), и долей взноса (взнос / доля);
+    в 'binding' указывается, какое ограничение оказалось решающим.
+    """
+    max_payment, initial_payment, r, months, min_share = _as_arrays(
+        max_payment, initial_payment, interest_rate, months, min_initial_payment_percentage)
+    by_payment = initial_payment + annuity_principal_array(max_payment, r / 12, months)
+    with np.errstate(divide='ignore'):
+        by_share = np.where(min_share > 0, initial_payment / min_share, np.inf)
+    value = np.minimum(by_payment, by_share)
+    return {
+        'property_value': value,
+        'principal': value - initial_payment,
+        'binding': np.where(by_share < by_payment, 'initial_payment', 'monthly_payment'),
+        'feasible': value > 0,
+    }
+
+
+def rate_for_overpayment(loan, months, target_overpayment, tol: float = 1e-10,
+                         max_rate: float = MAX_RATE, max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Годовая ставка (в долях единицы), при которой переплата по кредиту loan на срок months
+    равна target_overpayment. Переплата растет со ставкой, поэтому используется бисекция
+    на отрезке [0, max_rate]. Недостижимые цели (отрицательные или больше переплаты при max_rate)
+    помечаются feasible=False.
+    """
+    loan, months, target = _as_arrays(loan, months, target_overpayment)
+
+    def overpayment(annual_rate):
+        return annuity_payment_array(loan, annual_rate / 12, months) * months - loan
+
+    lo = np.zeros(loan.shape)
+    hi = np.full(loan.shape, max_rate)
+    feasible = (target >= 0) & (overpayment(hi) >= target)
+    for _ in range(max_iter):
+        mid = (lo + hi) / 2
+        above = overpayment(mid) > target
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+        if np.all(hi - lo <= tol):
+            break
+    rate = (lo + hi) / 2
+    return {'interest_rate': np.where(feasible, rate, np.nan), 'feasible': feasible}
+
+
+def describe_violations(goal: str, result: Dict[str, np.ndarray], index: int) -> List[str]:
+    """
+    Сообщения о нарушенных ограничениях для запроса index в результате решателя goal.
+    """
+    if bool(result['feasible'][index]):
+        return []
+    if goal == 'min_term':
+        return ['Платеж превышает заданный даже при максимальном сроке']
+    if goal == 'max_property_value':
+        return ['Бюджета и первоначального взноса недостаточно для покупки']
+    if goal == 'rate_for_overpayment':
+        return ['Заданная переплата недостижима при ставке от 0 до 100%']
+    return []
+
+
+def _term_months(query: Dict) -> int:
+    months = int(query['months']) if query.get('months') is not None else int(query['years']) * 12
+    if months <= 0 or months > MAX_TERM_MONTHS:
+        raise ValueError(f'Срок должен быть от 1 до {MAX_TERM_MONTHS} месяцев')
+    return months
+
+
+def _interest_rate(query: Dict) -> float:
+    rate = float(query['interest_rate']) / 100
+    if not 0 <= rate <= MAX_RATE:
+        raise ValueError('Процентная ставка должна быть от 0 до 100')
+    return rate
+
+
+def _share_violation(initial_payment: float, property_value: float, min_share: float) -> List[str]:
+    if property_value > 0 and initial_payment < min_share * property_value:
+        return [f'Первоначальный взнос меньше минимального ({min_share:.0%} от стоимости жилья)']
+    return []
+
+
+def solve(queries: Sequence[Dict]) -> List[Dict]:
+    """
+    Решить набор запросов в формате API (ставки и доли — в процентах).
+    Запросы группируются по цели (goal), и каждая группа решается одним векторным вызовом:
+      - 'min_term': property_value, initial_payment, interest_rate, max_payment[, term_step='year'|'month'];
+      - 'max_property_value': monthly_payment, initial_payment, interest_rate, years|months,
+        min_initial_payment_percentage;
+      - 'rate_for_overpayment': property_value, initial_payment, years|months, overpayment.
+    Возвращает по словарю на запрос: найденные значения, 'feasible' и список 'violations',
+    либо {'error': ...} для некорректного запроса. feasible=False при любом нарушенном ограничении,
+    в том числе по доле первоначального взноса; найденный срок или ставка при этом все равно возвращаются.
+    """
+    answers: List[Dict] = [{} for _ in queries]
+    groups: Dict[str, List[tuple]] = {goal: [] for goal in SOLVER_GOALS}
+    for i, query in enumerate(queries):
+        try:
+            goal = query.get('goal')
+            if goal not in SOLVER_GOALS:
+                raise ValueError(f'Неизвестная цель подбора: {goal}')
+            min_share = float(query.get('min_initial_payment_percentage', 0)) / 100
+            if not 0 <= min_share <= 1:
+                raise ValueError('Минимальный первоначальный взнос должен быть от 0 до 100%')
+            initial_payment = float(query['initial_payment'])
+            if initial_payment < 0:
+                raise ValueError('Первоначальный взнос не может быть отрицательным')
+            if goal == 'min_term':
+                property_value = float(query['property_value'])
+                if property_value <= initial_payment:
+                    raise ValueError('Стоимость жилья должна превышать первоначальный взнос')
+                max_payment = float(query['max_payment'])
+                if max_payment <= 0:
+                    raise ValueError('Максимальный платеж должен быть больше 0')
+                row = (property_value - initial_payment, _interest_rate(query), max_payment,
+                       12 if query.get('term_step', 'year') == 'year' else 1, initial_payment, property_value, min_share)
+            elif goal == 'max_property_value':
+                monthly_payment = float(query['monthly_payment'])
+                if monthly_payment <= 0:
+                    raise ValueError('Ежемесячный платеж должен быть больше 0')
+                row = (monthly_payment, initial_payment, _interest_rate(query), _term_months(query), min_share)
+            else:
+                property_value = float(query['property_value'])
+                if property_value <= initial_payment:
+                    raise ValueError('Стоимость жилья должна превышать первоначальный взнос')
+                row = (property_value - initial_payment, _term_months(query), float(query['overpayment']),
+                       initial_payment, property_value, min_share)
+            groups[goal].append((i, row))
+        except Exception as e:
+            answers[i] = {'error': str(e)}
+
+    for goal, items in groups.items():
+        if not items:
+            continue
+        index = [i for i, _ in items]
+        columns = list(zip(*(row for _, row in items)))
+        if goal == 'min_term':
+            loan, rate, max_payment, step, initial_payment, property_value, min_share = columns
+            # Шаг поиска может отличаться у запросов, поэтому группы с разным шагом решаются отдельно
+            result = {'months': np.zeros(len(items), dtype=np.int64), 'payment': np.full(len(items), np.nan),
+                      'feasible': np.zeros(len(items), dtype=bool)}
+            for term_step in set(step):
+                mask = np.array(step) == term_step
+                part = min_term_for_payment(np.array(loan)[mask], np.array(rate)[mask], np.array(max_payment)[mask], term_step)
+                for key in result:
+                    result[key][mask] = part[key]
+            for k, i in enumerate(index):
+                # Срок найден, если выполнено ограничение по платежу; запрос выполним, если выполнены все ограничения
+                found = bool(result['feasible'][k])
+                violations = describe_violations(goal, result, k) + _share_violation(initial_payment[k], property_value[k], min_share[k])
+                answers[i] = {
+                    'goal': goal,
+                    'months': int(result['months'][k]) if found else None,
+                    'years': int(result['months'][k]) / 12 if found else None,
+                    'monthly_payment': round(float(result['payment'][k])) if found else None,
+                    'feasible': not violations,
+                    'violations': violations,
+                }
+        elif goal == 'max_property_value':
+            max_payment, initial_payment, rate, months, min_share = columns
+            result = max_property_value(max_payment, initial_payment, rate, months, min_share)
+            for k, i in enumerate(index):
+                answers[i] = {
+                    'goal': goal,
+                    'property_value': round(float(result['property_value'][k])),
+                    'principal': round(float(result['principal'][k])),
+                    'binding': str(result['binding'][k]),
+                    'feasible': bool(result['feasible'][k]),
+                    'violations': describe_violations(goal, result, k),
+                }
+        else:
+            loan, months, target, initial_payment, property_value, min_share = columns
+            result = rate_for_overpayment(loan, months, target)
+            for k, i in enumerate(index):
+                found = bool(result['feasible'][k])
+                violations = describe_violations(goal, result, k) + _share_violation(initial_payment[k], property_value[k], min_share[k])
+                answers[i] = {
+                    'goal': goal,
+                    'interest_rate': float(result['interest_rate'][k]) * 100 if found else None,
+                    'feasible': not violations,
+                    'violations': violations,
+                }
+    return answers
@@ -0,0 +1,85 @@
+"""
+Отчет о времени импорта и проверка бюджета холодного старта.
+
+Импорт выполняется в отдельном процессе с `python -X importtime`, поэтому
+результат не зависит от уже загруженных в текущем процессе модулей.
+
+Пример:
+    python -m mortgage_calculator.startup --budget-ms 150
+    python -m mortgage_calculator.startup --module app --top 15
+"""
+from typing import List, Optional, Tuple
+import argparse
+import subprocess
+import sys
+
+# Модули, которые не должны загружаться при импорте расчетного ядра
+HEAVY_MODULES = ('pandas', 'plotly')
+
+
+def measure_import(module: str = 'mortgage_calculator', python: str = sys.executable) -> List[Tuple[str, int, int]]:
+    """
+    Импортировать module в новом интерпретаторе и вернуть строки отчета `-X importtime`
+    в виде (имя модуля, глубина вложенности, накопленное время в микросекундах).
+    """
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'Не удалось импортировать {module}: {proc.stderr.strip()}')
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line[len('import time:'):].split('|') if line.startswith('import time:') else []
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(parts[1])))
+    return rows
+
+
+def import_report(module: str = 'mortgage_calculator', top: int = 10) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Вернуть (общее время импорта module в мс, самые дорогие прямые зависимости в мс,
+    загруженные тяжелые модули).
+    """
+    rows = measure_import(module)
+    total_ms = 0.0
+    children: List[Tuple[str, float]] = []
+    pending: List[Tuple[str, float]] = []
+    for name, depth, cumulative in rows:
+        if depth == 1:
+            pending.append((name, cumulative / 1000))
+        elif depth == 0:
+            if name == module:
+                total_ms = cumulative / 1000
+                children = pending
+            pending = []
+    slowest = sorted(children, key=lambda x: x[1], reverse=True)[:top]
+    loaded = {name.split('.')[0] for name, _, _ in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    return total_ms, slowest, heavy
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Время импорта модуля и проверка бюджета старта')
+    parser.add_argument('--module', default='mortgage_calculator', help='импортируемый модуль')
+    parser.add_argument('--budget-ms', type=float, default=None, help='допустимое время импорта, мс')
+    parser.add_argument('--top', type=int, default=10, help='сколько самых медленных модулей показать')
+    args = parser.parse_args(argv)
+
+    total_ms, slowest, heavy = import_report(args.module, args.top)
+    print(f'import {args.module}: {total_ms:.1f} мс')
+    for name, ms in slowest:
+        print(f'  {ms:8.1f} мс  {name}')
+    if heavy:
+        print(f'Загружены тяжелые модули: {", ".join(heavy)}')
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f'Превышен бюджет старта: {total_ms:.1f} мс > {args.budget_ms:.1f} мс')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
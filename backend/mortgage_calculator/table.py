@@ -0,0 +1,102 @@
+"""
+Быстрое форматирование таблицы результатов без pandas и Plotly.
+
+Денежные столбцы форматируются целиком: числа округляются в NumPy, а замена
+разделителя тысяч и добавление 'руб.' выполняются одной строковой операцией
+на столбец, а не лямбдой на каждую ячейку.
+"""
+from html import escape
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .results import ResultColumns
+
+TABLE_COLUMNS = {
+    'years': 'Срок (лет)',
+    'principal': 'Сумма кредита',
+    'initial_payment': 'Первоначальный взнос',
+    'property_value': 'Стоимость недвижимости',
+    'monthly_payment': 'Ежемесячный платеж',
+    'total_payment': 'Общая выплата',
+    'overpayment': 'Переплата',
+    'overpayment_percentage': 'Процент переплаты',
+}
+MONEY_COLUMNS = ('principal', 'initial_payment', 'property_value', 'monthly_payment', 'total_payment', 'overpayment')
+
+HEADER_COLORS = ('#3a6073', '#3a7bd5')
+ROW_COLORS = ('#FFFFFF', '#F4F9F4')
+
+TABLE_CSS = '''
+<style>
+.mortgage-table { border-collapse: separate; border-spacing: 0; border-radius: 18px; overflow: hidden;
+    box-shadow: 0 4px 24px 0 rgba(60,60,60,0.10), 0 1.5px 6px 0 rgba(60,60,60,0.08);
+    font-family: Arial, sans-serif; font-size: 12px; margin: 0 auto; }
+.mortgage-table caption { font-size: 28px; font-weight: bold; color: #264653; padding: 16px; }
+.mortgage-table th { color: white; padding: 14px 8px; text-align: center; }
+.mortgage-table td { color: #444; padding: 12px 8px; text-align: center; transition: background 0.2s; }
+.mortgage-table tr:hover td { background: #e0f7fa !important; }
+</style>
+'''
+
+
+def format_money(values: Sequence[float]) -> List[str]:
+    """
+    Отформатировать столбец сумм: '1 234 567 руб.' (пробел как разделитель тысяч).
+    """
+    rounded = np.rint(np.asarray(values, dtype=float)).astype(np.int64).tolist()
+    if not rounded:
+        return []
+    joined = ' руб.\n'.join([f'{x:,}' for x in rounded]) + ' руб.'
+    return joined.replace(',', ' ').split('\n')
+
+
+def format_percent(values: Sequence[float]) -> List[str]:
+    """
+    Отформатировать столбец долей как проценты с двумя знаками: '12.34%'.
+    """
+    return [f'{x:.2%}' for x in np.asarray(values, dtype=float).tolist()]
+
+
+def format_columns(results: ResultColumns) -> Dict[str, List[str]]:
+    """
+    Отформатированные столбцы таблицы результатов в порядке TABLE_COLUMNS.
+    """
+    columns = {}
+    for col in TABLE_COLUMNS:
+        values = results.column(col)
+        if col in MONEY_COLUMNS:
+            columns[col] = format_money(values)
+        elif col == 'overpayment_percentage':
+            columns[col] = format_percent(values)
+        else:
+            columns[col] = [str(v) for v in values.tolist()]
+    return columns
+
+
+def table_rows(results: ResultColumns) -> Dict:
+    """
+    Таблица результатов в виде, готовом для JSON: русские заголовки и строки отформатированных ячеек.
+    """
+    columns = format_columns(results)
+    return {
+        'columns': list(TABLE_COLUMNS.values()),
+        'rows': [list(row) for row in zip(*columns.values())],
+    }
+
+
+def table_html(results: ResultColumns, title: str = 'Результаты расчета ипотеки') -> str:
+    """
+    Таблица результатов в виде простого HTML с тем же оформлением, что и таблица Plotly.
+    """
+    columns = format_columns(results)
+    header = ''.join(
+        f'<th style="background:{HEADER_COLORS[i % 2]}">{escape(name)}</th>'
+        for i, name in enumerate(TABLE_COLUMNS.values())
+    )
+    body = ''.join(
+        f'<tr style="background:{ROW_COLORS[i % 2]}">' + ''.join(f'<td>{escape(cell)}</td>' for cell in row) + '</tr>'
+        for i, row in enumerate(zip(*columns.values()))
+    )
+    return (f'{TABLE_CSS}<table class="mortgage-table"><caption>{escape(title)}</caption>'
+            f'<thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>')
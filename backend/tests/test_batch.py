@@ -0,0 +1,48 @@
+"""
+Пакетный расчет сценариев совпадает с расчетом каждого калькулятора по отдельности.
+"""
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.batch import calculate_batch
+
+BASE = {'interest_rate': 7.5, 'initial_payment': 2e6, 'min_initial_payment_percentage': 20}
+SCENARIOS = [
+    (dict(BASE, mode='property_value', property_value=8e6), (1, 30, None)),
+    (dict(BASE, mode='monthly_payment', monthly_payment=90_000, interest_rate=0), (5, 25, 5)),
+    (dict(BASE, mode='property_value', property_value=12e6, interest_rate=16), (10, 10, None)),
+    (dict(BASE, mode='property_value', property_value=8e6, rate_schedule=[{'from_year': 3, 'rate': 12}]), (1, 20, None)),
+    (dict(BASE, mode='monthly_payment', monthly_payment=70_000, exact=True), (2, 30, 4)),
+    (dict(BASE, mode='property_value', property_value=8e6, payment_scheme='differentiated'), (1, 30, 3)),
+    (dict(BASE, mode='monthly_payment', monthly_payment=50_000, min_initial_payment_percentage=30), (1, 15, None)),
+]
+
+
+def test_batch_matches_each_calculator():
+    batches = calculate_batch([MortgageCalculator(**params) for params, _ in SCENARIOS], [years for _, years in SCENARIOS])
+    assert len(batches) == len(SCENARIOS)
+    for (params, years), batch in zip(SCENARIOS, batches):
+        calc = MortgageCalculator(**params)
+        calc.calculate(*years)
+        assert batch.to_dicts() == calc.results.to_dicts()
+
+
+def test_batch_of_fixed_rate_scenarios_only():
+    fixed = SCENARIOS[:3]
+    batches = calculate_batch([MortgageCalculator(**params) for params, _ in fixed], [years for _, years in fixed])
+    for (params, years), batch in zip(fixed, batches):
+        calc = MortgageCalculator(**params)
+        calc.calculate(*years)
+        assert batch.to_dicts() == calc.results.to_dicts()
+
+
+def test_batch_endpoint_reports_invalid_scenario_in_its_slot():
+    from app import app
+    scenarios = [params for params, _ in SCENARIOS[:2]] + [dict(BASE, mode='property_value', property_value=8e6, interest_rate=150)]
+    response = app.test_client().post('/api/calculate_batch', json={'scenarios': scenarios, 'min_years': 1, 'max_years': 10})
+    assert response.status_code == 200
+    answers = response.get_json()['scenarios']
+    assert answers[2] == {'error': 'Процентная ставка должна быть от 0 до 100'}
+    for params, answer in zip(scenarios, answers):
+        if 'results' in answer:
+            calc = MortgageCalculator(**params)
+            calc.calculate(1, 10)
+            assert answer['results'] == calc.results.to_dicts()
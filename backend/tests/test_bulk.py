@@ -0,0 +1,100 @@
+"""
+Массовый расчет заявок: файл через bulk_tool дает те же числа, что MortgageCalculator по каждой строке.
+"""
+import csv
+import numpy as np
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.amortization import annuity_schedule
+from mortgage_calculator.bulk_tool import main
+
+pd = pytest.importorskip('pandas')
+
+FIELDS = ('mode', 'interest_rate', 'initial_payment', 'years', 'property_value', 'monthly_payment')
+
+
+def _applications():
+    rows = []
+    for i in range(23):
+        if i % 3:
+            rows.append({'mode': 'property_value', 'interest_rate': 4 + i / 2, 'initial_payment': 1e6 + 50_000 * i,
+                         'years': 1 + i, 'property_value': 6e6 + 100_000 * i, 'monthly_payment': ''})
+        else:
+            rows.append({'mode': 'monthly_payment' if i % 2 else '', 'interest_rate': i % 7, 'initial_payment': 5e5,
+                         'years': 5 + i, 'property_value': '', 'monthly_payment': 40_000 + 1000 * i})
+    # Некорректные заявки в разных блоках
+    rows[2]['interest_rate'] = 150
+    rows[10]['initial_payment'] = 9e6
+    rows[13]['years'] = 2.5
+    rows[17]['mode'] = 'other'
+    rows[18]['monthly_payment'] = ''
+    return rows
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _expected(row):
+    params = dict(interest_rate=row['interest_rate'], initial_payment=row['initial_payment'],
+                  min_initial_payment_percentage=0, mode=row['mode'] or 'monthly_payment')
+    if params['mode'] == 'property_value':
+        params['property_value'] = row['property_value']
+    elif params['mode'] == 'monthly_payment':
+        params['monthly_payment'] = row['monthly_payment'] if row['monthly_payment'] != '' else None
+    years = float(row['years'])
+    if params['mode'] == 'monthly_payment' and params['monthly_payment'] is None:
+        return None
+    calc = MortgageCalculator(**params)
+    if years != int(years):
+        return None
+    calc.calculate(int(years), int(years))
+    return calc.results.to_dicts()[0]
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_bulk_tool_matches_calculator(tmp_path, workers):
+    rows = _applications()
+    source, target = tmp_path / 'applications.csv', tmp_path / 'scored.csv'
+    _write_csv(source, rows)
+    code = main([str(source), str(target), '--mode', 'monthly_payment', '--chunk-rows', '4',
+                 '--workers', str(workers), '--summary-years', '1,3', '--quiet'])
+    assert code == 0
+    scored = pd.read_csv(target)
+    assert len(scored) == len(rows)
+    # Порядок строк сохраняется между блоками
+    assert scored['initial_payment'].tolist() == [float(row['initial_payment']) for row in rows]
+    invalid = {2, 10, 13, 17, 18}
+    assert set(np.flatnonzero(scored['error'].notna())) == invalid
+    assert scored['error'][13] == 'Срок должен быть целым числом лет не меньше 1'
+    assert scored['error'][18] == 'В режиме monthly_payment необходимо указать monthly_payment'
+    for i, row in enumerate(rows):
+        out = scored.iloc[i]
+        if i in invalid:
+            assert pd.isna(out['principal']) and pd.isna(out['total_payment'])
+            try:
+                expected = _expected(row)
+            except ValueError as e:
+                # Те же сообщения, что у MortgageCalculator
+                assert out['error'] == str(e)
+            else:
+                assert expected is None
+            continue
+        expected = _expected(row)
+        for field in ('principal', 'property_value', 'monthly_payment', 'total_payment', 'overpayment'):
+            assert out[field] == expected[field], (i, field)
+        assert out['overpayment_percentage'] == pytest.approx(expected['overpayment_percentage'])
+        interest, _ = annuity_schedule(expected['monthly_payment'], float(row['interest_rate']) / 1200, int(row['years']) * 12)
+        assert out['interest_1y'] == pytest.approx(interest[:12].sum(), abs=12)
+        if int(row['years']) <= 3:
+            assert out['balance_3y'] == 0
+
+
+def test_bulk_tool_reports_bad_input(tmp_path, capsys):
+    assert main([str(tmp_path / 'missing.csv'), str(tmp_path / 'out.csv'), '--quiet']) == 1
+    assert main([str(tmp_path / 'in.txt'), str(tmp_path / 'out.csv'), '--quiet']) == 1
+    assert 'Ошибка' in capsys.readouterr().err
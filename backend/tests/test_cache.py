@@ -0,0 +1,60 @@
+"""
+Кэш результатов: порядок вытеснения LRU, устаревание по TTL и счетчики, которые экспортирует /metrics.
+"""
+import pytest
+
+from mortgage_calculator.cache import ResultCache
+from mortgage_calculator.metrics import cache_gauges
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _gauges(cache: ResultCache) -> dict:
+    return {name: value for name, _, _, value in cache_gauges(cache.stats())}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert _gauges(cache) == {'cache_hits_total': 3, 'cache_misses_total': 1, 'cache_evictions_total': 1,
+                              'cache_expirations_total': 0, 'cache_entries': 2}
+
+
+def test_ttl_expires_entries():
+    clock = FakeClock()
+    cache = ResultCache(maxsize=10, ttl=5, clock=clock)
+    cache.put('a', 1)
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    cache.put('b', 2)
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    clock.now = 9.9
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['size']) == (2, 2, 2, 0)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(maxsize=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert cache.stats()['misses'] == 1
+
+
+@pytest.mark.parametrize('kwargs', ({'maxsize': -1}, {'ttl': 0}))
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        ResultCache(**kwargs)
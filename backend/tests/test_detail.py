@@ -0,0 +1,70 @@
+"""
+Детализация графика платежей: суммы по корзинам, границы последней корзины и диапазон месяцев.
+"""
+import numpy as np
+import pytest
+
+from app import get_detail
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.amortization import aggregate_buckets, choose_bucket_months
+
+
+def _calculator(**params) -> MortgageCalculator:
+    return MortgageCalculator(**dict(dict(interest_rate=7.5, initial_payment=2e6, min_initial_payment_percentage=20,
+                                          mode='property_value', property_value=8e6), **params))
+
+
+@pytest.mark.parametrize('bucket_months', (1, 3, 7, 12, 60))
+def test_aggregate_buckets_keeps_sums(bucket_months):
+    values = np.random.default_rng(1).random(250)
+    buckets = aggregate_buckets(values, bucket_months)
+    assert len(buckets) == -(-250 // bucket_months)
+    assert buckets.sum() == pytest.approx(values.sum())
+    assert buckets[-1] == pytest.approx(values[(len(buckets) - 1) * bucket_months:].sum())
+
+
+@pytest.mark.parametrize('count, max_points, expected', [(360, 400, 1), (360, 120, 3), (360, 30, 12), (360, 2, 180), (7, 1, 12)])
+def test_choose_bucket_months(count, max_points, expected):
+    assert choose_bucket_months(count, max_points) == expected
+    assert -(-count // expected) <= max_points
+
+
+@pytest.mark.parametrize('params', ({}, {'prepayments': [{'month': 12, 'amount': 500_000}]}, {'payment_scheme': 'differentiated'}))
+@pytest.mark.parametrize('bucket_months', (5, 12, 36))
+def test_bucket_series_matches_monthly_series(params, bucket_months):
+    calc = _calculator(**params)
+    monthly = calc.annuity_payments_series(20)
+    series = calc.annuity_payments_series(20, bucket_months=bucket_months)
+    last_month = int(monthly['y'][-1])
+    assert series['y'].tolist() == list(range(1, last_month + 1, bucket_months))
+    assert series['end'][-1] == last_month
+    assert np.all(series['end'] - series['y'] < bucket_months)
+    for key in ('interest', 'principal', 'extra'):
+        if key not in monthly:
+            continue
+        assert series[key].sum() == pytest.approx(monthly[key].sum())
+        for first, end, value in zip(series['y'], series['end'], series[key]):
+            assert value == pytest.approx(monthly[key][first - 1:end].sum())
+
+
+@pytest.mark.parametrize('params', ({}, {'rate_schedule': [{'from_year': 3, 'rate': 12}]}))
+def test_month_range_matches_full_series(params):
+    calc = _calculator(**params)
+    full = calc.annuity_payments_series(20)
+    part = calc.annuity_payments_series(20, month_range=(30, 100))
+    assert part['y'].tolist() == list(range(30, 101))
+    for key in ('interest', 'principal'):
+        assert np.allclose(part[key], full[key][29:100], rtol=1e-12)
+    buckets = calc.annuity_payments_series(20, bucket_months=12, month_range=(30, 100))
+    assert buckets['end'].tolist()[-1] == 100
+    assert buckets['interest'][-1] == pytest.approx(full['interest'][89:100].sum())  # корзина 90–100
+
+
+def test_get_detail():
+    assert get_detail({}, 240) == (1, None)
+    assert get_detail({'bucket': 'quarter'}, 240) == (3, None)
+    assert get_detail({'max_points': 50}, 240) == (6, None)
+    assert get_detail({'month_range': [200, 400], 'max_points': 50}, 240) == (1, (200, 240))
+    for data in ({'month_range': [0, 10]}, {'month_range': [20, 10]}, {'bucket': 0}):
+        with pytest.raises(ValueError):
+            get_detail(data, 240)
@@ -0,0 +1,80 @@
+"""
+Таблица аннуитетных коэффициентов: построение, проверка против Decimal, поиск и прямой расчет вне сетки.
+"""
+import numpy as np
+import pytest
+
+from mortgage_calculator import MortgageCalculator, factors
+from mortgage_calculator.amortization import annuity_payment
+from mortgage_calculator.factor_tool import main, validate_table
+from mortgage_calculator.factors import FactorTable, annuity_factors, factor_table, set_factor_table
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = tmp_path / 'factors.npy'
+    assert main(['build', str(path), '--step', '0.25', '--max-rate', '30', '--max-months', '120']) == 0
+    return path
+
+
+def test_built_table_passes_decimal_validation(table_path, capsys):
+    table = FactorTable(str(table_path))
+    assert (table.step, table.max_months, table.table.shape) == (pytest.approx(0.0025), 120, (121, 121))
+    assert validate_table(table, samples=500) == []
+    assert main(['validate', str(table_path), '--samples', '200']) == 0
+    assert 'Относительная ошибка' in capsys.readouterr().out
+
+
+def test_lookup_matches_annuity_payment(table_path):
+    table = FactorTable(str(table_path))
+    rates = np.array([0.0, 0.075, 0.16, 0.3])
+    terms = np.array([1, 12, 60, 120])
+    values, hit = table.lookup(rates[:, None], terms[None, :])
+    assert hit.all()
+    for i, rate in enumerate(rates):
+        for j, n in enumerate(terms):
+            assert values[i, j] == pytest.approx(annuity_payment(1.0, rate / 12, int(n)), rel=1e-13)
+
+
+def test_out_of_grid_values_fall_back_to_direct_calculation(table_path):
+    table = FactorTable(str(table_path))
+    rates = np.array([0.0751, 0.075, 0.31, 0.075, -0.01])
+    terms = np.array([60, 121, 60, 12.5, 60])
+    values, hit = table.lookup(rates, terms)
+    assert not hit.any() and np.isnan(values).all()
+    assert np.array_equal(table.factors(rates[:4], terms[:4]), annuity_factors(rates[:4], terms[:4]))
+
+
+def test_calculator_results_with_table_match_direct(table_path, monkeypatch):
+    params = dict(interest_rate=7.5, initial_payment=2e6, min_initial_payment_percentage=20,
+                  mode='property_value', property_value=8e6)
+    monkeypatch.setattr(factors, '_table', None)
+    monkeypatch.setattr(factors, '_loaded', True)
+    direct = MortgageCalculator(**params)
+    direct.calculate(1, 10)
+    set_factor_table(FactorTable(str(table_path)))
+    tabled = MortgageCalculator(**params)
+    tabled.calculate(1, 10)
+    for row, expected in zip(tabled.results.to_dicts(), direct.results.to_dicts()):
+        assert row == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize('content', (None, b'not a numpy file', b'\x93NUMPY\x01\x00'))
+def test_missing_or_corrupt_table_is_a_clear_error(tmp_path, monkeypatch, content):
+    path = tmp_path / 'factors.npy'
+    if content is not None:
+        path.write_bytes(content)
+    monkeypatch.setenv('MORTGAGE_FACTOR_TABLE', str(path))
+    monkeypatch.setattr(factors, '_table', None)
+    monkeypatch.setattr(factors, '_loaded', False)
+    with pytest.raises(ValueError, match='Не удалось прочитать таблицу коэффициентов'):
+        factor_table()
+
+
+def test_irregular_grid_is_rejected(tmp_path):
+    path = tmp_path / 'factors.npy'
+    table = factors.build_table(0.01, 0.05, 12)
+    table[-1, 0] += 0.001
+    factors.save_table(str(path), table)
+    with pytest.raises(ValueError, match='неравномерна'):
+        FactorTable(str(path))
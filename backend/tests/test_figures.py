@@ -0,0 +1,42 @@
+"""
+Диаграмма структуры выплаты, собранная словарями, совпадает с результатами расчета и принимается Plotly.
+"""
+import numpy as np
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.figures import payment_structure_figure
+
+
+@pytest.fixture(params=({'mode': 'property_value', 'property_value': 8e6},
+                        {'mode': 'monthly_payment', 'monthly_payment': 90_000, 'interest_rate': 0}))
+def calc(request):
+    params = dict({'interest_rate': 7.5, 'initial_payment': 2e6, 'min_initial_payment_percentage': 20}, **request.param)
+    calc = MortgageCalculator(**params)
+    calc.calculate(5, 30, 5)
+    return calc
+
+
+def test_payment_structure_figure_matches_results(calc):
+    data, layout = payment_structure_figure(calc.results)
+    years = calc.results.column('years').tolist()
+    assert [trace['name'] for trace in data] == ['Сумма кредита', 'Первоначальный взнос', 'Переплата']
+    for trace, key in zip(data, ('principal', 'initial_payment', 'overpayment')):
+        assert trace['y'] == years
+        assert trace['x'] == calc.results.column(key).astype(float).tolist()
+        assert len(trace['text']) == len(trace['width']) == len(years)
+    totals = np.sum([trace['x'] for trace in data], axis=0)
+    assert np.allclose(totals, calc.results.column('total_payment'))
+    shares = [[float(text.rstrip('%')) for text in trace['text']] for trace in data]
+    assert np.all(np.abs(np.sum(shares, axis=0) - 100) <= 2)
+    assert len(layout['shapes']) == len(years)
+    assert len(layout['annotations']) == 2 * len(years)
+    assert layout['barmode'] == 'stack'
+
+
+def test_payment_structure_figure_is_valid_plotly(calc):
+    go = pytest.importorskip('plotly.graph_objs')
+    data, layout = payment_structure_figure(calc.results)
+    figure = go.Figure(data=data, layout=layout)
+    assert [trace.name for trace in figure.data] == [trace['name'] for trace in data]
+    assert figure.layout.barmode == 'stack'
@@ -0,0 +1,70 @@
+"""
+Условные запросы и сжатие ответов API: ETag из нормализованных параметров, 304 без расчета, gzip.
+"""
+import gzip
+import json
+import pytest
+
+from app import app, result_cache
+from mortgage_calculator.http_cache import etag_matches, negotiate_encoding, request_etag
+
+BODY = {'interest_rate': 7.5, 'initial_payment': 2e6, 'min_initial_payment_percentage': 20,
+        'mode': 'property_value', 'property_value': 8e6, 'min_years': 1, 'max_years': 30}
+
+
+@pytest.fixture
+def client():
+    result_cache.clear()
+    return app.test_client()
+
+
+def test_repeated_request_with_etag_is_not_modified(client):
+    first = client.post('/api/calculate', json=BODY)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/"')
+    again = client.post('/api/calculate', json=BODY, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_changed_parameter_changes_etag(client):
+    etag = client.post('/api/calculate', json=BODY).headers['ETag']
+    changed = client.post('/api/calculate', json=dict(BODY, interest_rate=7.6), headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    # Порядок полей и запись чисел не меняют нормализованный ключ
+    reordered = dict(reversed(list(dict(BODY, property_value=8_000_000).items())))
+    assert client.post('/api/calculate', json=reordered).headers['ETag'] == etag
+
+
+def test_gzip_body_decodes_to_same_json(client):
+    plain = client.post('/api/calculate', json=BODY)
+    compressed = client.post('/api/calculate', json=BODY, headers={'Accept-Encoding': 'gzip'})
+    assert plain.headers.get('Content-Encoding') is None
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False), ('', False), ('*', True), ('W/"abc"', True), ('"abc"', True),
+    ('"x", W/"abc"', True), ('W/"abd"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, 'W/"abc"') == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None), ('identity', None), ('gzip', 'gzip'), ('gzip;q=0', None), ('*', 'gzip'),
+    ('deflate, gzip;q=0.5', 'gzip'),
+])
+def test_negotiate_encoding(header, expected, monkeypatch):
+    # brotli — необязательная зависимость, поэтому проверяется выбор только среди gzip
+    monkeypatch.setattr('mortgage_calculator.http_cache.ENCODINGS', ('gzip',))
+    assert negotiate_encoding(header) == expected
+
+
+def test_request_etag_is_stable():
+    assert request_etag(('calculate', 1, 2.0)) == request_etag(('calculate', 1, 2.0))
+    assert request_etag(('calculate', 1, 2.0)) != request_etag(('calculate', 1, 2.5))
@@ -0,0 +1,66 @@
+"""
+Столбцовый формат графика платежей: упакованные массивы раскрываются в те же числа, что и JSON-ответ.
+"""
+import warnings
+
+import numpy as np
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.payload import annuity_payments_columnar, decode_array
+
+TOLERANCE = {'float64': 0, 'float32': 1e-6}
+
+
+def _calculator(**params) -> MortgageCalculator:
+    return MortgageCalculator(**dict(dict(interest_rate=7.5, initial_payment=2e6, min_initial_payment_percentage=20,
+                                          mode='property_value', property_value=8e6), **params))
+
+
+@pytest.mark.parametrize('dtype', ('float64', 'float32'))
+@pytest.mark.parametrize('bucket_months, month_range', [(1, None), (12, None), (5, (30, 100)), (1, (7, 19))])
+@pytest.mark.parametrize('params', ({}, {'prepayments': [{'month': 12, 'amount': 500_000}]}))
+def test_columnar_round_trip_matches_json(dtype, bucket_months, month_range, params):
+    calc = _calculator(**params)
+    payload = annuity_payments_columnar(calc, 20, 'months', dtype, bucket_months, month_range)
+    traces, layout = calc.plot_annuity_payments_data(20, 'months', bucket_months, month_range)
+    assert [t['name'] for t in payload['traces']] == [t['name'] for t in traces]
+    assert payload['y']['start'] + payload['y']['step'] * (payload['length'] - 1) == traces[0]['y'][-1]
+    for columnar, expected in zip(payload['traces'], traces):
+        values = decode_array(payload['columns'][columnar['column']])
+        assert np.allclose(values, expected['x'], rtol=TOLERANCE[dtype], atol=0)
+        assert columnar['hovertemplate'] == expected['hovertemplate']
+    if 'customdata' in traces[0]:
+        assert decode_array(payload['columns']['end']).tolist() == traces[0]['customdata']
+        assert payload['layout']['meta'] == layout['meta']
+    else:
+        assert 'end' not in payload['columns'] and 'meta' not in payload['layout']
+
+
+def test_columnar_years_mode():
+    calc = _calculator()
+    payload = annuity_payments_columnar(calc, 15, 'years')
+    traces, _ = calc.plot_annuity_payments_data(15, 'years')
+    assert payload['length'] == 15
+    for columnar, expected in zip(payload['traces'], traces):
+        assert decode_array(payload['columns'][columnar['column']]).tolist() == expected['x']
+
+
+def test_columnar_response_keeps_prepayment_summary():
+    from app import app
+    body = {'interest_rate': 7.5, 'initial_payment': 2e6, 'min_initial_payment_percentage': 20,
+            'property_value': 8e6, 'years': 20, 'prepayments': [{'month': 12, 'amount': 500_000}]}
+    client = app.test_client()
+    columnar = client.post('/api/annuity_payments', json=dict(body, format='columnar')).get_json()
+    plain = client.post('/api/annuity_payments', json=body).get_json()
+    assert columnar['prepayment'] == plain['prepayment']
+
+
+@pytest.mark.parametrize('args', [(10,), (10, 'years'), (10, 'months', 12)])
+def test_zero_loan_shares_without_warnings(args):
+    calc = _calculator(initial_payment=8e6)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        traces, _ = calc.plot_annuity_payments_data(*args)
+    for trace in traces:
+        assert set(trace['text']) == {'0%'}
@@ -0,0 +1,468 @@
+"""
+Сверка расчетных движков с эталонными расчетами: помесячными циклами и перебором.
+
+Векторные и замкнутые формулы в mortgage_calculator заменяют циклы ради скорости;
+эти тесты проверяют, что числа при этом не меняются. Запуск: cd backend && python -m pytest -q
+"""
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+import threading
+import time
+import numpy as np
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.amortization import annuity_balance, annuity_payment, annuity_schedule
+from mortgage_calculator.differentiated import differentiated_principal, differentiated_schedule, differentiated_totals
+from mortgage_calculator.exact import exact_payment, exact_schedule, exact_totals, rate_fraction, to_kopecks
+from mortgage_calculator.prepayment import expand_prepayments, normalize_prepayments, prepayment_schedule
+from mortgage_calculator.rates import monthly_rate_changes, normalize_rate_schedule, variable_rate_totals
+from mortgage_calculator.schedule import payment_schedule
+from mortgage_calculator.session import LiveSession, SessionStore, diff_figure, diff_results
+from mortgage_calculator.singleflight import FlightError, FlightTimeout, SingleFlight
+from mortgage_calculator.solver import solve
+
+PROPERTY_VALUE = 8_000_000
+INITIAL_PAYMENT = 2_000_000
+RATES = (0.0, 7.5, 16.0)
+
+
+def reference_overpayment(loan: float, annual_rate: float, months: int) -> float:
+    return annuity_payment(loan, annual_rate / 1200, months) * months - loan
+
+
+# Аннуитетный график в замкнутой форме
+
+def annuity_loop(loan: float, r: float, months: int):
+    """
+    Эталон: помесячный цикл, проценты начисляются на остаток, остаток платежа гасит тело кредита.
+    """
+    payment = annuity_payment(loan, r, months)
+    balance = loan
+    interest, principal, balances = [], [], []
+    for _ in range(months):
+        interest.append(balance * r)
+        principal.append(payment - balance * r)
+        balance -= principal[-1]
+        balances.append(balance)
+    return np.array(interest), np.array(principal), np.array(balances)
+
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('months', (1, 12, 360))
+def test_annuity_schedule_matches_loop(rate, months):
+    loan = PROPERTY_VALUE - INITIAL_PAYMENT
+    r = rate / 1200
+    payment = annuity_payment(loan, r, months)
+    interest, principal, balances = annuity_loop(loan, r, months)
+    assert np.allclose(annuity_schedule(payment, r, months), (interest, principal), rtol=0, atol=1e-6)
+    assert np.allclose(annuity_balance(payment, r, months), balances, rtol=0, atol=1e-6)
+    assert abs(balances[-1]) < 1e-6
+
+
+def test_annuity_schedule_in_chunks_matches_whole():
+    r, months = 7.5 / 1200, 360
+    payment = annuity_payment(PROPERTY_VALUE - INITIAL_PAYMENT, r, months)
+    chunks = [annuity_schedule(payment, r, months, start, start + 100) for start in range(0, months, 100)]
+    whole = annuity_schedule(payment, r, months)
+    assert np.array_equal(np.concatenate([c[0] for c in chunks]), whole[0])
+    assert np.array_equal(np.concatenate([c[1] for c in chunks]), whole[1])
+    assert np.array_equal(annuity_balance(payment, r, months, 100, 200), annuity_balance(payment, r, months)[100:200])
+
+
+# Досрочные погашения
+
+def months_to_repay(balance: float, payment: float, r: float, limit: int) -> int:
+    months = 0
+    while balance > 1e-6 and months < limit:
+        balance = balance * (1 + r) - payment
+        months += 1
+    return months
+
+
+def schedule_loop(loan: float, n: int, rates: dict, extras: dict = None, strategy: str = 'reduce_term'):
+    """
+    Эталон движка графика: помесячный цикл. rates — {первый месяц действия: месячная ставка} с месяца 1,
+    extras — {месяц: досрочный взнос в конце месяца}. Столбцы — как у schedule.payment_schedule.
+    """
+    extras = extras or {}
+    r = rates[1]
+    balance = float(loan)
+    payment = annuity_payment(balance, r, n)
+    prepaid = False
+    rows = []
+    for month in range(1, n + 1):
+        if month > 1 and month in rates:
+            term = n - month + 1
+            if strategy == 'reduce_term' and prepaid:
+                term = min(months_to_repay(balance, payment, r, term), term)
+            r = rates[month]
+            payment = annuity_payment(balance, r, term)
+        interest = balance * r
+        paid = balance + interest if payment - interest >= balance - 1e-6 else payment
+        balance -= paid - interest
+        extra = min(extras.get(month, 0.0), balance) if month < n else 0.0
+        balance -= extra
+        rows.append((paid, interest, paid - interest, extra, max(balance, 0.0)))
+        if balance <= 1e-6:
+            break
+        if extra:
+            prepaid = True
+            if strategy == 'reduce_payment':
+                payment = annuity_payment(balance, r, n - month)
+    return dict(zip(('payment', 'interest', 'principal', 'extra', 'balance'), map(np.array, zip(*rows))))
+
+
+def assert_same_schedule(actual: dict, expected: dict):
+    assert len(actual['payment']) == len(expected['payment'])
+    for column, values in expected.items():
+        assert np.allclose(actual[column], values, rtol=0, atol=1e-4), column
+
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('strategy', ('reduce_term', 'reduce_payment'))
+@pytest.mark.parametrize('items, extras', [
+    ([{'month': 12, 'amount': 500_000}], {12: 500_000}),
+    ([{'amount': 20_000, 'start': 1, 'every': 1, 'end': 60}], {m: 20_000 for m in range(1, 61)}),
+    ([{'month': 6, 'amount': 300_000}, {'amount': 100_000, 'start': 12, 'every': 12}],
+     {6: 300_000, **{m: 100_000 for m in range(12, 241, 12)}}),
+    ([{'month': 24, 'amount': 10 ** 8}], {24: 10 ** 8}),
+])
+def test_prepayment_schedule_matches_loop(rate, strategy, items, extras):
+    loan, n, r = PROPERTY_VALUE - INITIAL_PAYMENT, 240, rate / 1200
+    actual = prepayment_schedule(loan, r, n, normalize_prepayments(items), strategy)
+    assert_same_schedule(actual, schedule_loop(loan, n, {1: r}, extras, strategy))
+
+
+# Плавающая ставка
+
+RATE_SCHEDULE = [{'from_year': 3, 'rate': 12}, {'from_month': 61, 'rate': 0}, {'from_year': 11, 'rate': 16}]
+
+
+@pytest.mark.parametrize('strategy', ('reduce_term', 'reduce_payment'))
+@pytest.mark.parametrize('items', ([], [{'month': 12, 'amount': 500_000}, {'amount': 30_000, 'start': 30, 'every': 3}]))
+def test_rate_schedule_matches_loop(strategy, items):
+    loan, n = PROPERTY_VALUE - INITIAL_PAYMENT, 240
+    changes = monthly_rate_changes(0.075, normalize_rate_schedule(RATE_SCHEDULE))
+    prepayments = normalize_prepayments(items)
+    actual = payment_schedule(loan, n, changes, expand_prepayments(prepayments, n), strategy)
+    assert_same_schedule(actual, schedule_loop(loan, n, dict(changes), dict(expand_prepayments(prepayments, n)), strategy))
+
+
+def test_variable_rate_totals_match_loop():
+    loan = PROPERTY_VALUE - INITIAL_PAYMENT
+    changes = monthly_rate_changes(0.075, normalize_rate_schedule(RATE_SCHEDULE))
+    terms = np.array([12, 24, 25, 60, 121, 240, 360])
+    totals = variable_rate_totals(loan, terms, changes)
+    for k, n in enumerate(terms):
+        expected = schedule_loop(loan, int(n), dict(changes))['payment']
+        assert totals['first_payment'][k] == pytest.approx(expected[0], abs=1e-6)
+        assert totals['last_payment'][k] == pytest.approx(expected[-1], abs=1e-4)
+        assert totals['total_payment'][k] == pytest.approx(expected.sum(), abs=1e-3)
+
+
+# Точный график в копейках
+
+def kopeck_loop(loan: int, payment: int, annual_rate: str, n: int):
+    """
+    Эталон банковского графика: цикл в Decimal, проценты за месяц (остаток × ставка / 12) округляются
+    до копейки половиной вверх, последний платеж равен остатку с процентами.
+    """
+    monthly = Decimal(annual_rate) / 1200
+    balance = loan
+    rows = []
+    with localcontext() as ctx:
+        ctx.prec = 50
+        for month in range(1, n + 1):
+            interest = int((balance * monthly).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+            paid = balance + interest if month == n or balance + interest <= payment else payment
+            balance -= paid - interest
+            rows.append((paid, interest, paid - interest, balance))
+            if month == n or balance == 0:
+                break
+    return dict(zip(('payment', 'interest', 'principal', 'balance'), map(list, zip(*rows))))
+
+
+@pytest.mark.parametrize('annual_rate', ('0', '7.5', '9.1234', '16'))
+@pytest.mark.parametrize('months', (1, 12, 240, 360))
+def test_exact_schedule_matches_decimal_loop(annual_rate, months):
+    loan = int(to_kopecks(PROPERTY_VALUE - INITIAL_PAYMENT + 0.37))
+    num, den = rate_fraction(float(annual_rate) / 100)
+    payment = int(exact_payment(loan, num, den, months))
+    expected = kopeck_loop(loan, payment, annual_rate, months)
+    actual = exact_schedule(loan, payment, num, den, months)
+    assert {column: values.tolist() for column, values in actual.items()} == expected
+    assert expected['balance'][-1] == 0
+    totals = exact_totals(np.array([loan]), np.array([payment]), num, den, np.array([months]))
+    assert totals['total_interest'][0] == sum(expected['interest'])
+    assert totals['last_payment'][0] == expected['payment'][-1]
+    assert totals['months'][0] == len(expected['payment'])
+
+
+def test_exact_totals_for_many_terms_match_decimal_loop():
+    loan = int(to_kopecks(PROPERTY_VALUE - INITIAL_PAYMENT))
+    num, den = rate_fraction(0.075)
+    terms = np.array([12, 60, 61, 240, 360])
+    payments = exact_payment(loan, num, den, terms)
+    totals = exact_totals(np.full(len(terms), loan), payments, num, den, terms)
+    for k, n in enumerate(terms):
+        expected = kopeck_loop(loan, int(payments[k]), '7.5', int(n))
+        assert totals['total_payment'][k] == sum(expected['payment'])
+        assert totals['last_payment'][k] == expected['payment'][-1]
+
+
+# Дифференцированные платежи
+
+def differentiated_loop(loan: float, r: float, months: int):
+    """
+    Эталон: каждый месяц гасится loan / months тела кредита, проценты начисляются на остаток.
+    """
+    balance = loan
+    interest, balances = [], []
+    for _ in range(months):
+        interest.append(balance * r)
+        balance -= loan / months
+        balances.append(max(balance, 0.0))
+    return np.array(interest), np.array(balances)
+
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('months', (1, 12, 360))
+def test_differentiated_schedule_matches_loop(rate, months):
+    loan, r = PROPERTY_VALUE - INITIAL_PAYMENT, rate / 1200
+    interest, balances = differentiated_loop(loan, r, months)
+    actual_interest, principal, actual_balances = differentiated_schedule(loan, r, months)
+    assert np.allclose(actual_interest, interest, rtol=0, atol=1e-6)
+    assert np.allclose(principal, loan / months, rtol=0, atol=1e-6)
+    assert np.allclose(actual_balances, balances, rtol=0, atol=1e-6)
+    assert np.allclose(differentiated_schedule(loan, r, months, months // 3, months // 2)[0],
+                       interest[months // 3:months // 2], rtol=0, atol=1e-6)
+    totals = differentiated_totals(loan, r, months)
+    payments = interest + loan / months
+    assert totals['first_payment'] == pytest.approx(payments[0], abs=1e-6)
+    assert totals['last_payment'] == pytest.approx(payments[-1], abs=1e-6)
+    assert totals['total_interest'] == pytest.approx(interest.sum(), abs=1e-3)
+    assert differentiated_principal(payments[0], r, months) == pytest.approx(loan, abs=1e-3)
+
+
+# Подбор параметров (solver)
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('max_payment', (45_000, 90_000, 400_000))
+def test_min_term_matches_search(rate, max_payment):
+    loan = PROPERTY_VALUE - INITIAL_PAYMENT
+    expected = next((m for m in range(12, 601, 12) if annuity_payment(loan, rate / 1200, m) <= max_payment), None)
+    answer = solve([{'goal': 'min_term', 'property_value': PROPERTY_VALUE, 'initial_payment': INITIAL_PAYMENT,
+                     'interest_rate': rate, 'max_payment': max_payment}])[0]
+    assert answer['months'] == expected
+    assert answer['feasible'] == (expected is not None)
+
+
+def test_min_term_share_violation_is_infeasible():
+    answer = solve([{'goal': 'min_term', 'property_value': 8e6, 'initial_payment': 1e6, 'interest_rate': 10,
+                     'max_payment': 1e5, 'min_initial_payment_percentage': 20}])[0]
+    assert answer['months'] is not None
+    assert not answer['feasible']
+    assert len(answer['violations']) == 1
+
+
+@pytest.mark.parametrize('rate', (0.1, 7.5, 16.0))
+def test_rate_for_overpayment_reproduces_target(rate):
+    loan, months = PROPERTY_VALUE - INITIAL_PAYMENT, 240
+    target = reference_overpayment(loan, rate, months)
+    answer = solve([{'goal': 'rate_for_overpayment', 'property_value': PROPERTY_VALUE, 'initial_payment': INITIAL_PAYMENT,
+                     'months': months, 'overpayment': target}])[0]
+    assert answer['feasible']
+    assert answer['interest_rate'] == pytest.approx(rate, abs=1e-6)
+
+
+@pytest.mark.parametrize('rate', RATES)
+def test_max_property_value_affords_payment(rate):
+    answer = solve([{'goal': 'max_property_value', 'monthly_payment': 80_000, 'initial_payment': INITIAL_PAYMENT,
+                     'interest_rate': rate, 'years': 20}])[0]
+    assert answer['binding'] == 'monthly_payment'
+    assert annuity_payment(answer['principal'], rate / 1200, 240) == pytest.approx(80_000, abs=1)
+
+
+@pytest.mark.parametrize('query', (
+    {'goal': 'min_term', 'property_value': 8e6, 'initial_payment': 2e6, 'interest_rate': 10, 'max_payment': -1},
+    {'goal': 'max_property_value', 'monthly_payment': 0, 'initial_payment': 2e6, 'interest_rate': 10, 'years': 20},
+    {'goal': 'min_term', 'property_value': 8e6, 'initial_payment': 2e6, 'interest_rate': 120, 'max_payment': 1e5},
+))
+def test_invalid_inputs_are_errors(query):
+    assert 'error' in solve([query])[0]
+
+
+# Объединение одинаковых запросов (singleflight)
+
+def _concurrent(flight: SingleFlight, compute, count: int, started: threading.Event):
+    """
+    Запустить ведущий вызов, дождаться начала вычисления и добавить count - 1 ведомых.
+    """
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flight.do('key', compute))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call) for _ in range(count - 1)]
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()['waiting'] < count - 1:
+        time.sleep(0.001)
+    return threads, outcomes
+
+
+def test_singleflight_computes_once():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    flight = SingleFlight(timeout=5)
+    threads, outcomes = _concurrent(flight, compute, 8, started)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(outcomes) == [(42, False)] + [(42, True)] * 7
+    assert flight.stats()['shared'] == 7
+
+
+def test_singleflight_propagates_errors_per_waiter():
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError('нет данных')
+
+    flight = SingleFlight(timeout=5)
+    threads, outcomes = _concurrent(flight, compute, 4, started)
+    release.set()
+    for thread in threads:
+        thread.join()
+    leader = [e for e in outcomes if type(e) is ValueError]
+    waiters = [e for e in outcomes if isinstance(e, FlightError)]
+    assert len(leader) == 1 and len(waiters) == 3
+    assert len({id(e) for e in waiters}) == 3
+    assert all(str(e) == 'нет данных' and e.__cause__ is leader[0] for e in waiters)
+    stats = flight.stats()
+    assert (stats['shared'], stats['shared_errors'], stats['errors']) == (0, 3, 1)
+
+
+def test_singleflight_timeout():
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return 1
+
+    flight = SingleFlight(timeout=0.05)
+    threads, outcomes = _concurrent(flight, compute, 2, started)
+    threads[1].join()
+    release.set()
+    threads[0].join()
+    assert any(isinstance(e, FlightTimeout) for e in outcomes)
+    assert (1, False) in outcomes
+
+
+# Живые сессии: разница с прошлой отправкой
+
+def _calculator(**params) -> MortgageCalculator:
+    defaults = {'interest_rate': 7.5, 'initial_payment': INITIAL_PAYMENT, 'mode': 'property_value',
+                'property_value': PROPERTY_VALUE}
+    return MortgageCalculator(**dict(defaults, **params))
+
+
+def _results(**params):
+    calc = _calculator(**params)
+    calc.calculate(1, 30)
+    return calc.results
+
+
+def test_diff_results_replays_to_full_result():
+    previous, current = _results(initial_payment=2_000_000), _results(initial_payment=2_100_000)
+    diff = diff_results(previous, current)
+    assert not diff['reset']
+    rows = previous.to_dicts()
+    for row in diff['rows']:
+        index = row.pop('index')
+        rows[index] = row
+    assert rows == current.to_dicts()
+
+
+def test_diff_results_resets_on_other_terms():
+    previous = _results()
+    calc = _calculator()
+    calc.calculate(1, 20)
+    assert diff_results(previous, calc.results) == {'reset': True, 'rows': calc.results.to_dicts()}
+
+
+def test_diff_figure_replays_to_full_figure():
+    previous = _calculator().plot_annuity_payments_data(10, 'years')
+    current = _calculator(interest_rate=8.0).plot_annuity_payments_data(10, 'years')
+    diff = diff_figure(previous, current)
+    assert not diff['reset']
+    traces = [dict(trace, x=list(trace['x']), text=list(trace['text'])) for trace in previous[0]]
+    for change in diff['traces']:
+        trace = traces[change['trace']]
+        for i, x, text in zip(change['index'], change['x'], change['text']):
+            trace['x'][i], trace['text'][i] = x, text
+    assert traces == current[0]
+
+
+def test_session_skips_parts_of_stale_snapshot():
+    computed = []
+    blocked, release = threading.Event(), threading.Event()
+
+    class SlowSession(LiveSession):
+        @staticmethod
+        def _compute(part, calc, params):
+            computed.append((part, params['interest_rate']))
+            if len(computed) == 1:
+                blocked.set()
+                release.wait(5)
+            return LiveSession._compute(part, calc, params)
+
+    params = {'interest_rate': 7.5, 'initial_payment': INITIAL_PAYMENT, 'min_initial_payment_percentage': 20,
+              'mode': 'property_value', 'property_value': PROPERTY_VALUE, 'min_years': 1, 'max_years': 10, 'years': 10}
+    session = SlowSession('test', params, lambda data: _calculator(
+        interest_rate=data['interest_rate'], initial_payment=data['initial_payment'], property_value=data['property_value']))
+    blocked.wait(5)
+    session.update({'interest_rate': 9.0})
+    release.set()
+    events = []
+    while not events or events[-1][0] != 'done':
+        events.append(session.events.get(timeout=5))
+    session.close()
+    # Часть 'annuity' старого снимка (ставка 7.5) не считается: после изменения обе части считаются с 9.0
+    assert computed == [('results', 7.5), ('results', 9.0), ('annuity', 9.0)]
+    assert [name for name, _ in events] == ['results', 'annuity', 'done']
+
+
+def test_session_store_expires_idle_sessions_without_new_sessions():
+    store = SessionStore(lambda data: _calculator(), ttl=0.05)
+    session = store.create({'years': 1, 'max_years': 1})
+    time.sleep(0.1)
+    with pytest.raises(KeyError):
+        store.get(session.id)
+    assert session.closed
+    assert len(store) == 0
+
+
+def test_session_store_limits_open_streams():
+    store = SessionStore(lambda data: _calculator(), max_streams=2)
+    assert store.open_stream() and store.open_stream()
+    assert not store.open_stream()
+    store.release_stream()
+    assert store.open_stream()
@@ -0,0 +1,30 @@
+"""
+Отладочная отрисовка через Plotly строится из тех же данных, что и JSON-ответы API.
+"""
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+
+pytest.importorskip('plotly')
+
+
+@pytest.mark.parametrize('params', (
+    {'mode': 'property_value', 'property_value': 8e6},
+    {'mode': 'monthly_payment', 'monthly_payment': 80_000},
+    {'mode': 'property_value', 'property_value': 8e6, 'prepayments': [{'month': 12, 'amount': 500_000}],
+     'rate_schedule': [{'from_year': 3, 'rate': 12}]},
+    {'mode': 'property_value', 'property_value': 8e6, 'exact': True},
+    {'mode': 'property_value', 'property_value': 8e6, 'payment_scheme': 'differentiated'},
+))
+def test_plot_annuity_payments_uses_schedule_data(params, monkeypatch):
+    import plotly.graph_objs as go
+    calc = MortgageCalculator(interest_rate=7.5, initial_payment=2e6, min_initial_payment_percentage=20, **params)
+    shown = []
+    monkeypatch.setattr(go.Figure, 'show', lambda fig: shown.append(fig))
+    calc.plot_annuity_payments(10)
+    data, _ = calc.plot_annuity_payments_data(10)
+    assert [trace.name for trace in shown[0].data] == [trace['name'] for trace in data]
+    for trace, expected in zip(shown[0].data, data):
+        assert list(trace.x) == expected['x']
+        assert list(trace.y) == expected['y']
+    assert calc.plot_annuity_payments(10, return_html=True).startswith('<div')
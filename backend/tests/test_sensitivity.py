@@ -0,0 +1,61 @@
+"""
+Сетка чувствительности совпадает с расчетом MortgageCalculator в каждой ячейке и ограничена по размеру.
+"""
+import pytest
+
+from app import app
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.sensitivity import MAX_CELLS, SENSITIVITY_METRICS, grid_axis, sensitivity_grid
+
+RATES = grid_axis({'min': 0, 'max': 16, 'step': 4}, 'rates')
+YEARS = grid_axis([1, 7, 30], 'years')
+
+
+def _assert_cells_match(grid, cell_params):
+    for k, third in enumerate(grid['values']):
+        for i, rate in enumerate(grid['rates']):
+            for j, years in enumerate(grid['years']):
+                calc = MortgageCalculator(interest_rate=rate, min_initial_payment_percentage=0, **cell_params(third))
+                calc.calculate(years, years)
+                row = calc.results.to_dicts()[0]
+                for metric in SENSITIVITY_METRICS:
+                    assert abs(grid[metric][k][i][j] - row[metric]) <= 1, (metric, third, rate, years)
+
+
+def test_property_value_grid_matches_calculator():
+    grid = sensitivity_grid(mode='property_value', rates=RATES, years=YEARS, initial_payment=[0, 2e6, 8e6], value=8e6)
+    assert (grid['axis'], len(grid['overpayment']), len(grid['overpayment'][0])) == ('initial_payment', 3, len(RATES))
+    _assert_cells_match(grid, lambda third: {'mode': 'property_value', 'property_value': 8e6, 'initial_payment': third})
+
+
+def test_monthly_payment_grid_matches_calculator():
+    grid = sensitivity_grid(mode='monthly_payment', rates=RATES, years=YEARS, initial_payment=1e6, value=[30_000, 90_000])
+    _assert_cells_match(grid, lambda third: {'mode': 'monthly_payment', 'monthly_payment': third, 'initial_payment': 1e6})
+
+
+def test_grid_axis():
+    assert grid_axis({'min': 5, 'max': 5.3, 'step': 0.1}, 'rates').tolist() == [5.0, 5.1, 5.2, 5.3]
+    assert grid_axis(7.5, 'rates').tolist() == [7.5]
+    for spec in ({'min': 2, 'max': 1}, {'min': 1, 'max': 2, 'step': 0}, []):
+        with pytest.raises(ValueError):
+            grid_axis(spec, 'rates')
+
+
+@pytest.mark.parametrize('rates, years', [
+    ({'min': 0, 'max': 100, 'step': 1e-9}, [10]),
+    ({'min': 0, 'max': 99.99, 'step': 0.01}, {'min': 1, 'max': 101}),
+])
+def test_sensitivity_endpoint_rejects_too_large_grid(rates, years):
+    body = {'mode': 'property_value', 'property_value': 8e6, 'initial_payment': 2e6, 'rates': rates, 'years': years}
+    response = app.test_client().post('/api/sensitivity', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': f'Слишком большая сетка: не больше {MAX_CELLS} ячеек'}
+
+
+def test_sensitivity_endpoint_returns_grid():
+    body = {'mode': 'monthly_payment', 'monthly_payment': 60_000, 'initial_payment': 1e6,
+            'rates': {'min': 5, 'max': 10}, 'years': [10, 20], 'metric': 'monthly_payment'}
+    response = app.test_client().post('/api/sensitivity', json=body)
+    assert response.status_code == 200
+    grid = response.get_json()['grid']
+    assert grid == sensitivity_grid(mode='monthly_payment', rates=range(5, 11), years=[10, 20], initial_payment=1e6, value=60_000)
@@ -0,0 +1,29 @@
+"""
+Стресс-тест ставки: результат при фиксированном seed не зависит от разбиения на блоки и пула процессов.
+"""
+import pytest
+
+from mortgage_calculator.simulation import stress_test
+
+LOAN = 6_000_000
+
+
+@pytest.mark.parametrize('model', ('vasicek', 'lognormal'))
+def test_chunked_evaluation_matches_single_chunk(model):
+    options = dict(paths=1000, seed=7, model=model, volatility=0.02, reset_months=12)
+    whole = stress_test(LOAN, 0.075, 240, **options)
+    chunked = stress_test(LOAN, 0.075, 240, memory_cap=1, **options)
+    assert chunked == whole
+
+
+def test_process_pool_matches_in_process():
+    options = dict(paths=600, seed=3, model='lognormal', volatility=0.2, reset_months=24, memory_cap=1)
+    assert stress_test(LOAN, 0.09, 120, workers=2, **options) == stress_test(LOAN, 0.09, 120, **options)
+
+
+@pytest.mark.parametrize('model', ('vasicek', 'lognormal'))
+def test_constant_rate_reproduces_baseline(model):
+    result = stress_test(LOAN, 0.075, 240, paths=300, model=model, volatility=0, long_term_rate=0.075, memory_cap=1)
+    baseline = result['baseline']
+    assert result['max_monthly_payment']['quantiles'] == [baseline['monthly_payment']] * 5
+    assert all(abs(q - baseline['overpayment']) <= 1 for q in result['overpayment']['quantiles'])
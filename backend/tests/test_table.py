@@ -0,0 +1,46 @@
+"""
+Векторное форматирование таблицы дает те же строки, что прежнее форматирование через pandas.
+"""
+from html import escape
+import pytest
+
+from mortgage_calculator import MortgageCalculator
+from mortgage_calculator.table import (MONEY_COLUMNS, TABLE_COLUMNS, format_columns, format_money, format_percent,
+                                       table_html, table_rows)
+
+pd = pytest.importorskip('pandas')
+
+
+def baseline_format_table(df):
+    # Прежний MortgageCalculator._format_table
+    for col in ['principal', 'initial_payment', 'property_value', 'monthly_payment', 'total_payment', 'overpayment']:
+        df[col] = df[col].apply(lambda x: f"{x:,.0f}".replace(",", " ") + " руб.")
+    df['overpayment_percentage'] = df['overpayment_percentage'].apply(lambda x: f"{x:.2%}")
+    return df
+
+
+@pytest.mark.parametrize('params', (
+    {'interest_rate': 7.5, 'mode': 'property_value', 'property_value': 8e6},
+    {'interest_rate': 0, 'mode': 'monthly_payment', 'monthly_payment': 50_000},
+    {'interest_rate': 16, 'mode': 'property_value', 'property_value': 4.5e11},
+))
+def test_format_columns_match_pandas_formatting(params):
+    calc = MortgageCalculator(initial_payment=2e6, min_initial_payment_percentage=20, **params)
+    calc.calculate(1, 30, 7)
+    expected = baseline_format_table(pd.DataFrame(calc.results.to_dicts()))
+    columns = format_columns(calc.results)
+    assert list(columns) == list(TABLE_COLUMNS)
+    for col in list(MONEY_COLUMNS) + ['overpayment_percentage']:
+        assert columns[col] == expected[col].tolist(), col
+    rows = table_rows(calc.results)['rows']
+    assert rows == [list(row) for row in zip(*columns.values())]
+    html = table_html(calc.results)
+    assert all(f'<td>{escape(cell)}</td>' in html for row in rows for cell in row)
+
+
+def test_format_money_and_percent_edge_values():
+    values = [0, 0.4, 0.5, 1.5, 2.5, 999.5, 1234567.49, 1e12, -1500.6]
+    assert format_money(values) == [f"{x:,.0f}".replace(",", " ") + " руб." for x in values]
+    shares = [0, 0.123456, 1, 12.5]
+    assert format_percent(shares) == [f"{x:.2%}" for x in shares]
+    assert format_money([]) == []
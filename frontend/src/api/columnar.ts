@@ -0,0 +1,47 @@
+export interface ColumnarArray {
+  dtype: 'float32' | 'float64';
+  length: number;
+  data: string;
+}
+
+export interface ColumnarAnnuityPayload {
+  format: 'columnar';
+  length: number;
+  y: { start: number; step: number };
+  columns: Record<string, ColumnarArray>;
+  traces: Array<Record<string, any> & { column: string }>;
+  layout: Record<string, any>;
+  prepayment?: Record<string, number>;
+}
+
+export function decodeColumn(column: ColumnarArray): Float32Array | Float64Array {
+  const binary = atob(column.data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return column.dtype === 'float32' ? new Float32Array(bytes.buffer) : new Float64Array(bytes.buffer);
+}
+
+// Восстанавливает трассы Plotly (x, y и подписи процентов) из столбцового ответа /api/annuity_payments;
+// столбец end (последний месяц корзины) становится customdata для подсказок «Месяцы с–по»
+export function expandColumnarAnnuity(payload: ColumnarAnnuityPayload): { data: any[]; layout: any } {
+  const y = Array.from({ length: payload.length }, (_, i) => payload.y.start + i * payload.y.step);
+  const columns: Record<string, Float32Array | Float64Array> = {};
+  Object.keys(payload.columns).forEach(name => {
+    columns[name] = decodeColumn(payload.columns[name]);
+  });
+  const totals = y.map((_, i) => payload.traces.reduce((sum, trace) => sum + columns[trace.column][i], 0));
+  const customdata = columns.end ? Array.from(columns.end) : undefined;
+  const data = payload.traces.map(({ column, ...trace }) => {
+    const x = Array.from(columns[column]);
+    return {
+      ...trace,
+      x,
+      y,
+      text: x.map((value, i) => `${totals[i] > 0 ? Math.round((value / totals[i]) * 100) : 0}%`),
+      ...(customdata ? { customdata } : {}),
+    };
+  });
+  return { data, layout: payload.layout };
+}
@@ -0,0 +1,36 @@
+// POST-запросы с проверкой ETag: браузер не кэширует ответы на POST, поэтому последний ответ
+// на каждый запрос хранится здесь и переиспользуется, если сервер ответил 304 Not Modified.
+const MAX_ENTRIES = 50;
+
+const responses = new Map<string, { etag: string; data: unknown }>();
+
+export async function postJson<T>(url: string, body: unknown): Promise<T> {
+  const payload = JSON.stringify(body);
+  const key = `${url}\n${payload}`;
+  const cached = responses.get(key);
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (cached) {
+    headers['If-None-Match'] = cached.etag;
+  }
+  const res = await fetch(url, { method: 'POST', headers, body: payload });
+  if (res.status === 304 && cached) {
+    // Обновляем порядок, чтобы часто используемые ответы вытеснялись последними
+    responses.delete(key);
+    responses.set(key, cached);
+    return cached.data as T;
+  }
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(errorText);
+  }
+  const data = await res.json();
+  const etag = res.headers.get('ETag');
+  if (etag) {
+    responses.delete(key);
+    responses.set(key, { etag, data });
+    if (responses.size > MAX_ENTRIES) {
+      responses.delete(responses.keys().next().value as string);
+    }
+  }
+  return data as T;
+}
@@ -1,3 +1,5 @@
+import { postJson } from './conditional';
+
 export interface MortgageParams {
   interest_rate: number;
   monthly_payment?: number;
@@ -6,6 +8,15 @@ export interface MortgageParams {
   min_years: number;
   max_years: number;
   min_initial_payment_percentage: number;
+  rate_schedule?: RatePeriod[];
+  exact?: boolean;
+  payment_scheme?: 'annuity' | 'differentiated';
+}
+
+export interface RatePeriod {
+  from_month?: number;
+  from_year?: number;
+  rate: number;
 }
 
 export interface MortgageResult {
@@ -14,6 +25,7 @@ export interface MortgageResult {
   initial_payment: number;
   property_value: number;
   monthly_payment: number;
+  last_monthly_payment?: number;
   total_payment: number;
   overpayment: number;
   overpayment_percentage: number;
@@ -37,15 +49,27 @@ export async function calculateMortgage(params: MortgageParams): Promise<Mortgag
   Object.keys(payload).forEach(key => {
     if (payload[key] === undefined || payload[key] === null || (key === 'property_value' && payload[key] === 0)) delete payload[key];
   });
-  const res = await fetch('http://localhost:5000/api/calculate', {
+  return postJson<MortgageResult[]>('http://localhost:5000/api/calculate', payload);
+}
+
+export interface BatchScenarioResult {
+  results?: MortgageResult[];
+  error?: string;
+}
+
+export async function calculateMortgageBatch(
+  scenarios: Partial<MortgageParams>[],
+  range: { min_years: number; max_years: number; step?: number }
+): Promise<BatchScenarioResult[]> {
+  const res = await fetch('http://localhost:5000/api/calculate_batch', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(payload),
+    body: JSON.stringify({ ...range, scenarios }),
   });
   if (!res.ok) {
     const errorText = await res.text();
     throw new Error(errorText);
   }
   const data = await res.json();
-  return data;
-} 
\ No newline at end of file
+  return data.scenarios;
+}
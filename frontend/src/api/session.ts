@@ -0,0 +1,99 @@
+import { MortgageResult } from './mortgage';
+
+const API_URL = 'http://localhost:5001/api/session';
+
+export interface LiveSessionState {
+  version: number;
+  results: MortgageResult[];
+  annuity: { data: any[]; layout: any } | null;
+}
+
+interface TraceChange {
+  trace: number;
+  index: number[];
+  x: number[];
+  text: string[];
+}
+
+// Живая сессия расчета: параметры отправляются изменениями (PATCH), сервер присылает
+// по Server-Sent Events только изменившиеся строки результатов и точки графика.
+export class LiveSession {
+  private source: EventSource | null = null;
+  private state: LiveSessionState = { version: 0, results: [], annuity: null };
+
+  private constructor(readonly id: string, private onChange: (state: LiveSessionState) => void) {}
+
+  static async open(params: Record<string, unknown>, onChange: (state: LiveSessionState) => void): Promise<LiveSession> {
+    const res = await fetch(API_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(params),
+    });
+    if (!res.ok) {
+      throw new Error(await res.text());
+    }
+    const { session_id } = await res.json();
+    const session = new LiveSession(session_id, onChange);
+    session.connect();
+    return session;
+  }
+
+  private connect() {
+    this.source = new EventSource(`${API_URL}/${this.id}/events`);
+    this.source.addEventListener('results', (event) => {
+      const diff = JSON.parse((event as MessageEvent).data);
+      if (diff.reset) {
+        this.state.results = diff.rows;
+      } else {
+        const results = this.state.results.slice();
+        diff.rows.forEach(({ index, ...row }: MortgageResult & { index: number }) => {
+          results[index] = row;
+        });
+        this.state.results = results;
+      }
+      this.emit(diff.version);
+    });
+    this.source.addEventListener('annuity', (event) => {
+      const diff = JSON.parse((event as MessageEvent).data);
+      if (diff.reset || !this.state.annuity) {
+        this.state.annuity = { data: diff.data, layout: diff.layout };
+      } else {
+        const data = this.state.annuity.data.map(trace => ({ ...trace }));
+        diff.traces.forEach((change: TraceChange) => {
+          const trace = data[change.trace];
+          trace.x = trace.x.slice();
+          trace.text = trace.text.slice();
+          change.index.forEach((i, k) => {
+            trace.x[i] = change.x[k];
+            trace.text[i] = change.text[k];
+          });
+        });
+        this.state.annuity = { data, layout: this.state.annuity.layout };
+      }
+      this.emit(diff.version);
+    });
+    this.source.addEventListener('closed', () => this.source?.close());
+  }
+
+  private emit(version: number) {
+    this.state = { ...this.state, version };
+    this.onChange(this.state);
+  }
+
+  async update(delta: Record<string, unknown>): Promise<number> {
+    const res = await fetch(`${API_URL}/${this.id}`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(delta),
+    });
+    if (!res.ok) {
+      throw new Error(await res.text());
+    }
+    return (await res.json()).version;
+  }
+
+  close() {
+    this.source?.close();
+    fetch(`${API_URL}/${this.id}`, { method: 'DELETE' });
+  }
+}
@@ -3,7 +3,7 @@ import Plot from 'react-plotly.js';
 import { Switch, InputNumber, Slider, Spin } from 'antd';
 import { MortgageResult } from '../api/mortgage';
 import { ResultsTable } from './ResultsTable';
-import axios from 'axios';
+import { postJson } from '../api/conditional';
 import { debounce } from 'lodash';
 
 // Общие стили и константы
@@ -440,10 +440,10 @@ export const ResultsChart: React.FC<{ data: MortgageResult[], mainRate: number,
     if (!data.length) return;
     setAnnuityLoading(true);
     console.log('mainParams for annuity:', { ...mainParams, mode: mainMode, mode2: annuityMode });
-    axios.post('http://localhost:5000/api/annuity_payments', { ...mainParams, mode: mainMode, mode2: annuityMode })
+    postJson<{ data: any[]; layout: any }>('http://localhost:5000/api/annuity_payments', { ...mainParams, mode: mainMode, mode2: annuityMode })
       .then((res) => {
-        setAnnuityPlotData(res.data.data);
-        setAnnuityPlotLayout(res.data.layout);
+        setAnnuityPlotData(res.data);
+        setAnnuityPlotLayout(res.layout);
       })
       .finally(() => setAnnuityLoading(false));
   }, [annuityYears, mainMonthly, mainInitial, mainRate, annuityMode, data]);
@@ -471,14 +471,14 @@ export const ResultsChart: React.FC<{ data: MortgageResult[], mainRate: number,
     }
     const debugAltParams = { ...altParams, mode: isPropertyValueMode ? 'property_value' : 'monthly_payment', mode2: annuityMode };
     console.log('altParams for annuity:', debugAltParams);
-    axios.post('http://localhost:5000/api/annuity_payments', {
+    postJson<{ data: any[]; layout: any }>('http://localhost:5000/api/annuity_payments', {
       ...altParams,
       mode: isPropertyValueMode ? 'property_value' : 'monthly_payment',
       mode2: annuityMode
     })
       .then((res) => {
-        setAltAnnuityPlotData(res.data.data);
-        setAltAnnuityPlotLayout(res.data.layout);
+        setAltAnnuityPlotData(res.data);
+        setAltAnnuityPlotLayout(res.layout);
       })
       .finally(() => setAltAnnuityLoading(false));
   }, [altRate, altInitial, altMonthly, annuityYears, annuityMode, data]);